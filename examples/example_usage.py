@@ -0,0 +1,292 @@
+"""
+Example Usage of Repository Pattern
+
+Demonstrates how to use the database repositories in your workers and listeners.
+Writes go through session_scope() and the bulk helpers, so each example
+commits once rather than once per row.
+
+Do not import from application code - run it as a script:
+
+    python examples/example_usage.py
+"""
+
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add repo root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.db import (
+    # Database initialization
+    init_db,
+    session_scope,
+    
+    # Server operations
+    get_or_create_server,
+    
+    # Log operations
+    insert_raw_log,
+    insert_raw_logs_bulk,
+    get_unparsed_linux_logs,
+    
+    # Parsed details
+    insert_linux_details_bulk,
+    insert_windows_details,
+    insert_nginx_details,
+    
+    # Alert operations
+    create_alert,
+    get_recent_alerts_summary,
+    
+    # Rule operations
+    get_active_rules_for_source,
+)
+
+
+def example_listener_usage():
+    """
+    Example: How a listener would use the repository.
+    
+    When receiving a burst of logs from syslog:
+    """
+    received = [
+        "Jan 15 10:23:45 webserver-01 sshd[1234]: Accepted publickey for admin from 192.168.1.50",
+        "Jan 15 10:23:46 webserver-01 sshd[1234]: pam_unix(sshd:session): session opened for user admin",
+    ]
+    
+    # One transaction for the whole burst
+    with session_scope() as session:
+        # 1. Register or get server
+        server_id = get_or_create_server(
+            hostname="webserver-01",
+            ip="192.168.1.100",
+            server_type="linux",
+            session=session
+        )
+        
+        # 2. Insert raw logs in one statement
+        log_ids = insert_raw_logs_bulk(
+            [
+                {"server_id": server_id, "log_source": "linux", "content": line}
+                for line in received
+            ],
+            session=session
+        )
+    
+    print(f"✅ Stored logs with IDs: {log_ids}")
+
+
+def example_parser_worker():
+    """
+    Example: How a parser worker would process logs.
+    
+    Parser workers fetch unparsed logs and add details in one batch.
+    """
+    # 1. Stream unparsed Linux logs; details are written after the loop
+    logs = get_unparsed_linux_logs(limit=50)
+    
+    parsed_rows = []
+    for log in logs:
+        # 2. Parse the log (using your parser)
+        parsed = {
+            "timestamp": datetime(2024, 1, 15, 10, 23, 45),
+            "app_name": "sshd",
+            "pid": 1234,
+            "raw_message": log.content,
+            "ssh_action": "Accepted",
+            "ssh_user": "admin",
+            "ssh_ip": "192.168.1.50",
+            "log_entry_id": log.id
+        }
+        parsed_rows.append(parsed)
+    
+    # 3. Store all parsed details in one transaction
+    insert_linux_details_bulk(parsed_rows)
+    
+    print(f"✅ Parsed {len(parsed_rows)} logs")
+
+
+# Example detection patterns: (title, literal prefilter, regex).
+# Patterns are compiled once at import; the literal is a cheap substring
+# test that skips the regex for the vast majority of lines.
+EXAMPLE_ALERT_PATTERNS = [
+    (
+        "SSH Failed Login Attempt",
+        "failed password",
+        re.compile(r"failed password for (?:invalid user )?(\S+) from (\S+)"),
+    ),
+    (
+        "SSH Invalid User",
+        "invalid user",
+        re.compile(r"invalid user (\S+) from (\S+)"),
+    ),
+]
+
+
+def example_alert_engine():
+    """
+    Example: How alert engine would create alerts.
+    
+    Alert engine checks rules and creates alerts.
+    """
+    # 1. Get active rules for Linux logs
+    rules = get_active_rules_for_source("linux")
+    
+    print(f"Found {len(rules)} active rules for Linux")
+    
+    # 2. Get unparsed logs (materialized: alerts are written while we loop)
+    logs = list(get_unparsed_linux_logs(limit=10))
+    
+    # All alerts for the batch commit together
+    with session_scope() as session:
+        for log in logs:
+            # Lowercase once per log, not once per pattern
+            content = log.content.lower()
+            
+            # 3. Check each pattern (simplified example)
+            for title, literal, pattern in EXAMPLE_ALERT_PATTERNS:
+                if literal not in content:
+                    continue
+                match = pattern.search(content)
+                if not match:
+                    continue
+                
+                # 4. Create alert
+                alert_id = create_alert(
+                    log_entry_id=log.id,
+                    server_id=log.server_id,
+                    rule_id=1,  # Rule ID from database
+                    severity="high",
+                    title=title,
+                    description="Multiple failed password attempts detected",
+                    metadata={
+                        "attempts": 5,
+                        "source_ip": match.group(2),
+                        "target_user": match.group(1)
+                    },
+                    session=session
+                )
+                
+                print(f"🚨 Created alert {alert_id}")
+
+
+def example_dashboard_api():
+    """
+    Example: How dashboard API would fetch data.
+    
+    API endpoints can easily fetch data.
+    """
+    # Get recent critical alerts
+    # Summary rows carry only the columns a list view shows
+    alerts = get_recent_alerts_summary(limit=20, severity="critical", resolved=False)
+    
+    print(f"Found {len(alerts)} unresolved critical alerts:")
+    for alert in alerts:
+        print(f"  - {alert['title']} (Server: {alert['server_id']})")
+
+
+def example_windows_usage():
+    """
+    Example: Windows log handling.
+    """
+    event_data = {
+        "EventID": 4624,
+        "Channel": "Security",
+        "Computer": "DC01",
+        "Message": "An account was successfully logged on"
+    }
+    
+    # Server, raw log and details share one transaction
+    with session_scope() as session:
+        # 1. Register Windows server
+        server_id = get_or_create_server(
+            hostname="DC01",
+            ip="10.0.0.5",
+            server_type="windows",
+            session=session
+        )
+        
+        # 2. Insert raw log
+        log_id = insert_raw_log(
+            server_id=server_id,
+            log_source="windows",
+            content='<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event">...',
+            session=session
+        )
+        
+        # 3. Store parsed details
+        insert_windows_details(log_id, event_data, session=session)
+    
+    print(f"✅ Stored Windows event {log_id}")
+
+
+def example_nginx_usage():
+    """
+    Example: Nginx log handling.
+    """
+    parsed = {
+        "remote_addr": "192.168.1.1",
+        "time_local": datetime(2024, 1, 15, 10, 23, 45),
+        "request_method": "GET",
+        "request_uri": "/api/users",
+        "status": 200,
+        "body_bytes_sent": 1234,
+        "http_user_agent": "Mozilla/5.0"
+    }
+    
+    # Server, raw log and details share one transaction
+    with session_scope() as session:
+        # 1. Register nginx server
+        server_id = get_or_create_server(
+            hostname="nginx-lb-01",
+            ip="10.0.0.10",
+            server_type="nginx",
+            session=session
+        )
+        
+        # 2. Insert raw log
+        log_id = insert_raw_log(
+            server_id=server_id,
+            log_source="nginx",
+            content='192.168.1.1 - - [15/Jan/2024:10:23:45 +0000] "GET /api/users HTTP/1.1" 200 1234',
+            session=session
+        )
+        
+        # 3. Store parsed details
+        insert_nginx_details(log_id, parsed, session=session)
+    
+    print(f"✅ Stored Nginx log {log_id}")
+
+
+if __name__ == "__main__":
+    # Initialize database
+    init_db()
+    
+    print("=" * 60)
+    print("REPOSITORY PATTERN EXAMPLES")
+    print("=" * 60)
+    
+    # Run examples
+    print("\n1. LISTENER USAGE:")
+    example_listener_usage()
+    
+    print("\n2. PARSER WORKER:")
+    example_parser_worker()
+    
+    print("\n3. ALERT ENGINE:")
+    example_alert_engine()
+    
+    print("\n4. DASHBOARD API:")
+    example_dashboard_api()
+    
+    print("\n5. WINDOWS LOGS:")
+    example_windows_usage()
+    
+    print("\n6. NGINX LOGS:")
+    example_nginx_usage()
+    
+    print("\n" + "=" * 60)
+    print("✅ ALL EXAMPLES COMPLETED!")
+    print("=" * 60)
@@ -13,7 +13,7 @@ from contextlib import asynccontextmanager
 # Add src to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from src.models.source import LogSource, calculate_source_status
+from src.models.source import LogSource, calculate_source_statuses
 from src.manager.listener_manager import ListenerManager
 
 # Global listener manager instance
@@ -100,9 +100,13 @@ def get_live_sources():
                 risk_score=0
             )
             
-            source.status = calculate_source_status(last_seen)
             sources_list.append(source)
     
+    # One clock reading for the whole list
+    statuses = calculate_source_statuses(source.last_seen for source in sources_list)
+    for source, status in zip(sources_list, statuses):
+        source.status = status
+    
     return sources_list
 
 
@@ -228,8 +232,9 @@ def get_mock_sources():
     ]
     
     # Update status for each source
-    for source in sources:
-        source.status = calculate_source_status(source.last_seen)
+    statuses = calculate_source_statuses(source.last_seen for source in sources)
+    for source, status in zip(sources, statuses):
+        source.status = status
     
     return sources
 
@@ -248,14 +248,10 @@ try:
             
             # Show metadata if available
             if alert.alert_metadata:
-                try:
-                    import json
-                    metadata = json.loads(alert.alert_metadata)
-                    if 'matched_fields' in metadata and metadata['matched_fields']:
-                        fields = list(metadata['matched_fields'].keys())[:3]
-                        print(f"        🔍 Matched: {', '.join(fields)}")
-                except:
-                    pass
+                metadata = alert.alert_metadata
+                if isinstance(metadata, dict) and metadata.get('matched_fields'):
+                    fields = list(metadata['matched_fields'].keys())[:3]
+                    print(f"        🔍 Matched: {', '.join(fields)}")
             print()
     
     # SUMMARY STATISTICS
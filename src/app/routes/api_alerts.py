@@ -69,7 +69,7 @@ async def get_alerts(
                     "ip_address": server.ip_address
                 },
                 "log_source": log_entry.log_source,
-                "metadata": json.loads(alert.alert_metadata) if alert.alert_metadata else None
+                "metadata": alert.alert_metadata
             })
         
         return {
@@ -94,13 +94,7 @@ async def get_alert_detail(alert_id: int) -> Dict[str, Any]:
         server = db.query(Server).filter_by(id=alert.server_id).first()
         log_entry = db.query(LogEntry).filter_by(id=alert.log_entry_id).first()
         
-        import json
-        metadata = {}
-        if alert.alert_metadata:
-            try:
-                metadata = json.loads(alert.alert_metadata)
-            except:
-                pass
+        metadata = alert.alert_metadata or {}
         
         return {
             "id": alert.id,
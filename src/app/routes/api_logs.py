@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from src.db.setup import SessionLocal
 from src.db.models import LogEntry, Server
+from sqlalchemy import func
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
@@ -152,8 +153,8 @@ async def search_logs(
     try:
         query = db.query(LogEntry, Server).join(Server, LogEntry.server_id == Server.id)
         
-        # Search in content
-        query = query.filter(LogEntry.content.like(f"%{q}%"))
+        # Search in content (decompressed, so long lines match too)
+        query = query.filter(func.decompress_content(LogEntry.content).like(f"%{q}%"))
         
         if source:
             query = query.filter(LogEntry.log_source == source)
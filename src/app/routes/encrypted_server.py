@@ -34,6 +34,10 @@ DATA_DIR = Path("data")
 ROUTER_LOG_DIR = DATA_DIR / "router_logs"
 PLUGIN_DIR = DATA_DIR / "web_plugins"  # <--- NEW: Stores uploaded HTML plugins
 
+# Log type keywords, compiled once instead of per received message
+LINUX_AUTH_RE = re.compile(r"(sshd|failed password|sudo:)")
+FIREWALL_RE = re.compile(r"(deny|block|drop|ufw|iptables|firewall)")
+
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 ROUTER_LOG_DIR.mkdir(parents=True, exist_ok=True)
 PLUGIN_DIR.mkdir(parents=True, exist_ok=True)
@@ -197,9 +201,9 @@ class LogStore:
         
         if any(k in text for k in ["tp-link", "archer", "tl-", "tplink"]):
             log_type = "tplink_router"
-        elif re.search(r"(sshd|failed password|sudo:)", text):
+        elif LINUX_AUTH_RE.search(text):
             log_type = "linux_auth"
-        elif re.search(r"(deny|block|drop|ufw|iptables|firewall)", text):
+        elif FIREWALL_RE.search(text):
             log_type = "firewall_network"
         elif platform.system() == "Linux":
             log_type = "linux_syslog"
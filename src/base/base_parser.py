@@ -5,10 +5,23 @@ Provides abstract base class for all log parsers in the system.
 Each parser must implement methods to parse individual logs and batches.
 """
 
+import datetime
+import itertools
+import os
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 import polars as pl
 
+# Column the batch parsers use to carry each row's position in the input list
+ROW_INDEX = "_log_index"
+
+# Below this many logs a Polars pass costs more than parsing row by row
+BATCH_MIN_ROWS = 256
+
+# Compression for 'feather' (Arrow IPC) output files
+FEATHER_COMPRESSION = "zstd"
+
 
 class BaseParser(ABC):
     """
@@ -16,11 +29,19 @@ class BaseParser(ABC):
     
     Each concrete parser must implement:
     - parse(): Parse a single log line
-    - parse_batch(): Parse multiple logs into a DataFrame
     - get_log_type(): Return the log type identifier
     - can_parse(): Detect if this parser can handle a log
+    
+    parse_batch() has a row-by-row default; parsers with a vectorized
+    batch path override it.
     """
     
+    # Output files are named batch_<prefix>_<counter>; the prefix is the
+    # local time it was taken, refreshed at local midnight
+    _batch_counter = itertools.count()
+    _file_prefix = ""
+    _file_prefix_until = 0.0
+    
     @abstractmethod
     def parse(self, raw_log: str, metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
@@ -35,18 +56,35 @@ class BaseParser(ABC):
         """
         pass
     
-    @abstractmethod
     def parse_batch(self, logs: List[Dict[str, Any]]) -> Optional[pl.DataFrame]:
         """
         Parse a batch of logs into a Polars DataFrame.
         
+        Default: can_parse + parse per log, then one normalize over the
+        frame. Bound methods are hoisted out of the loop.
+        
         Args:
             logs: List of log dictionaries with 'line', 'src_ip', 'recv_time'
             
         Returns:
             Polars DataFrame with parsed and enriched data, or None if no logs match
         """
-        pass
+        can_parse = self.can_parse
+        parse = self.parse
+        rows = []
+        append = rows.append
+        
+        for log in logs:
+            line = log.get("line", "")
+            if can_parse(line):
+                parsed = parse(line, {"src_ip": log.get("src_ip", ""), "recv_time": log.get("recv_time", "")})
+                if parsed:
+                    append(parsed)
+        
+        if not rows:
+            return None
+        
+        return self.normalize(pl.DataFrame(rows, infer_schema_length=None))
     
     @abstractmethod
     def get_log_type(self) -> str:
@@ -71,6 +109,92 @@ class BaseParser(ABC):
         """
         pass
     
+    def try_parse(self, raw_log: str, metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Detect and parse a log line in one call.
+        
+        can_parse() is expected to be a cheap prefilter; parse() is the real
+        test and returns None on failure, so nothing is decoded twice.
+        
+        Args:
+            raw_log: The raw log line
+            metadata: Optional metadata (src_ip, recv_time, etc.)
+            
+        Returns:
+            Dictionary with parsed fields, or None if this parser does not match
+        """
+        if not self.can_parse(raw_log):
+            return None
+        return self.parse(raw_log, metadata)
+    
+    def parse_many(self, logs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Parse a list of logs, returning one result per input log.
+        
+        Parsers with a vectorized parse_batch override this to parse the
+        whole list at once; the default calls try_parse for each log.
+        
+        Args:
+            logs: List of log dictionaries with 'line', 'src_ip', 'recv_time'
+            
+        Returns:
+            Parsed dictionaries in input order, None where a log did not parse
+        """
+        try_parse = self.try_parse
+        return [
+            try_parse(log.get("line", ""), {"recv_time": log.get("recv_time"), "src_ip": log.get("src_ip")})
+            for log in logs
+        ]
+    
+    @staticmethod
+    def _rows_from_frame(df: Optional[pl.DataFrame], count: int) -> List[Optional[Dict[str, Any]]]:
+        """Turn a batch frame carrying ROW_INDEX back into parse_many's list."""
+        results: List[Optional[Dict[str, Any]]] = [None] * count
+        if df is not None:
+            for row in df.to_dicts():
+                results[row.pop(ROW_INDEX)] = row
+        return results
+    
+    def _batch_filename(self, ext: str) -> str:
+        """Path for the next batch file in output_dir, unique within the process."""
+        now = time.time()
+        if now >= BaseParser._file_prefix_until:
+            current = datetime.datetime.fromtimestamp(now)
+            midnight = datetime.datetime.combine(current.date() + datetime.timedelta(days=1), datetime.time())
+            BaseParser._file_prefix = current.strftime("%Y%m%d_%H%M%S")
+            BaseParser._file_prefix_until = midnight.timestamp()
+        
+        return os.path.join(self.output_dir, f"batch_{BaseParser._file_prefix}_{next(self._batch_counter):08d}.{ext}")
+    
+    @staticmethod
+    def _write_frame(df: Union[pl.DataFrame, pl.LazyFrame], filename: str, format: str) -> Optional[int]:
+        """
+        Write a frame as NDJSON ('json'), Arrow IPC ('feather') or CSV.
+        
+        A LazyFrame is streamed with sink_ndjson/sink_csv, so its pending
+        filters and casts run in the same pass as the write without the
+        whole result being collected first.
+        
+        Returns:
+            Number of rows written, or None for a LazyFrame
+        """
+        if isinstance(df, pl.LazyFrame):
+            if format == "json":
+                df.sink_ndjson(filename)
+            elif format == "feather":
+                df.sink_ipc(filename, compression=FEATHER_COMPRESSION)
+            else:
+                df.sink_csv(filename)
+            return None
+        
+        if format == "json":
+            df.write_ndjson(filename)
+        elif format == "feather":
+            df.write_ipc(filename, compression=FEATHER_COMPRESSION)
+        else:
+            df.write_csv(filename)
+        return len(df)
+    
     def enrich(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Optional enrichment step for parsed data.
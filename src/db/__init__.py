@@ -5,7 +5,7 @@ Provides clean, modular database access layer.
 """
 
 from src.db.base import Base
-from src.db.setup import SessionLocal, engine, init_db
+from src.db.setup import SessionLocal, engine, init_db, session_scope
 from src.db.models import (
     Server,
     LogEntry,
@@ -20,23 +20,36 @@ from src.db.models import (
 from src.db.repository import (
     # Server operations
     get_or_create_server,
+    get_or_create_servers,
     
     # Log operations
     insert_raw_log,
+    insert_raw_logs_bulk,
+    insert_raw_logs_fast,
     get_unparsed_linux_logs,
     get_unparsed_windows_logs,
     get_unparsed_nginx_logs,
+    claim_unparsed_logs,
+    release_log_claims,
     get_recent_logs,
+    get_recent_logs_summary,
+    count_logs_by_source,
     
     # Parsed log details
     insert_linux_details,
+    insert_linux_details_bulk,
     insert_windows_details,
+    insert_windows_details_bulk,
     insert_nginx_details,
+    insert_nginx_details_bulk,
     
     # Alert operations
     create_alert,
+    create_alerts_bulk,
     get_recent_alerts,
+    get_recent_alerts_summary,
     resolve_alert,
+    resolve_alerts_bulk,
     
     # Rule operations
     get_active_rules_for_source,
@@ -46,6 +59,7 @@ from src.db.repository import (
 __all__ = [
     # Database setup
     "SessionLocal",
+    "session_scope",
     "Base",
     "engine",
     "init_db",
@@ -61,23 +75,36 @@ __all__ = [
     
     # Server operations
     "get_or_create_server",
+    "get_or_create_servers",
     
     # Log operations
     "insert_raw_log",
+    "insert_raw_logs_bulk",
+    "insert_raw_logs_fast",
     "get_unparsed_linux_logs",
     "get_unparsed_windows_logs",
     "get_unparsed_nginx_logs",
+    "claim_unparsed_logs",
+    "release_log_claims",
     "get_recent_logs",
+    "get_recent_logs_summary",
+    "count_logs_by_source",
     
     # Parsed log details
     "insert_linux_details",
+    "insert_linux_details_bulk",
     "insert_windows_details",
+    "insert_windows_details_bulk",
     "insert_nginx_details",
+    "insert_nginx_details_bulk",
     
     # Alert operations
     "create_alert",
+    "create_alerts_bulk",
     "get_recent_alerts",
+    "get_recent_alerts_summary",
     "resolve_alert",
+    "resolve_alerts_bulk",
     
     # Rule operations
     "get_active_rules_for_source",
@@ -4,12 +4,97 @@ Database Manager
 Manages SQLite database for log storage.
 """
 
-import sqlite3
-from typing import Dict, List, Any, Optional
+import json
+from collections import Counter
+from typing import Dict, Iterator, List, Any, Optional
 from pathlib import Path
 from datetime import datetime
 import threading
 
+# pysqlite3 (e.g. pysqlite3-binary) bundles a newer SQLite than the one
+# CPython links against; it is a drop-in replacement when installed.
+try:
+    import pysqlite3.dbapi2 as sqlite3
+except ImportError:
+    import sqlite3
+
+
+# SQL used on the write path. Each statement is issued verbatim from every
+# call site so sqlite3's per-connection statement cache always gets a hit.
+UPSERT_SERVER_SQL = '''
+    INSERT INTO server (hostname, ip_address) VALUES (?, ?)
+    ON CONFLICT(hostname, ip_address) DO UPDATE SET last_seen = CURRENT_TIMESTAMP
+    RETURNING id
+'''
+
+SELECT_SERVER_BY_HOSTNAME_SQL = 'SELECT id FROM server WHERE hostname = ?'
+
+TOUCH_SERVER_SQL = 'UPDATE server SET last_seen = CURRENT_TIMESTAMP WHERE id = ?'
+
+INSERT_SERVER_SQL = 'INSERT INTO server (hostname, ip_address) VALUES (?, ?)'
+
+INSERT_OR_IGNORE_SERVER_SQL = 'INSERT OR IGNORE INTO server (hostname, ip_address) VALUES (?, ?)'
+
+INSERT_LOG_ENTRY_SQL = '''
+    INSERT INTO log_entry (timestamp, recv_time, server_id, log_type, raw_line, parsed_data)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_LINUX_SQL = '''
+    INSERT INTO linux_log_details (log_entry_id, facility, severity, program, pid, message)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_WINDOWS_SQL = '''
+    INSERT INTO windows_log_details (log_entry_id, channel, event_id, message, user_name)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+INSERT_NGINX_SQL = '''
+    INSERT INTO nginx_log_details (log_entry_id, method, path, status_code, bytes, user_agent)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# log_type -> (detail insert, parsed-log fields in column order after log_entry_id)
+DETAIL_INSERTS = {
+    "linux": (INSERT_LINUX_SQL, ("facility", "severity", "program", "pid", "message")),
+    "windows": (INSERT_WINDOWS_SQL, ("channel", "event_id", "message", "user_name")),
+    "nginx": (INSERT_NGINX_SQL, ("method", "path", "status_code", "bytes", "user_agent")),
+}
+
+# Buckets with strftime, like the backfill in _init_rollups, so offsets such
+# as +05:30 are normalized the same way; unparseable timestamps are skipped
+UPSERT_LOG_HOURLY_SQL = '''
+    INSERT INTO log_hourly (hour, log_type, count)
+    SELECT hour, log_type, count FROM (
+        SELECT strftime('%Y-%m-%d %H:00:00', ?) AS hour, ? AS log_type, ? AS count
+    )
+    WHERE hour IS NOT NULL
+    ON CONFLICT(hour, log_type) DO UPDATE SET count = count + excluded.count
+'''
+
+# get_stats in one statement, so the counts come from one snapshot: the
+# server row first, then one row per log_type (total_logs is their sum)
+STATS_SQL = '''
+    SELECT 'server', NULL, COUNT(*) FROM server
+    UNION ALL
+    SELECT 'log', log_type, COUNT(*) FROM log_entry GROUP BY log_type
+'''
+
+# Planner statistics upkeep on the batch write path
+OPTIMIZE_EVERY_BATCHES = 50
+ANALYZE_EVERY_ROWS = 10_000
+
+
+def _to_json(parsed_log: Dict[str, Any]) -> str:
+    """Serialize a parsed log compactly for the parsed_data column."""
+    return json.dumps(parsed_log, separators=(',', ':'), default=str)
+
+
+class _ReaderLocal(threading.local):
+    """Per-thread reader slot; the class default saves a hasattr check per query."""
+    conn = None
+
 
 class DatabaseManager:
     """
@@ -32,24 +117,73 @@ class DatabaseManager:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._in_memory = str(db_path) == ":memory:"
+        
+        # One shared writer connection, serialized by the lock. RLock because
+        # save_batch falls back to save() while already holding it.
+        self._writer_lock = threading.RLock()
+        self._writer_conn: Optional[sqlite3.Connection] = None
         
-        # Thread-local connections
-        self._local = threading.local()
+        # Thread-local read-only connections
+        self._local = _ReaderLocal()
+        
+        # Writes since planner statistics were last refreshed (see _maybe_optimize)
+        self._batches_since_optimize = 0
+        self._rows_since_analyze = 0
         
         # Initialize schema
         self._init_schema()
         
         print(f"[DatabaseManager] Initialized at {self.db_path}")
     
-    def get_connection(self) -> sqlite3.Connection:
-        """Get thread-safe database connection."""
-        if not hasattr(self._local, 'conn') or self._local.conn is None:
-            self._local.conn = sqlite3.connect(
-                str(self.db_path),
-                check_same_thread=False
+    def _connect(self, database: str, **kwargs) -> sqlite3.Connection:
+        """Open a connection with the shared settings."""
+        conn = sqlite3.connect(
+            database,
+            check_same_thread=False,
+            cached_statements=256,
+            **kwargs
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def get_connection(self, readonly: bool = False) -> sqlite3.Connection:
+        """
+        Get a database connection.
+        
+        Writes go through a single shared connection; callers must hold
+        ``_writer_lock`` while using it. With ``readonly=True`` a per-thread
+        read-only connection is returned instead, so dashboard queries run
+        alongside ingest (under WAL, readers never block the writer).
+        
+        Args:
+            readonly: Return the calling thread's reader connection
+        """
+        if readonly:
+            return self.get_reader()
+        
+        if self._writer_conn is None:
+            with self._writer_lock:
+                if self._writer_conn is None:
+                    conn = self._connect(str(self.db_path), isolation_level="IMMEDIATE")
+                    if not self._in_memory:
+                        conn.execute('PRAGMA journal_mode=WAL')
+                    self._writer_conn = conn
+        return self._writer_conn
+    
+    def get_reader(self) -> sqlite3.Connection:
+        """Get the calling thread's read-only connection."""
+        # A second connection to :memory: would open a separate, empty database
+        if self._in_memory:
+            return self.get_connection()
+        
+        conn = self._local.conn
+        if conn is None:
+            conn = self._local.conn = self._connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True
             )
-            self._local.conn.row_factory = sqlite3.Row
-        return self._local.conn
+        return conn
     
     def _init_schema(self):
         """Create database tables if they don't exist."""
@@ -148,46 +282,202 @@ class DatabaseManager:
             )
         ''')
         
+        # Expose parsed_data.program as an indexable column. Rows written before
+        # parsed_data was JSON are skipped by the json_valid() guard.
+        cursor.execute('PRAGMA table_xinfo(log_entry)')
+        if 'program' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute('''
+                ALTER TABLE log_entry ADD COLUMN program TEXT
+                GENERATED ALWAYS AS (
+                    CASE WHEN json_valid(parsed_data) THEN json_extract(parsed_data, '$.program') END
+                ) VIRTUAL
+            ''')
+        
+        # Full-text index over raw log lines
+        self._has_fts = self._init_fts(cursor)
+        self._init_rollups(cursor)
+        
         # Create indexes
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_log_timestamp ON log_entry(timestamp)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_log_type ON log_entry(log_type)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_log_program ON log_entry(program, id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_server_hostname ON server(hostname)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_timestamp ON sigma_alert(timestamp DESC)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_severity ON sigma_alert(severity)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_log ON sigma_alert(log_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_log ON sigma_alert(log_entry_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_ack ON sigma_alert(acknowledged)')
         
+        # Detail tables are always looked up by their parent log entry
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_linux_fk ON linux_log_details(log_entry_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_windows_fk ON windows_log_details(log_entry_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_nginx_fk ON nginx_log_details(log_entry_id)')
+        
+        # Filtered "recent logs" views order by timestamp within a server or type
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_log_server_ts ON log_entry(server_id, timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_log_entry_log_type_ts ON log_entry(log_type, timestamp DESC)')
+        
+        # Keyset pagination walks (timestamp, id) downwards
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_log_ts_id ON log_entry(timestamp DESC, id DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_ts_id ON sigma_alert(timestamp DESC, id DESC)')
+        
+        # The active-alerts view only ever reads unacknowledged rows
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_unack_ts ON sigma_alert(timestamp DESC, id DESC) WHERE acknowledged = 0')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_sev_unack ON sigma_alert(severity, timestamp DESC, id DESC) WHERE acknowledged = 0')
+        
         conn.commit()
     
-    def _get_or_create_server(self, hostname: str, ip_address: str = None) -> int:
-        """Get server ID or create new server entry."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def _init_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Create the FTS5 index used by search_logs and keep it in sync via triggers.
         
-        # Try to find existing
-        cursor.execute(
-            'SELECT id FROM server WHERE hostname = ? AND (ip_address = ? OR ? IS NULL)',
-            (hostname, ip_address, ip_address)
+        log_fts is an external-content table over log_entry, so the text is
+        not stored twice. Returns False when SQLite was built without FTS5,
+        in which case search_logs falls back to LIKE.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'log_fts'")
+        exists = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5(
+                    raw_line,
+                    log_type,
+                    content='log_entry',
+                    content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"[DatabaseManager] FTS5 unavailable, text search will scan: {e}")
+            return False
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS log_entry_fts_insert AFTER INSERT ON log_entry BEGIN
+                INSERT INTO log_fts (rowid, raw_line, log_type)
+                VALUES (new.id, new.raw_line, new.log_type);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS log_entry_fts_delete AFTER DELETE ON log_entry BEGIN
+                INSERT INTO log_fts (log_fts, rowid, raw_line, log_type)
+                VALUES ('delete', old.id, old.raw_line, old.log_type);
+            END
+        ''')
+        
+        # Index logs that were stored before the FTS table existed
+        if not exists:
+            cursor.execute("INSERT INTO log_fts (log_fts) VALUES ('rebuild')")
+        
+        return True
+    
+    def _init_rollups(self, cursor: sqlite3.Cursor):
+        """
+        Create the hourly count rollup read by get_timeseries_stats.
+        
+        save/save_batch keep it current; on first creation it is backfilled
+        from the logs already stored.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'log_hourly'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS log_hourly (
+                hour TEXT NOT NULL,
+                log_type TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (hour, log_type)
+            ) WITHOUT ROWID
+        ''')
+        
+        if not exists:
+            cursor.execute('''
+                INSERT INTO log_hourly (hour, log_type, count)
+                SELECT strftime('%Y-%m-%d %H:00:00', timestamp) AS bucket, log_type, COUNT(*)
+                FROM log_entry
+                WHERE bucket IS NOT NULL
+                GROUP BY bucket, log_type
+            ''')
+    
+    def _bump_rollups(self, cursor: sqlite3.Cursor, logs: List[Dict[str, Any]]):
+        """Add a batch's logs to log_hourly, one upsert per (timestamp, log_type)."""
+        counts = Counter(
+            (log.get("timestamp"), log.get("log_type"))
+            for log in logs
         )
+        cursor.executemany(UPSERT_LOG_HOURLY_SQL, [
+            (timestamp, log_type, count)
+            for (timestamp, log_type), count in counts.items()
+            if timestamp is not None
+        ])
+    
+    def _get_or_create_server(self, hostname: str, ip_address: str = None) -> int:
+        """Get server ID or create new server entry."""
+        with self._writer_lock:
+            conn = self.get_connection()
+            server_id = self._upsert_server(conn.cursor(), hostname, ip_address)
+            conn.commit()
+            return server_id
+    
+    def _upsert_server(self, cursor: sqlite3.Cursor, hostname: str, ip_address: str = None) -> int:
+        """Find or insert a server row without committing (caller owns the transaction)."""
+        if ip_address is not None:
+            # One statement: insert, or bump last_seen on the existing row
+            cursor.execute(UPSERT_SERVER_SQL, (hostname, ip_address))
+            return cursor.fetchone()[0]
+        
+        # NULL never conflicts on UNIQUE(hostname, ip_address), so without an
+        # IP fall back to matching any server with this hostname
+        cursor.execute(SELECT_SERVER_BY_HOSTNAME_SQL, (hostname,))
         result = cursor.fetchone()
         
         if result:
             server_id = result[0]
-            # Update last_seen
-            cursor.execute(
-                'UPDATE server SET last_seen = CURRENT_TIMESTAMP WHERE id = ?',
-                (server_id,)
-            )
-            conn.commit()
+            cursor.execute(TOUCH_SERVER_SQL, (server_id,))
             return server_id
         
-        # Create new
+        cursor.execute(INSERT_SERVER_SQL, (hostname, ip_address))
+        return cursor.lastrowid
+    
+    def _resolve_servers(self, cursor: sqlite3.Cursor, keys: set) -> Dict[tuple, int]:
+        """
+        Map every (hostname, ip) pair in a batch to a server id in bulk.
+        
+        Missing servers are created with one executemany, ids come back from
+        a single SELECT and last_seen is bumped with one UPDATE. Like
+        _upsert_server, a pair without an IP matches any server with that
+        hostname. Does not commit.
+        """
+        cursor.executemany(INSERT_OR_IGNORE_SERVER_SQL, [key for key in keys if key[1] is not None])
+        
+        hostnames = list({hostname for hostname, _ in keys})
+        placeholders = ','.join('?' * len(hostnames))
         cursor.execute(
-            'INSERT INTO server (hostname, ip_address) VALUES (?, ?)',
-            (hostname, ip_address)
+            f'SELECT id, hostname, ip_address FROM server WHERE hostname IN ({placeholders}) ORDER BY id',
+            hostnames
         )
-        conn.commit()
-        return cursor.lastrowid
+        
+        exact, by_hostname = {}, {}
+        for server_id, hostname, ip_address in cursor.fetchall():
+            exact[(hostname, ip_address)] = server_id
+            by_hostname.setdefault(hostname, server_id)
+        
+        server_ids = {}
+        for hostname, ip_address in keys:
+            if ip_address is not None:
+                server_ids[(hostname, ip_address)] = exact[(hostname, ip_address)]
+            elif hostname in by_hostname:
+                server_ids[(hostname, None)] = by_hostname[hostname]
+            else:
+                cursor.execute(INSERT_SERVER_SQL, (hostname, None))
+                server_ids[(hostname, None)] = by_hostname[hostname] = cursor.lastrowid
+        
+        ids = list(set(server_ids.values()))
+        cursor.execute(
+            f'UPDATE server SET last_seen = CURRENT_TIMESTAMP WHERE id IN ({",".join("?" * len(ids))})',
+            ids
+        )
+        
+        return server_ids
     
     def save(self, parsed_log: Dict[str, Any]) -> int:
         """
@@ -202,127 +492,220 @@ class DatabaseManager:
         if not parsed_log:
             return None
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Get server ID
-        hostname = parsed_log.get("hostname", "unknown")
-        ip_address = parsed_log.get("src_ip")
-        server_id = self._get_or_create_server(hostname, ip_address)
-        
-        # Insert main log entry
-        cursor.execute('''
-            INSERT INTO log_entry (timestamp, recv_time, server_id, log_type, raw_line, parsed_data)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            parsed_log.get("timestamp"),
-            parsed_log.get("recv_time"),
-            server_id,
-            parsed_log.get("log_type"),
-            parsed_log.get("raw_line"),
-            str(parsed_log)
-        ))
-        
-        log_entry_id = cursor.lastrowid
-        
-        # Insert type-specific details
-        log_type = parsed_log.get("log_type")
-        
-        if log_type == "linux":
-            cursor.execute('''
-                INSERT INTO linux_log_details (log_entry_id, facility, severity, program, pid, message)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                log_entry_id,
-                parsed_log.get("facility"),
-                parsed_log.get("severity"),
-                parsed_log.get("program"),
-                parsed_log.get("pid"),
-                parsed_log.get("message")
-            ))
-        
-        elif log_type == "windows":
-            cursor.execute('''
-                INSERT INTO windows_log_details (log_entry_id, channel, event_id, message, user_name)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                log_entry_id,
-                parsed_log.get("channel"),
-                parsed_log.get("event_id"),
-                parsed_log.get("message"),
-                parsed_log.get("user_name")
-            ))
-        
-        elif log_type == "nginx":
-            cursor.execute('''
-                INSERT INTO nginx_log_details (log_entry_id, method, path, status_code, bytes, user_agent)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                log_entry_id,
-                parsed_log.get("method"),
-                parsed_log.get("path"),
-                parsed_log.get("status_code"),
-                parsed_log.get("bytes"),
-                parsed_log.get("user_agent")
-            ))
-        
-        conn.commit()
-        return log_entry_id
+        with self._writer_lock:
+            conn = self.get_connection()
+            
+            # One transaction (and one commit) for server, entry, details and rollup
+            with conn:
+                cursor = conn.cursor()
+                
+                # Get server ID
+                hostname = parsed_log.get("hostname", "unknown")
+                ip_address = parsed_log.get("src_ip")
+                server_id = self._upsert_server(cursor, hostname, ip_address)
+                
+                # Insert main log entry
+                cursor.execute(INSERT_LOG_ENTRY_SQL, (
+                    parsed_log.get("timestamp"),
+                    parsed_log.get("recv_time"),
+                    server_id,
+                    parsed_log.get("log_type"),
+                    parsed_log.get("raw_line"),
+                    _to_json(parsed_log)
+                ))
+                
+                log_entry_id = cursor.lastrowid
+                
+                # Insert type-specific details
+                detail = DETAIL_INSERTS.get(parsed_log.get("log_type"))
+                if detail:
+                    sql, fields = detail
+                    cursor.execute(sql, (log_entry_id, *(parsed_log.get(f) for f in fields)))
+                
+                self._bump_rollups(cursor, [parsed_log])
+            
+            return log_entry_id
     
     def save_batch(self, parsed_logs: List[Dict[str, Any]]) -> int:
         """
-        Save batch of parsed logs.
+        Save batch of parsed logs in a single transaction.
+        
+        Servers for the whole batch are resolved in bulk, then log entries
+        and each detail table are written with executemany.
+        If the batch fails it is rolled back and retried log-by-log so a
+        single bad row does not drop the rest.
         
         Args:
             parsed_logs: List of parsed log dictionaries
-            
+        
         Returns:
             Number of logs saved
         """
-        count = 0
-        for log in parsed_logs:
+        logs = [log for log in parsed_logs if log]
+        if not logs:
+            return 0
+        
+        with self._writer_lock:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
             try:
-                self.save(log)
-                count += 1
+                cursor.execute('BEGIN IMMEDIATE')
+                
+                server_ids = self._resolve_servers(
+                    cursor,
+                    {(log.get("hostname", "unknown"), log.get("src_ip")) for log in logs}
+                )
+                
+                cursor.executemany(INSERT_LOG_ENTRY_SQL, [
+                    (
+                        log.get("timestamp"),
+                        log.get("recv_time"),
+                        server_ids[(log.get("hostname", "unknown"), log.get("src_ip"))],
+                        log.get("log_type"),
+                        log.get("raw_line"),
+                        _to_json(log)
+                    )
+                    for log in logs
+                ])
+                
+                # BEGIN IMMEDIATE holds the write lock, so the AUTOINCREMENT ids
+                # assigned above form one contiguous range ending at last_insert_rowid().
+                # This beats per-row INSERT ... RETURNING id, which the stdlib can only
+                # run through execute() one row at a time.
+                if cursor.rowcount != len(logs):
+                    raise sqlite3.DatabaseError(
+                        f"inserted {cursor.rowcount} of {len(logs)} log entries"
+                    )
+                cursor.execute('SELECT last_insert_rowid()')
+                first_id = cursor.fetchone()[0] - len(logs) + 1
+                
+                # Bucket detail rows per type, then one executemany per table
+                detail_rows = {log_type: [] for log_type in DETAIL_INSERTS}
+                for log_entry_id, log in enumerate(logs, start=first_id):
+                    rows = detail_rows.get(log.get("log_type"))
+                    if rows is not None:
+                        fields = DETAIL_INSERTS[log["log_type"]][1]
+                        rows.append((log_entry_id, *(log.get(f) for f in fields)))
+                
+                for log_type, rows in detail_rows.items():
+                    if rows:
+                        cursor.executemany(DETAIL_INSERTS[log_type][0], rows)
+                
+                self._bump_rollups(cursor, logs)
+                
+                conn.commit()
+                self._maybe_optimize(conn, len(logs))
+                return len(logs)
+            
             except Exception as e:
-                print(f"[DatabaseManager] Error saving log: {e}")
-                print(f"  Log: {log.get('raw_line', '')[:80]}...")
+                conn.rollback()
+                print(f"[DatabaseManager] Batch insert failed, saving logs individually: {e}")
+            
+            count = 0
+            for log in logs:
+                try:
+                    self.save(log)
+                    count += 1
+                except Exception as e:
+                    print(f"[DatabaseManager] Error saving log: {e}")
+                    print(f"  Log: {log.get('raw_line', '')[:80]}...")
+            
+            return count
+    
+    def _maybe_optimize(self, conn: sqlite3.Connection, rows: int):
+        """
+        Keep query planner statistics fresh as batches land.
         
-        return count
+        Runs PRAGMA optimize every OPTIMIZE_EVERY_BATCHES batches and a full
+        ANALYZE of the big tables every ANALYZE_EVERY_ROWS rows. Caller must
+        hold the writer lock, outside any open transaction.
+        """
+        self._batches_since_optimize += 1
+        self._rows_since_analyze += rows
+        
+        try:
+            if self._rows_since_analyze >= ANALYZE_EVERY_ROWS:
+                conn.execute('ANALYZE log_entry')
+                conn.execute('ANALYZE sigma_alert')
+                self._rows_since_analyze = 0
+                self._batches_since_optimize = 0
+            elif self._batches_since_optimize >= OPTIMIZE_EVERY_BATCHES:
+                conn.execute('PRAGMA optimize')
+                self._batches_since_optimize = 0
+        except sqlite3.Error as e:
+            print(f"[DatabaseManager] Planner statistics refresh failed: {e}")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM log_entry')
-        total_logs = cursor.fetchone()[0]
+        conn = self.get_connection(readonly=True)
         
-        cursor.execute('SELECT COUNT(*) FROM server')
-        total_servers = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT log_type, COUNT(*) FROM log_entry GROUP BY log_type')
-        by_type = dict(cursor.fetchall())
+        total_servers = 0
+        by_type = {}
+        for kind, log_type, count in conn.execute(STATS_SQL):
+            if kind == 'server':
+                total_servers = count
+            else:
+                by_type[log_type] = count
         
         return {
-            "total_logs": total_logs,
+            "total_logs": sum(by_type.values()),
             "total_servers": total_servers,
             "by_type": by_type
         }
     
-    def get_recent_logs(
+    @staticmethod
+    def _page_clause(
+        alias: str,
+        params: list,
+        limit: int,
+        offset: int,
+        before_timestamp: Optional[str],
+        before_id: Optional[int]
+    ) -> str:
+        """
+        Build the ORDER BY/LIMIT tail for a newest-first listing.
+        
+        When a (before_timestamp, before_id) cursor is given the page starts
+        right after that row (keyset), so its cost does not grow with depth;
+        otherwise the legacy OFFSET is used.
+        """
+        if before_timestamp is not None and before_id is not None:
+            params.extend([before_timestamp, before_id, limit])
+            return (f' AND ({alias}.timestamp, {alias}.id) < (?, ?)'
+                    f' ORDER BY {alias}.timestamp DESC, {alias}.id DESC LIMIT ?')
+        
+        params.extend([limit, offset])
+        return f' ORDER BY {alias}.timestamp DESC, {alias}.id DESC LIMIT ? OFFSET ?'
+    
+    def _iter_rows(self, query: str, params: list, batch_size: int) -> Iterator[Dict[str, Any]]:
+        """Run a read query and yield each row as a dict keyed by column name."""
+        cursor = self.get_connection(readonly=True).cursor()
+        # Plain tuples zipped with names read once are cheaper than sqlite3.Row
+        cursor.row_factory = None
+        cursor.arraysize = max(batch_size, 1)
+        cursor.execute(query, params)
+        
+        names = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(names, row))
+    
+    def _iter_recent_logs(
         self,
         limit: int = 50,
         offset: int = 0,
         log_type: Optional[str] = None,
         server_id: Optional[int] = None,
         start_time: Optional[str] = None,
-        end_time: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
-        """Get recent logs with optional filtering."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        end_time: Optional[str] = None,
+        before_timestamp: Optional[str] = None,
+        before_id: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield recent logs one dict at a time; see get_recent_logs."""
         query = '''
             SELECT 
                 l.id, l.timestamp, l.recv_time, l.log_type, l.raw_line,
@@ -349,38 +732,50 @@ class DatabaseManager:
             query += ' AND l.timestamp <= ?'
             params.append(end_time)
         
-        query += ' ORDER BY l.timestamp DESC LIMIT ? OFFSET ?'
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        query += self._page_clause('l', params, limit, offset, before_timestamp, before_id)
         
-        logs = []
-        for row in rows:
-            logs.append({
-                "id": row[0],
-                "timestamp": row[1],
-                "recv_time": row[2],
-                "log_type": row[3],
-                "raw_line": row[4],
-                "hostname": row[5],
-                "ip_address": row[6],
-                "server_id": row[7]
-            })
+        yield from self._iter_rows(query, params, limit)
+    
+    def get_recent_logs(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        log_type: Optional[str] = None,
+        server_id: Optional[int] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        before_timestamp: Optional[str] = None,
+        before_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get recent logs with optional filtering.
         
-        return logs
+        Pass the timestamp and id of the last row seen as before_timestamp/
+        before_id to fetch the next page without OFFSET.
+        """
+        return list(self._iter_recent_logs(
+            limit, offset, log_type, server_id, start_time, end_time,
+            before_timestamp, before_id
+        ))
     
     def get_log_by_id(self, log_id: int) -> Optional[Dict[str, Any]]:
-        """Get single log by ID with type-specific details."""
-        conn = self.get_connection()
+        """Get single log by ID with type-specific details (one query)."""
+        conn = self.get_connection(readonly=True)
         cursor = conn.cursor()
         
+        # Each detail join is gated on log_type, so at most one block is populated
         cursor.execute('''
             SELECT 
                 l.id, l.timestamp, l.recv_time, l.log_type, l.raw_line, l.parsed_data,
-                s.hostname, s.ip_address, s.id as server_id
+                s.hostname, s.ip_address, s.id as server_id,
+                lin.id, lin.facility, lin.severity, lin.program, lin.pid, lin.message,
+                win.id, win.channel, win.event_id, win.message, win.user_name,
+                ngx.id, ngx.method, ngx.path, ngx.status_code, ngx.bytes, ngx.user_agent
             FROM log_entry l
             LEFT JOIN server s ON l.server_id = s.id
+            LEFT JOIN linux_log_details lin ON lin.log_entry_id = l.id AND l.log_type = 'linux'
+            LEFT JOIN windows_log_details win ON win.log_entry_id = l.id AND l.log_type = 'windows'
+            LEFT JOIN nginx_log_details ngx ON ngx.log_entry_id = l.id AND l.log_type = 'nginx'
             WHERE l.id = ?
         ''', (log_id,))
         
@@ -400,51 +795,13 @@ class DatabaseManager:
             "server_id": row[8]
         }
         
+        # Each detail block starts with its table's id, NULL when no row joined
         log_type = log["log_type"]
+        start = {"linux": 9, "windows": 15, "nginx": 20}.get(log_type)
         
-        if log_type == "linux":
-            cursor.execute('''
-                SELECT facility, severity, program, pid, message
-                FROM linux_log_details WHERE log_entry_id = ?
-            ''', (log_id,))
-            details = cursor.fetchone()
-            if details:
-                log.update({
-                    "facility": details[0],
-                    "severity": details[1],
-                    "program": details[2],
-                    "pid": details[3],
-                    "message": details[4]
-                })
-        
-        elif log_type == "windows":
-            cursor.execute('''
-                SELECT channel, event_id, message, user_name
-                FROM windows_log_details WHERE log_entry_id = ?
-            ''', (log_id,))
-            details = cursor.fetchone()
-            if details:
-                log.update({
-                    "channel": details[0],
-                    "event_id": details[1],
-                    "message": details[2],
-                    "user_name": details[3]
-                })
-        
-        elif log_type == "nginx":
-            cursor.execute('''
-                SELECT method, path, status_code, bytes, user_agent
-                FROM nginx_log_details WHERE log_entry_id = ?
-            ''', (log_id,))
-            details = cursor.fetchone()
-            if details:
-                log.update({
-                    "method": details[0],
-                    "path": details[1],
-                    "status_code": details[2],
-                    "bytes": details[3],
-                    "user_agent": details[4]
-                })
+        if start is not None and row[start] is not None:
+            fields = DETAIL_INSERTS[log_type][1]
+            log.update(zip(fields, row[start + 1:start + 1 + len(fields)]))
         
         return log
     
@@ -453,23 +810,36 @@ class DatabaseManager:
         text: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        before_timestamp: Optional[str] = None,
+        before_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Search logs with text and filters."""
-        conn = self.get_connection()
+        """
+        Search logs with text and filters.
+        
+        Text is matched as a phrase against the FTS5 index (token match,
+        not substring); without FTS5 it falls back to a LIKE scan.
+        before_timestamp/before_id page by keyset, as in get_recent_logs.
+        """
+        conn = self.get_connection(readonly=True)
         cursor = conn.cursor()
         
-        query = '''
+        use_fts = bool(text) and self._has_fts
+        
+        query = f'''
             SELECT 
                 l.id, l.timestamp, l.recv_time, l.log_type, l.raw_line,
                 s.hostname, s.ip_address
-            FROM log_entry l
+            FROM {'log_fts JOIN log_entry l ON l.id = log_fts.rowid' if use_fts else 'log_entry l'}
             LEFT JOIN server s ON l.server_id = s.id
             WHERE 1=1
         '''
         params = []
         
-        if text:
+        if use_fts:
+            query += ' AND log_fts MATCH ?'
+            params.append('"' + text.replace('"', '""') + '"')
+        elif text:
             query += ' AND l.raw_line LIKE ?'
             params.append(f'%{text}%')
         
@@ -482,8 +852,7 @@ class DatabaseManager:
                 query += ' AND s.hostname = ?'
                 params.append(filters['hostname'])
         
-        query += ' ORDER BY l.timestamp DESC LIMIT ? OFFSET ?'
-        params.extend([limit, offset])
+        query += self._page_clause('l', params, limit, offset, before_timestamp, before_id)
         
         cursor.execute(query, params)
         rows = cursor.fetchall()
@@ -504,14 +873,21 @@ class DatabaseManager:
     
     def get_servers_with_stats(self) -> List[Dict[str, Any]]:
         """Get all servers with activity statistics."""
-        conn = self.get_connection()
+        conn = self.get_connection(readonly=True)
         cursor = conn.cursor()
         
+        # Status is computed in SQL. Timestamps are naive local time, so compare
+        # against localtime 'now'; unparseable values give NULL and fall to offline.
         cursor.execute('''
             SELECT 
                 s.id, s.hostname, s.ip_address, s.first_seen, s.last_seen,
                 COUNT(l.id) as log_count,
-                MAX(l.timestamp) as last_log_time
+                MAX(l.timestamp) as last_log_time,
+                CASE
+                    WHEN (julianday('now', 'localtime') - julianday(MAX(l.timestamp))) * 86400 < 300 THEN 'online'
+                    WHEN (julianday('now', 'localtime') - julianday(MAX(l.timestamp))) * 86400 < 3600 THEN 'delayed'
+                    ELSE 'offline'
+                END as status
             FROM server s
             LEFT JOIN log_entry l ON s.id = l.server_id
             GROUP BY s.id
@@ -522,22 +898,6 @@ class DatabaseManager:
         
         servers = []
         for row in rows:
-            last_log = row[6]
-            status = "offline"
-            if last_log:
-                try:
-                    from datetime import datetime, timedelta
-                    last_time = datetime.fromisoformat(last_log.replace('Z', '+00:00'))
-                    now = datetime.now()
-                    diff = (now - last_time).total_seconds()
-                    
-                    if diff < 300:  # 5 minutes
-                        status = "online"
-                    elif diff < 3600:  # 1 hour
-                        status = "delayed"
-                except:
-                    status = "offline"
-            
             servers.append({
                 "id": row[0],
                 "hostname": row[1],
@@ -545,8 +905,8 @@ class DatabaseManager:
                 "first_seen": row[3],
                 "last_seen": row[4],
                 "log_count": row[5],
-                "last_log_time": last_log,
-                "status": status
+                "last_log_time": row[6],
+                "status": row[7]
             })
         
         return servers
@@ -556,18 +916,19 @@ class DatabaseManager:
         return self.get_recent_logs(limit=limit, server_id=server_id)
     
     def get_timeseries_stats(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """Get log counts grouped by hour for charts."""
-        conn = self.get_connection()
+        """
+        Get log counts grouped by hour for charts.
+        
+        Reads the log_hourly rollup, so the oldest bucket is counted whole
+        rather than from exactly `hours` ago.
+        """
+        conn = self.get_connection(readonly=True)
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT 
-                strftime('%Y-%m-%d %H:00:00', timestamp) as hour,
-                log_type,
-                COUNT(*) as count
-            FROM log_entry
-            WHERE timestamp >= datetime('now', '-' || ? || ' hours')
-            GROUP BY hour, log_type
+            SELECT hour, log_type, count
+            FROM log_hourly
+            WHERE hour >= strftime('%Y-%m-%d %H:00:00', 'now', '-' || ? || ' hours')
             ORDER BY hour DESC
         ''', (hours,))
         
@@ -583,19 +944,18 @@ class DatabaseManager:
         
         return timeseries
     
-    def get_recent_alerts(
+    def _iter_recent_alerts(
         self,
         limit: int = 50,
         offset: int = 0,
         severity: Optional[str] = None,
         acknowledged: Optional[bool] = None,
         start_time: Optional[str] = None,
-        end_time: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
-        """Get recent alerts with filtering."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        end_time: Optional[str] = None,
+        before_timestamp: Optional[str] = None,
+        before_id: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield recent alerts one dict at a time; see get_recent_alerts."""
         query = '''
             SELECT 
                 a.id, a.timestamp, a.alert_id, a.rule_id, a.rule_title,
@@ -611,9 +971,9 @@ class DatabaseManager:
             query += ' AND a.severity = ?'
             params.append(severity)
         
+        # Inlined rather than bound so the planner can match the partial indexes
         if acknowledged is not None:
-            query += ' AND a.acknowledged = ?'
-            params.append(1 if acknowledged else 0)
+            query += f' AND a.acknowledged = {1 if acknowledged else 0}'
         
         if start_time:
             query += ' AND a.timestamp >= ?'
@@ -623,39 +983,32 @@ class DatabaseManager:
             query += ' AND a.timestamp <= ?'
             params.append(end_time)
         
-        query += ' ORDER BY a.timestamp DESC LIMIT ? OFFSET ?'
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        alerts = []
-        for row in rows:
-            alerts.append({
-                "id": row[0],
-                "timestamp": row[1],
-                "alert_id": row[2],
-                "rule_id": row[3],
-                "rule_title": row[4],
-                "rule_description": row[5],
-                "severity": row[6],
-                "log_entry_id": row[7],
-                "log_type": row[8],
-                "hostname": row[9],
-                "ip_address": row[10],
-                "raw_line": row[11],
-                "matched_fields": row[12],
-                "false_positives": row[13],
-                "rule_refs": row[14],
-                "acknowledged": bool(row[15]),
-                "created_at": row[16]
-            })
+        query += self._page_clause('a', params, limit, offset, before_timestamp, before_id)
         
-        return alerts
+        for alert in self._iter_rows(query, params, limit):
+            alert["acknowledged"] = bool(alert["acknowledged"])
+            yield alert
+    
+    def get_recent_alerts(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        severity: Optional[str] = None,
+        acknowledged: Optional[bool] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        before_timestamp: Optional[str] = None,
+        before_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Get recent alerts with filtering (keyset paging as in get_recent_logs)."""
+        return list(self._iter_recent_alerts(
+            limit, offset, severity, acknowledged, start_time, end_time,
+            before_timestamp, before_id
+        ))
     
     def get_alert_by_id(self, alert_id: int) -> Optional[Dict[str, Any]]:
         """Get single alert by ID."""
-        conn = self.get_connection()
+        conn = self.get_connection(readonly=True)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -694,7 +1047,7 @@ class DatabaseManager:
     
     def get_alerts_by_log(self, log_entry_id: int) -> List[Dict[str, Any]]:
         """Get all alerts for a specific log entry."""
-        conn = self.get_connection()
+        conn = self.get_connection(readonly=True)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -733,12 +1086,19 @@ class DatabaseManager:
     
     def get_alert_stats(self) -> Dict[str, Any]:
         """Get alert statistics."""
-        conn = self.get_connection()
+        conn = self.get_connection(readonly=True)
         cursor = conn.cursor()
         
-        # Total alerts
-        cursor.execute('SELECT COUNT(*) FROM sigma_alert')
-        total_alerts = cursor.fetchone()[0]
+        # Scalar counts in one pass
+        cursor.execute('''
+            SELECT 
+                COUNT(*),
+                COUNT(*) FILTER (WHERE acknowledged = 1),
+                COUNT(*) FILTER (WHERE acknowledged = 0),
+                COUNT(*) FILTER (WHERE timestamp >= datetime('now', '-1 hour'))
+            FROM sigma_alert
+        ''')
+        total_alerts, acknowledged, unacknowledged, last_hour = cursor.fetchone()
         
         # By severity
         cursor.execute('''
@@ -756,64 +1116,65 @@ class DatabaseManager:
         ''')
         by_log_type = dict(cursor.fetchall())
         
-        # Acknowledged vs unacknowledged
-        cursor.execute('''
-            SELECT acknowledged, COUNT(*) 
-            FROM sigma_alert 
-            GROUP BY acknowledged
-        ''')
-        ack_stats = dict(cursor.fetchall())
-        
-        # Recent alert rate (last hour)
-        cursor.execute('''
-            SELECT COUNT(*) 
-            FROM sigma_alert 
-            WHERE timestamp >= datetime('now', '-1 hour')
-        ''')
-        last_hour = cursor.fetchone()[0]
-        
         return {
             "total_alerts": total_alerts,
             "by_severity": by_severity,
             "by_log_type": by_log_type,
-            "acknowledged": ack_stats.get(1, 0),
-            "unacknowledged": ack_stats.get(0, 0),
+            "acknowledged": acknowledged,
+            "unacknowledged": unacknowledged,
             "last_hour": last_hour
         }
     
     def acknowledge_alert(self, alert_id: int) -> bool:
         """Mark alert as acknowledged."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE sigma_alert 
-            SET acknowledged = 1 
-            WHERE id = ?
-        ''', (alert_id,))
-        
-        conn.commit()
-        return cursor.rowcount > 0
+        with self._writer_lock:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE sigma_alert 
+                SET acknowledged = 1 
+                WHERE id = ?
+            ''', (alert_id,))
+            
+            conn.commit()
+            return cursor.rowcount > 0
     
     def get_logs_for_sigma_processing(
         self,
         last_processed_id: int,
-        batch_size: int = 100
+        batch_size: int = 100,
+        program: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get unprocessed logs for Sigma rule matching."""
-        conn = self.get_connection()
+        """
+        Get unprocessed logs for Sigma rule matching.
+        
+        Args:
+            last_processed_id: Only return logs with a greater ID
+            batch_size: Maximum number of logs
+            program: Only return logs whose parsed program matches (indexed)
+        """
+        conn = self.get_connection(readonly=True)
         cursor = conn.cursor()
         
-        cursor.execute('''
+        query = '''
             SELECT 
                 l.id, l.timestamp, l.log_type, l.raw_line, l.parsed_data,
                 s.hostname, s.ip_address
             FROM log_entry l
             LEFT JOIN server s ON l.server_id = s.id
             WHERE l.id > ?
-            ORDER BY l.id ASC
-            LIMIT ?
-        ''', (last_processed_id, batch_size))
+        '''
+        params = [last_processed_id]
+        
+        if program:
+            query += ' AND l.program = ?'
+            params.append(program)
+        
+        query += ' ORDER BY l.id ASC LIMIT ?'
+        params.append(batch_size)
+        
+        cursor.execute(query, params)
         
         rows = cursor.fetchall()
         
@@ -832,10 +1193,21 @@ class DatabaseManager:
         return logs
     
     def close(self):
-        """Close database connection."""
-        if hasattr(self._local, 'conn') and self._local.conn:
-            self._local.conn.close()
+        """Close this thread's reader and the shared writer connection."""
+        if self._local.conn is not None:
+            if self._local.conn is not self._writer_conn:
+                self._local.conn.close()
             self._local.conn = None
+        
+        with self._writer_lock:
+            if self._writer_conn is not None:
+                # Let SQLite refresh planner statistics for what this session queried
+                try:
+                    self._writer_conn.execute('PRAGMA optimize')
+                except sqlite3.Error as e:
+                    print(f"[DatabaseManager] PRAGMA optimize failed: {e}")
+                self._writer_conn.close()
+                self._writer_conn = None
 
 
 # Example usage
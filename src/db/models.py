@@ -1,12 +1,13 @@
 # models.py
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Text, ForeignKey
+    Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Index, JSON, false
 )
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 
 # Import Base from separate base.py to avoid circular imports
 from src.db.base import Base
+from src.db.types import CompressedText, PackedJSON
 
 
 class Server(Base):
@@ -25,9 +26,17 @@ class LogEntry(Base):
 
     id = Column(Integer, primary_key=True)
     server_id = Column(Integer, ForeignKey("server.id"))
-    recv_time = Column(DateTime, default=datetime.utcnow)
+    # default= puts CURRENT_TIMESTAMP in the INSERT itself, so tables
+    # created before server_default (which create_all never alters) are
+    # stamped too; server_default covers raw SQL inserts on new tables
+    recv_time = Column(DateTime, default=func.now(), server_default=func.now())
     log_source = Column(String, nullable=False)
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText, nullable=False)  # long lines stored compressed
+    parse_claim_id = Column(String)  # parser worker that claimed this entry
+    parse_claimed_at = Column(DateTime)  # claim lease start; stale leases are reclaimed
+    # Set with the details row (or for unparseable content), so unparsed
+    # lookups never revisit history
+    parsed = Column(Boolean, nullable=False, default=False, server_default=false())
 
     server = relationship("Server", back_populates="logs")
     linux_details = relationship("LinuxLogDetails", uselist=False)
@@ -74,7 +83,9 @@ class WindowsLogDetails(Base):
 
     log_entry_id = Column(Integer, ForeignKey(
         "log_entry.id"), primary_key=True)
-    content = Column(Text, nullable=False)   # JSON string
+    content = Column(PackedJSON, nullable=False)   # event dict, msgpack BLOB
+    # Copied from content["EventID"] on insert so lookups never unpack
+    event_id = Column(Integer)
 
 
 class ZeekConnDetails(Base):
@@ -114,7 +125,7 @@ class AlertRule(Base):
     severity = Column(String, nullable=False)  # low, medium, high, critical
     enabled = Column(Integer, default=1)  # 1 = enabled, 0 = disabled
     rule_content = Column(Text)  # YAML or JSON rule definition
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
 
 
 class Alert(Base):
@@ -127,6 +138,34 @@ class Alert(Base):
     severity = Column(String, nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text)
-    alert_metadata = Column(Text)  # JSON string - renamed from 'metadata'
-    triggered_at = Column(DateTime, default=datetime.utcnow)
+    alert_metadata = Column(JSON)  # stored as JSON text - renamed from 'metadata'
+    triggered_at = Column(DateTime, default=func.now(), server_default=func.now())
     resolved = Column(Integer, default=0)  # 0 = active, 1 = resolved
+
+
+# One row per (hostname, ip, type); backs the upsert in get_or_create_server
+Index("ux_server_identity", Server.hostname, Server.ip_address, Server.server_type, unique=True)
+
+# Indexes backing the repository query predicates
+Index("ix_logentry_server_time", LogEntry.server_id, LogEntry.recv_time.desc())
+Index("ix_logentry_source_recv", LogEntry.log_source, LogEntry.recv_time.desc())
+# "Recent" list queries: key on the sort column and carry the summary
+# columns, so the newest page is read from the index alone (SQLite has no
+# range partitioning; this keeps the hot path O(limit) as the table grows)
+Index("ix_logentry_recent", LogEntry.recv_time.desc(), LogEntry.server_id, LogEntry.log_source)
+Index(
+    "ix_alert_recent", Alert.triggered_at.desc(),
+    Alert.severity, Alert.title, Alert.server_id
+)
+Index("ix_alert_sev_resolved_time", Alert.severity, Alert.resolved, Alert.triggered_at.desc())
+Index("ix_alert_server_time", Alert.server_id, Alert.triggered_at.desc())
+# Claimed entries stay in the index so expired claims can be taken over
+Index(
+    "ix_logentry_pending", LogEntry.log_source, LogEntry.id,
+    sqlite_where=LogEntry.parsed.is_(False),
+    postgresql_where=LogEntry.parsed.is_(False)
+)
+Index("ix_rule_enabled_source", AlertRule.enabled, AlertRule.log_source)
+Index("ix_nginx_status", NginxLogDetails.status)
+Index("ix_windows_event_id", WindowsLogDetails.event_id)
+Index("ix_nginx_remote_addr", NginxLogDetails.remote_addr)
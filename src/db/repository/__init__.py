@@ -4,40 +4,68 @@ Repository Layer for Database Access
 Provides clean, modular access to database operations.
 """
 
-from .server_repo import get_or_create_server
+from .server_repo import get_or_create_server, get_or_create_servers
 from .log_repo import (
     insert_raw_log,
+    insert_raw_logs_bulk,
+    insert_raw_logs_fast,
     get_unparsed_linux_logs,
     get_unparsed_windows_logs,
     get_unparsed_nginx_logs,
-    get_recent_logs
+    claim_unparsed_logs,
+    mark_logs_unparseable,
+    release_log_claims,
+    get_recent_logs,
+    get_recent_logs_summary,
+    count_logs_by_source
+)
+from .linux_repo import insert_linux_details, insert_linux_details_bulk
+from .windows_repo import insert_windows_details, insert_windows_details_bulk
+from .nginx_repo import insert_nginx_details, insert_nginx_details_bulk
+from .alert_repo import (
+    create_alert,
+    create_alerts_bulk,
+    get_recent_alerts,
+    get_recent_alerts_summary,
+    resolve_alert,
+    resolve_alerts_bulk
 )
-from .linux_repo import insert_linux_details
-from .windows_repo import insert_windows_details
-from .nginx_repo import insert_nginx_details
-from .alert_repo import create_alert, get_recent_alerts, resolve_alert
 from .rule_repo import get_active_rules_for_source, get_all_rules
 
 __all__ = [
     # Server operations
     "get_or_create_server",
+    "get_or_create_servers",
     
     # Log operations
     "insert_raw_log",
+    "insert_raw_logs_bulk",
+    "insert_raw_logs_fast",
     "get_unparsed_linux_logs",
     "get_unparsed_windows_logs",
     "get_unparsed_nginx_logs",
+    "claim_unparsed_logs",
+    "mark_logs_unparseable",
+    "release_log_claims",
     "get_recent_logs",
+    "get_recent_logs_summary",
+    "count_logs_by_source",
     
     # Parsed log details
     "insert_linux_details",
+    "insert_linux_details_bulk",
     "insert_windows_details",
+    "insert_windows_details_bulk",
     "insert_nginx_details",
+    "insert_nginx_details_bulk",
     
     # Alert operations
     "create_alert",
+    "create_alerts_bulk",
     "get_recent_alerts",
+    "get_recent_alerts_summary",
     "resolve_alert",
+    "resolve_alerts_bulk",
     
     # Rule operations
     "get_active_rules_for_source",
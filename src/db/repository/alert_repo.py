@@ -4,8 +4,9 @@ Alert Repository
 Handles alert creation and management.
 """
 
-import json
 from typing import Dict, Any, List, Optional
+from sqlalchemy import RowMapping, insert, select, update
+from sqlalchemy.orm import Session
 from src.db.setup import SessionLocal
 from src.db.models import Alert
 
@@ -17,7 +18,8 @@ def create_alert(
     severity: str,
     title: str,
     description: str,
-    metadata: Dict[str, Any]
+    metadata: Dict[str, Any],
+    session: Optional[Session] = None
 ) -> int:
     """
     Create a new alert.
@@ -30,11 +32,13 @@ def create_alert(
         title: Alert title
         description: Alert description
         metadata: Additional metadata as dictionary
+        session: Caller-managed session; the alert is only flushed, the
+            caller commits
         
     Returns:
         Alert ID
     """
-    db = SessionLocal()
+    db = session or SessionLocal()
     try:
         alert = Alert(
             log_entry_id=log_entry_id,
@@ -43,15 +47,61 @@ def create_alert(
             severity=severity,
             title=title,
             description=description,
-            alert_metadata=json.dumps(metadata)  # Use alert_metadata
+            alert_metadata=metadata  # JSON column, serialized by the engine
         )
         db.add(alert)
+        
+        if session is not None:
+            db.flush()
+            return alert.id
+        
         db.commit()
-        db.refresh(alert)
         return alert.id
 
     finally:
-        db.close()
+        if session is None:
+            db.close()
+
+
+def create_alerts_bulk(
+    alerts: List[Dict[str, Any]],
+    batch_size: int = 1000,
+    session: Optional[Session] = None
+) -> None:
+    """
+    Create many alerts with executemany.
+    
+    Args:
+        alerts: Dicts with the create_alert arguments (log_entry_id,
+            server_id, rule_id, severity, title, description, metadata)
+        batch_size: Rows per executemany call
+        session: Caller-managed session; rows are only flushed, the caller
+            commits
+    """
+    values = [
+        {
+            "log_entry_id": alert["log_entry_id"],
+            "server_id": alert.get("server_id"),
+            "rule_id": alert.get("rule_id"),
+            "severity": alert["severity"],
+            "title": alert["title"],
+            "description": alert.get("description"),
+            "alert_metadata": alert.get("metadata")
+        }
+        for alert in alerts
+    ]
+    
+    db = session or SessionLocal()
+    try:
+        for start in range(0, len(values), batch_size):
+            db.execute(insert(Alert), values[start:start + batch_size])
+        
+        if session is None:
+            db.commit()
+    
+    finally:
+        if session is None:
+            db.close()
 
 
 def get_recent_alerts(
@@ -86,6 +136,41 @@ def get_recent_alerts(
         db.close()
 
 
+def get_recent_alerts_summary(
+    limit: int = 100,
+    severity: Optional[str] = None,
+    resolved: Optional[bool] = None
+) -> List[RowMapping]:
+    """
+    Get recent alerts as lightweight rows for list views.
+    
+    Same filters as get_recent_alerts, but only id, severity, title,
+    server_id and triggered_at are loaded - no ORM objects, no description
+    or metadata.
+    
+    Returns:
+        List of dict-like rows
+    """
+    stmt = select(
+        Alert.id, Alert.severity, Alert.title, Alert.server_id, Alert.triggered_at
+    )
+    
+    if severity:
+        stmt = stmt.where(Alert.severity == severity)
+        
+    if resolved is not None:
+        stmt = stmt.where(Alert.resolved == (1 if resolved else 0))
+    
+    db = SessionLocal()
+    try:
+        return db.execute(
+            stmt.order_by(Alert.triggered_at.desc()).limit(limit)
+        ).mappings().all()
+        
+    finally:
+        db.close()
+
+
 def resolve_alert(alert_id: int) -> bool:
     """
     Mark an alert as resolved.
@@ -98,13 +183,36 @@ def resolve_alert(alert_id: int) -> bool:
     """
     db = SessionLocal()
     try:
-        alert = db.query(Alert).filter_by(id=alert_id).first()
+        result = db.execute(
+            update(Alert).where(Alert.id == alert_id).values(resolved=1)
+        )
+        db.commit()
+        return result.rowcount > 0
         
-        if alert:
-            alert.resolved = 1
-            db.commit()
-            return True
-        return False
+    finally:
+        db.close()
+
+
+def resolve_alerts_bulk(alert_ids: List[int]) -> int:
+    """
+    Mark many alerts as resolved in one statement.
+    
+    Args:
+        alert_ids: IDs of the alerts to resolve
+        
+    Returns:
+        Number of alerts updated
+    """
+    if not alert_ids:
+        return 0
+    
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(Alert).where(Alert.id.in_(alert_ids)).values(resolved=1)
+        )
+        db.commit()
+        return result.rowcount
         
     finally:
         db.close()
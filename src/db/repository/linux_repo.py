@@ -4,20 +4,29 @@ Linux Log Details Repository
 Handles parsed Linux log details.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
 from src.db.setup import SessionLocal
 from src.db.models import LinuxLogDetails
+from src.db.repository.log_repo import mark_logs_parsed
 
 
-def insert_linux_details(log_entry_id: int, parsed: Dict[str, Any]) -> None:
+def insert_linux_details(
+    log_entry_id: int,
+    parsed: Dict[str, Any],
+    session: Optional[Session] = None
+) -> None:
     """
     Insert parsed Linux log details.
     
     Args:
         log_entry_id: ID of the parent log entry
         parsed: Dictionary containing parsed fields
+        session: Caller-managed session; the row is only flushed, the
+            caller commits
     """
-    db = SessionLocal()
+    db = session or SessionLocal()
     try:
         details = LinuxLogDetails(
             log_entry_id=log_entry_id,
@@ -31,10 +40,58 @@ def insert_linux_details(log_entry_id: int, parsed: Dict[str, Any]) -> None:
         )
 
         db.add(details)
-        db.commit()
+        mark_logs_parsed([log_entry_id], session=db)
+        
+        if session is not None:
+            db.flush()
+        else:
+            db.commit()
 
     finally:
-        db.close()
+        if session is None:
+            db.close()
+
+
+def insert_linux_details_bulk(
+    rows: List[Dict[str, Any]],
+    batch_size: int = 1000,
+    session: Optional[Session] = None
+) -> None:
+    """
+    Insert parsed Linux details for many log entries with executemany.
+    
+    Args:
+        rows: Parsed dicts, each carrying its parent's log_entry_id
+        batch_size: Rows per executemany call
+        session: Caller-managed session; rows are only flushed, the caller
+            commits
+    """
+    values = [
+        {
+            "log_entry_id": row["log_entry_id"],
+            "timestamp": row.get("timestamp"),
+            "app_name": row.get("app_name"),
+            "pid": row.get("pid"),
+            "raw_message": row.get("raw_message"),
+            "ssh_action": row.get("ssh_action"),
+            "ssh_user": row.get("ssh_user"),
+            "ssh_ip": row.get("ssh_ip")
+        }
+        for row in rows
+    ]
+    
+    db = session or SessionLocal()
+    try:
+        for start in range(0, len(values), batch_size):
+            db.execute(insert(LinuxLogDetails), values[start:start + batch_size])
+        mark_logs_parsed([value["log_entry_id"] for value in values], session=db, batch_size=batch_size)
+        
+        if session is None:
+            db.commit()
+
+    finally:
+        if session is None:
+            db.close()
 
 
 def get_linux_details(log_entry_id: int) -> Optional[LinuxLogDetails]:
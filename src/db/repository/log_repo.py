@@ -4,17 +4,21 @@ Log Entry Repository
 Handles raw log storage and retrieval.
 """
 
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import Row, RowMapping, func, insert, or_, select, update
+from sqlalchemy.orm import Session
 from src.db.setup import SessionLocal
 from src.db.models import LogEntry
+from src.db.types import compress_content
 
 
 def insert_raw_log(
     server_id: int,
     log_source: str,
     content: str,
-    recv_time: Optional[datetime] = None
+    recv_time: Optional[datetime] = None,
+    session: Optional[Session] = None
 ) -> int:
     """
     Insert a raw log entry.
@@ -23,97 +27,359 @@ def insert_raw_log(
         server_id: ID of the server that sent the log
         log_source: Source type (linux, windows, nginx)
         content: Raw log content
-        recv_time: Time received (defaults to now)
+        recv_time: Time received (defaults to the database clock)
+        session: Caller-managed session; the entry is only flushed, the
+            caller commits
         
     Returns:
         Log entry ID
     """
-    db = SessionLocal()
+    db = session or SessionLocal()
     try:
         entry = LogEntry(
             server_id=server_id,
             log_source=log_source,
-            content=content,
-            recv_time=recv_time or datetime.utcnow()
+            content=content
         )
+        if recv_time is not None:
+            entry.recv_time = recv_time
         db.add(entry)
+        
+        if session is not None:
+            db.flush()
+            return entry.id
+        
         db.commit()
-        db.refresh(entry)
         return entry.id
 
     finally:
-        db.close()
+        if session is None:
+            db.close()
 
 
-def get_unparsed_linux_logs(limit: int = 50) -> List[LogEntry]:
+def insert_raw_logs_bulk(
+    rows: List[Dict[str, Any]],
+    batch_size: int = 1000,
+    session: Optional[Session] = None
+) -> List[int]:
     """
-    Get Linux logs that haven't been parsed yet.
+    Insert many raw log entries with multi-row INSERT ... RETURNING.
     
     Args:
-        limit: Maximum number of logs to retrieve
+        rows: Dicts with server_id, log_source, content and optional recv_time
+            (defaults to the database clock)
+        batch_size: Rows per INSERT statement
+        session: Caller-managed session; rows are only flushed, the caller
+            commits
         
     Returns:
-        List of unparsed log entries
+        Log entry IDs, in the same order as rows
     """
-    db = SessionLocal()
+    values = [
+        {
+            "server_id": row["server_id"],
+            "log_source": row["log_source"],
+            "content": row["content"]
+        }
+        for row in rows
+    ]
+    
+    # Every row needs the same keys; only fill recv_time in Python when some
+    # caller supplied one, otherwise the column default stamps the batch
+    if any(row.get("recv_time") for row in rows):
+        # Naive UTC, like CURRENT_TIMESTAMP
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for value, row in zip(values, rows):
+            value["recv_time"] = row.get("recv_time") or now
+    
+    stmt = insert(LogEntry).returning(LogEntry.id, sort_by_parameter_order=True)
+    
+    db = session or SessionLocal()
     try:
-        logs = db.query(LogEntry).filter(
-            LogEntry.log_source == "linux",
-            LogEntry.linux_details is None
-        ).limit(limit).all()
+        ids = []
+        for start in range(0, len(values), batch_size):
+            ids.extend(db.scalars(stmt, values[start:start + batch_size]))
+        
+        if session is None:
+            db.commit()
+        return ids
+
+    finally:
+        if session is None:
+            db.close()
+
+
+# Raw DBAPI statement for insert_raw_logs_fast; a given recv_time uses the
+# same text layout SQLAlchemy's DateTime type writes for SQLite, a missing
+# one is stamped by the database clock like the column default (spelled out,
+# since tables from before server_default have no DEFAULT)
+INSERT_RAW_LOG_SQL = (
+    "INSERT INTO log_entry (server_id, log_source, content, recv_time) "
+    "VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))"
+)
+RECV_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def insert_raw_logs_fast(
+    rows: List[Dict[str, Any]],
+    session: Optional[Session] = None
+) -> int:
+    """
+    Insert many raw log entries with a single DBAPI executemany.
+    
+    Skips ORM object construction and does not return ids; use
+    insert_raw_logs_bulk when the caller needs them. Content is compressed
+    here exactly as the CompressedText column would.
+    
+    Args:
+        rows: Dicts with server_id, log_source, content and optional recv_time
+        session: Caller-managed session; the caller commits
+        
+    Returns:
+        Number of rows inserted
+    """
+    params = [
+        (
+            row["server_id"],
+            row["log_source"],
+            compress_content(row["content"]),
+            row["recv_time"].strftime(RECV_TIME_FORMAT) if row.get("recv_time") else None
+        )
+        for row in rows
+    ]
+    if not params:
+        return 0
+    
+    db = session or SessionLocal()
+    try:
+        db.connection().exec_driver_sql(INSERT_RAW_LOG_SQL, params)
+        
+        if session is None:
+            db.commit()
+        return len(params)
+
+    finally:
+        if session is None:
+            db.close()
+
+
+# Rows fetched per round-trip while streaming unparsed logs
+UNPARSED_YIELD_PER = 500
 
-        return logs
+
+def _iter_unparsed_logs(log_source: str, limit: int) -> Iterator[Row]:
+    """
+    Stream (id, server_id, content) rows of one source not yet parsed.
+    
+    A seek on the ix_logentry_pending partial index; entries with a details
+    row or retired by mark_logs_unparseable have parsed set and are skipped.
+    The session stays open until the iterator is exhausted or closed, so
+    callers that write to the database per row should materialize it first.
+    """
+    stmt = (
+        select(LogEntry.id, LogEntry.server_id, LogEntry.content)
+        .where(
+            LogEntry.log_source == log_source,
+            LogEntry.parsed.is_(False)
+        )
+        .limit(limit)
+        .execution_options(yield_per=UNPARSED_YIELD_PER)
+    )
+    
+    db = SessionLocal()
+    try:
+        yield from db.execute(stmt)
 
     finally:
         db.close()
 
 
-def get_unparsed_windows_logs(limit: int = 50) -> List[LogEntry]:
+# Seconds a claim stays with its worker; older claims are treated as
+# abandoned (the worker crashed) and handed out again
+CLAIM_LEASE_SECONDS = 300
+
+
+def claim_unparsed_logs(log_source: str, claim_id: str, limit: int = 50) -> List[Row]:
     """
-    Get Windows logs that haven't been parsed yet.
+    Atomically claim a batch of unparsed logs for one parser worker.
+    
+    Stamps parse_claim_id and parse_claimed_at on up to ``limit``
+    unparsed entries that are unclaimed or whose claim is older than
+    CLAIM_LEASE_SECONDS, and returns them, so concurrent workers never
+    receive the same entry while its lease is live. The candidates come
+    straight from the ix_logentry_pending partial index, so the cost
+    follows the backlog, not the table size.
+    
+    The candidate SELECT reads log_entry alone (details rows always set
+    parsed) and carries FOR UPDATE SKIP LOCKED, which PostgreSQL honours
+    and SQLite omits (its single writer lock already serializes the
+    UPDATE).
+    
+    Every claimed entry leaves the backlog one of three ways: its details
+    row sets parsed, mark_logs_unparseable sets parsed for content the
+    parser rejects (so it is not claimed again on every poll or restart),
+    or release_log_claims hands it back after a parser error or a failed
+    save.
     
     Args:
-        limit: Maximum number of logs to retrieve
+        log_source: Source type (linux, windows, nginx)
+        claim_id: Identifier of the claiming worker
+        limit: Maximum number of logs to claim
         
     Returns:
-        List of unparsed log entries
+        Rows with id, server_id and content
     """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    candidates = (
+        select(LogEntry.id)
+        .where(
+            LogEntry.log_source == log_source,
+            LogEntry.parsed.is_(False),
+            # Released claims clear both columns; claims from before the
+            # lease column have no start and count as expired
+            or_(
+                LogEntry.parse_claimed_at.is_(None),
+                LogEntry.parse_claimed_at < now - timedelta(seconds=CLAIM_LEASE_SECONDS)
+            )
+        )
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(LogEntry)
+        .where(LogEntry.id.in_(candidates.scalar_subquery()))
+        .values(parse_claim_id=claim_id, parse_claimed_at=now)
+        .returning(LogEntry.id, LogEntry.server_id, LogEntry.content)
+    )
+    
     db = SessionLocal()
     try:
-        logs = db.query(LogEntry).filter(
-            LogEntry.log_source == "windows",
-            LogEntry.windows_details is None
-        ).limit(limit).all()
-
-        return logs
+        rows = db.execute(stmt).all()
+        db.commit()
+        return rows
 
     finally:
         db.close()
 
 
-def get_unparsed_nginx_logs(limit: int = 50) -> List[LogEntry]:
+def mark_logs_parsed(log_entry_ids: List[int], session: Session, batch_size: int = 1000) -> None:
     """
-    Get Nginx logs that haven't been parsed yet.
+    Set parsed on log entries whose details rows are being inserted.
     
     Args:
-        limit: Maximum number of logs to retrieve
+        log_entry_ids: IDs of the parent log entries
+        session: The session inserting the details rows, so both commit together
+        batch_size: IDs per UPDATE statement
+    """
+    for start in range(0, len(log_entry_ids), batch_size):
+        session.execute(
+            update(LogEntry)
+            .where(LogEntry.id.in_(log_entry_ids[start:start + batch_size]))
+            .values(parsed=True)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def mark_logs_unparseable(log_entry_ids: List[int]) -> int:
+    """
+    Retire entries the parser could not read.
+    
+    They are marked parsed and unclaimed but get no details row, so the
+    raw content stays queryable while workers stop claiming it; an entry
+    is parsed without details only this way.
+    
+    Args:
+        log_entry_ids: IDs of the rejected log entries
         
     Returns:
-        List of unparsed log entries
+        Number of entries marked
     """
     db = SessionLocal()
     try:
-        logs = db.query(LogEntry).filter(
-            LogEntry.log_source == "nginx",
-            LogEntry.nginx_details is None
-        ).limit(limit).all()
+        result = db.execute(
+            update(LogEntry)
+            .where(LogEntry.id.in_(log_entry_ids))
+            .values(parsed=True, parse_claim_id=None, parse_claimed_at=None)
+        )
+        db.commit()
+        return result.rowcount
+
+    finally:
+        db.close()
 
-        return logs
+
+def release_log_claims(claim_id: str, log_entry_ids: Optional[List[int]] = None) -> int:
+    """
+    Clear a worker's claims so its unparsed entries can be claimed again.
+    
+    Entries that already have a details row stay excluded by their
+    parsed flag.
+    
+    Args:
+        claim_id: Identifier passed to claim_unparsed_logs
+        log_entry_ids: Release only these entries (default: every entry
+            the worker holds)
+        
+    Returns:
+        Number of entries released
+    """
+    stmt = (
+        update(LogEntry)
+        .where(LogEntry.parse_claim_id == claim_id)
+        .values(parse_claim_id=None, parse_claimed_at=None)
+    )
+    if log_entry_ids is not None:
+        stmt = stmt.where(LogEntry.id.in_(log_entry_ids))
+    
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt)
+        db.commit()
+        return result.rowcount
 
     finally:
         db.close()
 
 
+def get_unparsed_linux_logs(limit: int = 50) -> Iterator[Row]:
+    """
+    Get Linux logs that haven't been parsed yet.
+    
+    Args:
+        limit: Maximum number of logs to retrieve
+        
+    Returns:
+        Iterator of rows with id, server_id and content
+    """
+    return _iter_unparsed_logs("linux", limit)
+
+
+def get_unparsed_windows_logs(limit: int = 50) -> Iterator[Row]:
+    """
+    Get Windows logs that haven't been parsed yet.
+    
+    Args:
+        limit: Maximum number of logs to retrieve
+        
+    Returns:
+        Iterator of rows with id, server_id and content
+    """
+    return _iter_unparsed_logs("windows", limit)
+
+
+def get_unparsed_nginx_logs(limit: int = 50) -> Iterator[Row]:
+    """
+    Get Nginx logs that haven't been parsed yet.
+    
+    Args:
+        limit: Maximum number of logs to retrieve
+        
+    Returns:
+        Iterator of rows with id, server_id and content
+    """
+    return _iter_unparsed_logs("nginx", limit)
+
+
 def get_logs_by_server(server_id: int, limit: int = 100) -> List[LogEntry]:
     """Get recent logs for a specific server."""
     db = SessionLocal()
@@ -146,3 +412,42 @@ def get_recent_logs(log_source: Optional[str] = None, limit: int = 100) -> List[
         return query.order_by(LogEntry.recv_time.desc()).limit(limit).all()
     finally:
         db.close()
+
+
+def get_recent_logs_summary(log_source: Optional[str] = None, limit: int = 100) -> List[RowMapping]:
+    """
+    Get recent logs as lightweight rows (id, server_id, log_source, recv_time).
+    
+    Use get_recent_logs when the raw content or relationships are needed.
+    """
+    stmt = select(LogEntry.id, LogEntry.server_id, LogEntry.log_source, LogEntry.recv_time)
+    
+    if log_source:
+        stmt = stmt.where(LogEntry.log_source == log_source)
+    
+    db = SessionLocal()
+    try:
+        return db.execute(
+            stmt.order_by(LogEntry.recv_time.desc()).limit(limit)
+        ).mappings().all()
+    finally:
+        db.close()
+
+
+def count_logs_by_source() -> Dict[str, int]:
+    """
+    Count log entries per log_source in one query.
+    
+    A single GROUP BY, served from the (log_source, recv_time) index
+    instead of one COUNT(*) per source.
+    
+    Returns:
+        Dict of log_source -> count; sum the values for the total
+    """
+    db = SessionLocal()
+    try:
+        return dict(db.execute(
+            select(LogEntry.log_source, func.count()).group_by(LogEntry.log_source)
+        ).all())
+    finally:
+        db.close()
@@ -4,20 +4,29 @@ Nginx Log Details Repository
 Handles parsed Nginx log details.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
 from src.db.setup import SessionLocal
 from src.db.models import NginxLogDetails
+from src.db.repository.log_repo import mark_logs_parsed
 
 
-def insert_nginx_details(log_entry_id: int, parsed: Dict[str, Any]) -> None:
+def insert_nginx_details(
+    log_entry_id: int,
+    parsed: Dict[str, Any],
+    session: Optional[Session] = None
+) -> None:
     """
     Insert parsed Nginx log details.
     
     Args:
         log_entry_id: ID of the parent log entry
         parsed: Dictionary containing parsed fields
+        session: Caller-managed session; the row is only flushed, the
+            caller commits
     """
-    db = SessionLocal()
+    db = session or SessionLocal()
     try:
         details = NginxLogDetails(
             log_entry_id=log_entry_id,
@@ -33,10 +42,60 @@ def insert_nginx_details(log_entry_id: int, parsed: Dict[str, Any]) -> None:
         )
 
         db.add(details)
-        db.commit()
+        mark_logs_parsed([log_entry_id], session=db)
+        
+        if session is not None:
+            db.flush()
+        else:
+            db.commit()
 
     finally:
-        db.close()
+        if session is None:
+            db.close()
+
+
+def insert_nginx_details_bulk(
+    rows: List[Dict[str, Any]],
+    batch_size: int = 1000,
+    session: Optional[Session] = None
+) -> None:
+    """
+    Insert parsed Nginx details for many log entries with executemany.
+    
+    Args:
+        rows: Parsed dicts, each carrying its parent's log_entry_id
+        batch_size: Rows per executemany call
+        session: Caller-managed session; rows are only flushed, the caller
+            commits
+    """
+    values = [
+        {
+            "log_entry_id": row["log_entry_id"],
+            "remote_addr": row.get("remote_addr"),
+            "remote_user": row.get("remote_user"),
+            "time_local": row.get("time_local"),
+            "request_method": row.get("request_method"),
+            "request_uri": row.get("request_uri"),
+            "status": row.get("status"),
+            "body_bytes_sent": row.get("body_bytes_sent"),
+            "http_referer": row.get("http_referer"),
+            "http_user_agent": row.get("http_user_agent")
+        }
+        for row in rows
+    ]
+    
+    db = session or SessionLocal()
+    try:
+        for start in range(0, len(values), batch_size):
+            db.execute(insert(NginxLogDetails), values[start:start + batch_size])
+        mark_logs_parsed([value["log_entry_id"] for value in values], session=db, batch_size=batch_size)
+        
+        if session is None:
+            db.commit()
+
+    finally:
+        if session is None:
+            db.close()
 
 
 def get_nginx_details(log_entry_id: int) -> Optional[NginxLogDetails]:
@@ -4,21 +4,52 @@ Alert Rule Repository
 Handles alert rule management.
 """
 
-from typing import List, Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import update
 from src.db.setup import SessionLocal
 from src.db.models import AlertRule
 
 
+# Active rules per log source, cached in-process. Rules change on human
+# timescales, so entries live for RULE_CACHE_TTL seconds; any write through
+# this module bumps _rule_version, which invalidates them immediately.
+RULE_CACHE_TTL = 60.0
+
+_rule_cache: Dict[Tuple[str, int], Tuple[float, List[AlertRule]]] = {}
+_rule_by_id_cache: Dict[int, AlertRule] = {}
+_rule_version = 0
+_rule_cache_lock = threading.Lock()
+
+
+def _invalidate_rule_cache() -> None:
+    """Drop cached rule lists after a rule is created, changed or deleted."""
+    global _rule_version
+    with _rule_cache_lock:
+        _rule_version += 1
+        _rule_cache.clear()
+        _rule_by_id_cache.clear()
+
+
 def get_active_rules_for_source(log_source: str) -> List[AlertRule]:
     """
     Get active rules for a specific log source.
     
+    Results are served from the in-process cache when fresh. The rules are
+    detached from their session, so they can be reused across calls.
+    
     Args:
         log_source: Log source type (linux, windows, nginx)
         
     Returns:
         List of active rules
     """
+    key = (log_source, _rule_version)
+    cached = _rule_cache.get(key)
+    if cached and time.monotonic() - cached[0] < RULE_CACHE_TTL:
+        return list(cached[1])
+    
     db = SessionLocal()
     try:
         # Get rules that match the source OR are global (log_source = None)
@@ -26,10 +57,15 @@ def get_active_rules_for_source(log_source: str) -> List[AlertRule]:
             AlertRule.enabled == 1,
             (AlertRule.log_source == log_source) | (AlertRule.log_source == None)
         ).all()
-        return rules
 
     finally:
         db.close()
+    
+    with _rule_cache_lock:
+        # Skip storing if a write landed while we were querying
+        if key[1] == _rule_version:
+            _rule_cache[key] = (time.monotonic(), rules)
+    return list(rules)
 
 
 def get_all_rules() -> List[AlertRule]:
@@ -42,12 +78,29 @@ def get_all_rules() -> List[AlertRule]:
 
 
 def get_rule_by_id(rule_id: int) -> Optional[AlertRule]:
-    """Get a specific rule by ID."""
+    """
+    Get a specific rule by ID.
+    
+    Served from the in-process cache, which rule writes invalidate along
+    with the per-source lists.
+    """
+    rule = _rule_by_id_cache.get(rule_id)
+    if rule is not None:
+        return rule
+    
+    version = _rule_version
     db = SessionLocal()
     try:
-        return db.query(AlertRule).filter_by(id=rule_id).first()
+        rule = db.get(AlertRule, rule_id)
     finally:
         db.close()
+    
+    if rule is not None:
+        with _rule_cache_lock:
+            # Skip storing if a write landed while we were querying
+            if version == _rule_version:
+                _rule_by_id_cache[rule_id] = rule
+    return rule
 
 
 def create_rule(
@@ -81,7 +134,7 @@ def create_rule(
         )
         db.add(rule)
         db.commit()
-        db.refresh(rule)
+        _invalidate_rule_cache()
         return rule.id
     finally:
         db.close()
@@ -100,11 +153,15 @@ def toggle_rule(rule_id: int, enabled: bool) -> bool:
     """
     db = SessionLocal()
     try:
-        rule = db.query(AlertRule).filter_by(id=rule_id).first()
+        result = db.execute(
+            update(AlertRule)
+            .where(AlertRule.id == rule_id)
+            .values(enabled=1 if enabled else 0)
+        )
+        db.commit()
         
-        if rule:
-            rule.enabled = 1 if enabled else 0
-            db.commit()
+        if result.rowcount > 0:
+            _invalidate_rule_cache()
             return True
         return False
     finally:
@@ -128,6 +185,7 @@ def delete_rule(rule_id: int) -> bool:
         if rule:
             db.delete(rule)
             db.commit()
+            _invalidate_rule_cache()
             return True
         return False
     finally:
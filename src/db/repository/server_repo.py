@@ -4,56 +4,215 @@ Server Repository
 Handles server registration and retrieval.
 """
 
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import and_, or_, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
 from src.db.setup import SessionLocal
 from src.db.models import Server
 
 
-def get_or_create_server(hostname: str, ip: str, server_type: str) -> int:
+# (hostname, ip, server_type) -> id for servers known to be committed, so
+# repeat lookups from the listener never touch the database
+SERVER_ID_CACHE_SIZE = 4096
+_server_id_cache: Dict[Tuple[str, Optional[str], str], int] = {}
+
+# Server identity columns, in key order
+SERVER_KEY_COLUMNS = ("hostname", "ip_address", "server_type")
+
+# id -> detached Server row; servers are never updated in place
+_server_by_id_cache: Dict[int, Server] = {}
+
+
+def get_or_create_server(
+    hostname: str,
+    ip: str,
+    server_type: str,
+    session: Optional[Session] = None
+) -> int:
     """
     Get existing server or create new one.
     
+    Uses INSERT ... ON CONFLICT DO NOTHING RETURNING id against the unique
+    (hostname, ip_address, server_type) index, so concurrent callers cannot
+    create duplicates; a conflict falls back to a SELECT.
+    
     Args:
         hostname: Server hostname
         ip: IP address
         server_type: Type of server (linux, windows, nginx, etc.)
+        session: Caller-managed session; a new server is only flushed, the
+            caller commits
         
     Returns:
         Server ID
     """
-    db = SessionLocal()
+    key = (hostname, ip, server_type)
+    server_id = _server_id_cache.get(key)
+    if server_id is not None:
+        return server_id
+    
+    lookup = select(Server.id).filter_by(
+        hostname=hostname,
+        ip_address=ip,
+        server_type=server_type
+    )
+    
+    db = session or SessionLocal()
     try:
-        # Check if server exists
-        server = db.query(Server).filter_by(
-            hostname=hostname,
-            ip_address=ip,
-            server_type=server_type
-        ).first()
-
-        if server:
-            return server.id
-
-        # Create new server
-        server = Server(
-            hostname=hostname,
-            ip_address=ip,
-            server_type=server_type
-        )
-        db.add(server)
-        db.commit()
-        db.refresh(server)
-        return server.id
+        server_id = None
+        if ip is None:
+            # NULL never conflicts on the unique index, so check explicitly
+            server_id = db.scalar(lookup)
+        
+        created = False
+        if server_id is None:
+            server_id = db.scalar(
+                sqlite_insert(Server)
+                .values(hostname=hostname, ip_address=ip, server_type=server_type)
+                .on_conflict_do_nothing(index_elements=list(SERVER_KEY_COLUMNS))
+                .returning(Server.id)
+            )
+            created = server_id is not None
+            
+            if not created:
+                server_id = db.scalar(lookup)
+        
+        if session is None:
+            if created:
+                db.commit()
+        elif created:
+            # Not committed yet; the caller may still roll it back
+            return server_id
+        
+        _cache_server_id(key, server_id)
+        return server_id
 
     finally:
-        db.close()
+        if session is None:
+            db.close()
+
+
+def _cache_server_id(key: Tuple[str, Optional[str], str], server_id: int):
+    """Remember a committed server's id."""
+    if len(_server_id_cache) >= SERVER_ID_CACHE_SIZE:
+        _server_id_cache.clear()
+    _server_id_cache[key] = server_id
+
+
+def _select_server_ids(db: Session, keys) -> Dict[Tuple[str, Optional[str], str], int]:
+    """Look up the ids of existing servers for many keys in one SELECT."""
+    keyed = [key for key in keys if key[1] is not None]
+    clauses = []
+    if keyed:
+        clauses.append(tuple_(Server.hostname, Server.ip_address, Server.server_type).in_(keyed))
+    # NULL never compares equal inside a row value, so match those with IS NULL
+    clauses.extend(
+        and_(Server.hostname == hostname, Server.ip_address.is_(None), Server.server_type == server_type)
+        for hostname, ip, server_type in keys if ip is None
+    )
+    if not clauses:
+        return {}
+    
+    rows = db.execute(
+        select(Server.id, Server.hostname, Server.ip_address, Server.server_type)
+        .where(or_(*clauses))
+    )
+    return {(hostname, ip, server_type): server_id for server_id, hostname, ip, server_type in rows}
+
+
+def get_or_create_servers(
+    keys: Iterable[Tuple[str, Optional[str], str]],
+    session: Optional[Session] = None
+) -> Dict[Tuple[str, Optional[str], str], int]:
+    """
+    Get or create many servers at once.
+    
+    Batch version of get_or_create_server: uncached keys are looked up with
+    one SELECT, the missing ones are created with one multi-row
+    INSERT ... ON CONFLICT DO NOTHING RETURNING, and any that lost a race
+    to another writer are picked up by a second SELECT.
+    
+    Args:
+        keys: (hostname, ip, server_type) tuples; duplicates are fine
+        session: Caller-managed session; new servers are only flushed, the
+            caller commits
+        
+    Returns:
+        Dict mapping each key to its server ID
+    """
+    server_ids = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        server_id = _server_id_cache.get(key)
+        if server_id is None:
+            missing.append(key)
+        else:
+            server_ids[key] = server_id
+    
+    if not missing:
+        return server_ids
+    
+    db = session or SessionLocal()
+    try:
+        found = _select_server_ids(db, missing)
+        
+        created = {}
+        to_create = [key for key in missing if key not in found]
+        if to_create:
+            rows = db.execute(
+                sqlite_insert(Server)
+                .values([dict(zip(SERVER_KEY_COLUMNS, key)) for key in to_create])
+                .on_conflict_do_nothing(index_elements=list(SERVER_KEY_COLUMNS))
+                .returning(Server.id, Server.hostname, Server.ip_address, Server.server_type)
+            )
+            created = {(hostname, ip, server_type): server_id for server_id, hostname, ip, server_type in rows}
+            
+            raced = [key for key in to_create if key not in created]
+            if raced:
+                found.update(_select_server_ids(db, raced))
+        
+        if session is None:
+            if created:
+                db.commit()
+            # Committed now, so safe to cache
+            found.update(created)
+        
+        for key, server_id in found.items():
+            _cache_server_id(key, server_id)
+        
+        server_ids.update(found)
+        # Only flushed in the caller's session; not cached until committed
+        server_ids.update(created)
+        return server_ids
+    
+    finally:
+        if session is None:
+            db.close()
 
 
 def get_server_by_id(server_id: int):
-    """Get server by ID."""
+    """
+    Get server by ID.
+    
+    Found servers are cached in-process as detached instances; treat them
+    as read-only.
+    """
+    server = _server_by_id_cache.get(server_id)
+    if server is not None:
+        return server
+    
     db = SessionLocal()
     try:
-        return db.query(Server).filter_by(id=server_id).first()
+        server = db.get(Server, server_id)
     finally:
         db.close()
+    
+    if server is not None:
+        if len(_server_by_id_cache) >= SERVER_ID_CACHE_SIZE:
+            _server_by_id_cache.clear()
+        _server_by_id_cache[server_id] = server
+    return server
 
 
 def get_all_servers():
@@ -4,66 +4,125 @@ Windows Log Details Repository
 Handles parsed Windows log details.
 """
 
-import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
 from src.db.setup import SessionLocal
 from src.db.models import WindowsLogDetails
+from src.db.repository.log_repo import mark_logs_parsed
 
 
-def insert_windows_details(log_entry_id: int, event_json: Dict[str, Any]) -> None:
+def event_id_of(event_json: Dict[str, Any]) -> Optional[int]:
+    """EventID of a Windows event as an int, or None."""
+    try:
+        return int(event_json.get("EventID"))
+    except (TypeError, ValueError):
+        return None
+
+
+def insert_windows_details(
+    log_entry_id: int,
+    event_json: Dict[str, Any],
+    session: Optional[Session] = None
+) -> None:
     """
     Insert parsed Windows log details.
     
     Args:
         log_entry_id: ID of the parent log entry
         event_json: Dictionary containing Windows event data
+        session: Caller-managed session; the row is only flushed, the
+            caller commits
     """
-    db = SessionLocal()
+    db = session or SessionLocal()
     try:
         details = WindowsLogDetails(
             log_entry_id=log_entry_id,
-            content=json.dumps(event_json)
+            content=event_json,
+            event_id=event_id_of(event_json)
         )
         db.add(details)
-        db.commit()
+        mark_logs_parsed([log_entry_id], session=db)
+        
+        if session is not None:
+            db.flush()
+        else:
+            db.commit()
 
     finally:
-        db.close()
+        if session is None:
+            db.close()
+
+
+def insert_windows_details_bulk(
+    entries: List[Dict[str, Any]],
+    batch_size: int = 1000,
+    session: Optional[Session] = None
+) -> None:
+    """
+    Insert Windows details for many log entries with executemany.
+    
+    Args:
+        entries: Dicts with log_entry_id and event_json
+        batch_size: Rows per executemany call
+        session: Caller-managed session; rows are only flushed, the caller
+            commits
+    """
+    values = [
+        {
+            "log_entry_id": entry["log_entry_id"],
+            "content": entry["event_json"],
+            "event_id": event_id_of(entry["event_json"])
+        }
+        for entry in entries
+    ]
+    
+    db = session or SessionLocal()
+    try:
+        for start in range(0, len(values), batch_size):
+            db.execute(insert(WindowsLogDetails), values[start:start + batch_size])
+        mark_logs_parsed([value["log_entry_id"] for value in values], session=db, batch_size=batch_size)
+        
+        if session is None:
+            db.commit()
+
+    finally:
+        if session is None:
+            db.close()
 
 
 def get_windows_details(log_entry_id: int) -> Optional[Dict[str, Any]]:
     """
     Get Windows log details for a specific log entry.
     
+    log_entry_id is the table's primary key, so this is a single index
+    seek that loads only the content column.
+    
     Returns:
-        Parsed JSON content or None
+        Event dict or None
     """
     db = SessionLocal()
     try:
-        details = db.query(WindowsLogDetails).filter_by(
-            log_entry_id=log_entry_id
-        ).first()
-        
-        if details:
-            return json.loads(details.content)
-        return None
+        return db.execute(
+            select(WindowsLogDetails.content).where(
+                WindowsLogDetails.log_entry_id == log_entry_id
+            )
+        ).scalar_one_or_none()
     finally:
         db.close()
 
 
 def get_windows_events_by_id(event_id: int, limit: int = 50):
-    """Get Windows events by Event ID."""
+    """
+    Get Windows events by Event ID.
+    
+    Filters on the indexed event_id column filled at insert time, so the
+    match is an index seek and no event is unpacked to find it.
+    """
     db = SessionLocal()
     try:
-        details = db.query(WindowsLogDetails).limit(limit).all()
-        
-        # Filter by event ID in JSON content
-        results = []
-        for detail in details:
-            content = json.loads(detail.content)
-            if content.get("EventID") == event_id:
-                results.append(detail)
-                
-        return results
+        return db.query(WindowsLogDetails).filter(
+            WindowsLogDetails.event_id == event_id
+        ).limit(limit).all()
     finally:
         db.close()
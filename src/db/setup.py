@@ -1,10 +1,13 @@
 # setup.py
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker
 import os
 
 # Import Base from separate file to avoid circular imports
 from src.db.base import Base
+from src.db.types import decompress_content
+from src.utils import fastjson
 
 # Ensure folder exists
 os.makedirs("collected_logs", exist_ok=True)
@@ -12,15 +15,62 @@ os.makedirs("collected_logs", exist_ok=True)
 DB_PATH = "collected_logs/ironclad_logs.db"
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
+# Connection pool sizing: listener, ingestion/parser/alert workers and the
+# dashboard API each hold a session at once. Override with DB_POOL_SIZE.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "5"))
+
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},   # Needed for SQLite multithreading
-    echo=False
+    echo=False,
+    # JSON columns go through orjson when it is installed
+    json_serializer=fastjson.dumps,
+    json_deserializer=fastjson.loads,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_use_lifo=True   # reuse the most recently used (warm) connection
+)
+
+# Per-connection SQLite tuning: WAL lets readers run alongside the writer and,
+# with synchronous=NORMAL, commits no longer fsync on every transaction.
+# Each value can be overridden with SQLITE_<NAME>, e.g. SQLITE_SYNCHRONOUS=FULL.
+SQLITE_PRAGMA_DEFAULTS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "mmap_size": "268435456",
+    "cache_size": "-65536",
+    "wal_autocheckpoint": "1000",
+}
+SQLITE_PRAGMAS = tuple(
+    f"PRAGMA {name}={os.environ.get(f'SQLITE_{name.upper()}', default)}"
+    for name, default in SQLITE_PRAGMA_DEFAULTS.items()
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLITE_PRAGMAS to every new pooled connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+    
+    # Lets SQL predicates see compressed log_entry.content
+    dbapi_connection.create_function(
+        "decompress_content", 1, decompress_content, deterministic=True
+    )
+
+
+# expire_on_commit=False keeps ids and loaded columns readable after commit,
+# so callers don't need a refresh() round-trip
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
+    expire_on_commit=False,
     bind=engine
 )
 
@@ -33,7 +83,158 @@ def init_db():
     
     print(f"[DB] Creating database at {DB_PATH}")
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _drop_replaced_indexes()
+    _merge_duplicate_servers()
+    
+    # create_all skips tables that already exist, indexes included
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # e.g. a unique index over rows that already hold duplicates
+                print(f"[DB] ⚠️  Could not create index {index.name}: {e}")
     print("[DB] ✅ All tables created successfully!")
+    
+    warm_pool()
+
+
+# (table, column, definition, backfill SQL or None) for columns added after
+# the first release
+ADDED_COLUMNS = (
+    ("log_entry", "parse_claim_id", "VARCHAR", None),
+    ("log_entry", "parse_claimed_at", "DATETIME", None),
+    ("log_entry", "parsed", "BOOLEAN NOT NULL DEFAULT 0",
+     "UPDATE log_entry SET parsed = 1 WHERE id IN ("
+     "SELECT log_entry_id FROM linux_log_details "
+     "UNION ALL SELECT log_entry_id FROM windows_log_details "
+     "UNION ALL SELECT log_entry_id FROM nginx_log_details)"),
+    ("windows_log_details", "event_id", "INTEGER",
+     "UPDATE windows_log_details SET event_id = json_extract(content, '$.EventID') "
+     "WHERE typeof(content) = 'text' AND json_valid(content)"),
+)
+
+# Indexes replaced by differently named ones
+DROPPED_INDEXES = ("ix_logentry_unclaimed", "ix_logentry_unparsed")
+
+# (table, column, index) for generated columns that became plain columns
+DROPPED_GENERATED_COLUMNS = (
+    ("windows_log_details", "event_id", "ix_windows_event_id"),
+)
+
+
+# Older releases could insert the same server twice; ux_server_identity
+# cannot be created until those rows are merged into the lowest id.
+# old_id -> kept id for every server that has an older twin.
+DUPLICATE_SERVERS_SQL = (
+    "SELECT s.id AS old_id, MIN(k.id) AS new_id FROM server s "
+    "JOIN server k ON k.hostname = s.hostname AND k.ip_address IS s.ip_address "
+    "AND k.server_type = s.server_type AND k.id < s.id "
+    "GROUP BY s.id"
+)
+
+# (table, column) pointing at server.id
+SERVER_REFERENCES = (
+    ("log_entry", "server_id"),
+    ("alert", "server_id"),
+)
+
+
+def _merge_duplicate_servers():
+    """Repoint references to duplicate servers at the kept row, then delete them."""
+    with engine.begin() as conn:
+        has_index = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_server_identity'"
+        )).first()
+        if has_index:
+            return
+        
+        for table, column in SERVER_REFERENCES:
+            conn.execute(text(
+                f"UPDATE {table} SET {column} = "
+                f"(SELECT new_id FROM ({DUPLICATE_SERVERS_SQL}) WHERE old_id = {table}.{column}) "
+                f"WHERE {column} IN (SELECT old_id FROM ({DUPLICATE_SERVERS_SQL}))"
+            ))
+        merged = conn.execute(text(
+            f"DELETE FROM server WHERE id IN (SELECT old_id FROM ({DUPLICATE_SERVERS_SQL}))"
+        )).rowcount
+    
+    if merged:
+        print(f"[DB] Merged {merged} duplicate servers")
+
+
+def _drop_generated_columns():
+    """Drop generated columns so ADDED_COLUMNS re-adds them as plain ones."""
+    with engine.begin() as conn:
+        for table, column, index in DROPPED_GENERATED_COLUMNS:
+            # table_xinfo marks generated columns with hidden = 2 or 3
+            generated = any(
+                row[1] == column and row[6] in (2, 3)
+                for row in conn.execute(text(f"PRAGMA table_xinfo({table})"))
+            )
+            if generated:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+                print(f"[DB] Dropped generated column {table}.{column}")
+
+
+def _drop_replaced_indexes():
+    """Drop indexes listed in DROPPED_INDEXES from older database files."""
+    with engine.begin() as conn:
+        for index in DROPPED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+
+def _add_missing_columns():
+    """Add columns introduced after a database file was first created."""
+    _drop_generated_columns()
+    inspector = inspect(engine)
+    for table, column, definition, backfill in ADDED_COLUMNS:
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        if column not in existing:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+                if backfill:
+                    conn.execute(text(backfill))
+            print(f"[DB] Added {table}.{column}")
+
+
+def warm_pool(size: int = DB_POOL_SIZE):
+    """
+    Open ``size`` pooled connections up front.
+    
+    Connecting (and running the PRAGMA listener) happens here instead of
+    on the first burst of traffic; the connections are returned to the pool.
+    """
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    except Exception as e:
+        print(f"[DB] ⚠️  Could not pre-warm connection pool: {e}")
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+@contextmanager
+def session_scope():
+    """
+    Unit of work for batched writes.
+    
+    Pass the yielded session to repository functions (``session=``) so they
+    share one transaction; it commits on exit and rolls back on error.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 
 def get_db():
@@ -0,0 +1,134 @@
+"""
+Custom column types.
+
+CompressedText stores long log lines compressed; short ones stay plain text.
+PackedJSON stores JSON documents as msgpack BLOBs.
+"""
+
+import zlib
+from typing import Any, Optional, Union
+
+from sqlalchemy import LargeBinary, Text
+from sqlalchemy.types import TypeDecorator
+
+from src.utils import fastjson
+
+# zstandard is optional; without it new rows are compressed with zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ormsgpack is optional; without it PackedJSON writes UTF-8 JSON bytes
+try:
+    import ormsgpack
+except ImportError:
+    ormsgpack = None
+
+# Below this many UTF-8 bytes compression costs more than it saves
+COMPRESS_MIN_BYTES = 120
+
+# First byte of a stored BLOB names the codec
+ZSTD_MARKER = b"Z"
+ZLIB_MARKER = b"z"
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+if zstandard is not None:
+    _zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+
+
+def compress_content(value: Optional[str]) -> Union[str, bytes, None]:
+    """Compress a log line for storage, leaving short lines as text."""
+    if value is None:
+        return None
+    
+    data = value.encode("utf-8")
+    if len(data) < COMPRESS_MIN_BYTES:
+        return value
+    
+    if zstandard is not None:
+        return ZSTD_MARKER + _zstd_compressor.compress(data)
+    return ZLIB_MARKER + zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_content(value: Union[str, bytes, None]) -> Optional[str]:
+    """Inverse of compress_content; plain text rows pass through."""
+    if value is None or isinstance(value, str):
+        return value
+    
+    marker, payload = value[:1], value[1:]
+    if marker == ZLIB_MARKER:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == ZSTD_MARKER:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this log entry")
+        return _zstd_decompressor.decompress(payload).decode("utf-8")
+    
+    # Unknown BLOB written by something else; surface it as text
+    return bytes(value).decode("utf-8", errors="replace")
+
+
+class CompressedText(TypeDecorator):
+    """
+    TEXT column that transparently compresses long values.
+    
+    Rows written before compression (or by raw SQL) are plain TEXT and are
+    read back unchanged. SQL predicates such as LIKE only see plain rows;
+    wrap the column in the ``decompress_content`` SQL function registered
+    on each connection (see setup.py) to match compressed ones too.
+    """
+    
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return compress_content(value)
+    
+    def process_result_value(self, value, dialect):
+        return decompress_content(value)
+
+
+def pack_json(value: Any) -> Optional[bytes]:
+    """Encode a JSON-compatible value as msgpack (or JSON bytes)."""
+    if value is None:
+        return None
+    if ormsgpack is not None:
+        return ormsgpack.packb(value)
+    return fastjson.dumps(value).encode("utf-8")
+
+
+def unpack_json(value: Union[str, bytes, None]) -> Any:
+    """Inverse of pack_json; also reads rows stored as JSON text."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return fastjson.loads(value)
+    
+    # A msgpack map or array never starts with '{' or '['
+    if value[:1] in (b"{", b"["):
+        return fastjson.loads(bytes(value).decode("utf-8"))
+    if ormsgpack is None:
+        raise RuntimeError("ormsgpack is required to read this row")
+    return ormsgpack.unpackb(value)
+
+
+class PackedJSON(TypeDecorator):
+    """
+    BLOB column holding a JSON document packed with msgpack.
+    
+    Binds and returns Python objects. Rows written as JSON text before the
+    switch are still decoded; SQL JSON functions only work on those rows,
+    so anything that needs filtering gets its own column.
+    """
+    
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return pack_json(value)
+    
+    def process_result_value(self, value, dialect):
+        return unpack_json(value)
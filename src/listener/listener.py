@@ -4,9 +4,153 @@ UDP Listener
 Simple UDP socket wrapper for receiving log messages.
 """
 
+import ctypes
+import ctypes.util
+import select
 import socket
-from typing import Optional, Dict, Any
-from datetime import datetime
+import sys
+from typing import Optional, Dict, Any, List
+
+from src.utils.clock import now_iso
+
+
+# --- recvmmsg(2) via ctypes (Linux only) ---
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_recvmmsg():
+    """Return libc's recvmmsg, or None where it is unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        recvmmsg = libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+    recvmmsg.argtypes = [
+        ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p
+    ]
+    recvmmsg.restype = ctypes.c_int
+    return recvmmsg
+
+
+_recvmmsg = _load_recvmmsg()
+
+class _CMsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("cmsg_len", ctypes.c_size_t),
+        ("cmsg_level", ctypes.c_int),
+        ("cmsg_type", ctypes.c_int),
+    ]
+
+
+MSG_DONTWAIT = getattr(socket, "MSG_DONTWAIT", 0x40)
+MAX_DATAGRAM = 65535
+SOCKADDR_SIZE = 128  # sizeof(struct sockaddr_storage)
+
+# UDP generic receive offload (Linux >= 5.0): the kernel hands back several
+# same-sized datagrams of one flow as a single buffer, with the segment size
+# in a SOL_UDP/UDP_GRO control message
+SOL_UDP = getattr(socket, "SOL_UDP", 17)
+UDP_GRO = 104
+GRO_CMSG_SPACE = socket.CMSG_SPACE(4) if hasattr(socket, "CMSG_SPACE") else 0
+
+# Raw sockaddr bytes (family, port, address) -> source IP text
+SRC_IP_CACHE_SIZE = 4096
+_src_ip_cache: Dict[bytes, str] = {}
+
+
+def _decode_sockaddr(raw: bytes) -> str:
+    """Source IP of a sockaddr_in / sockaddr_in6 written by the kernel."""
+    family = int.from_bytes(raw[0:2], sys.byteorder)
+    if family == socket.AF_INET:
+        return socket.inet_ntop(socket.AF_INET, raw[4:8])
+    if family == socket.AF_INET6:
+        return socket.inet_ntop(socket.AF_INET6, raw[8:24])
+    return ""
+
+
+def _split_gro(data: bytes, segment_size: int) -> List[bytes]:
+    """Split a GRO-coalesced buffer back into its datagrams."""
+    if segment_size <= 0 or len(data) <= segment_size:
+        return [data]
+    return [data[start:start + segment_size] for start in range(0, len(data), segment_size)]
+
+
+class _RecvmmsgBuffers:
+    """Preallocated mmsghdr/iovec/payload/address arrays for one batch size."""
+    
+    def __init__(self, count: int):
+        self.count = count
+        self.payloads = (ctypes.c_char * (MAX_DATAGRAM * count))()
+        self.addrs = (ctypes.c_char * (SOCKADDR_SIZE * count))()
+        self.controls = (ctypes.c_char * (GRO_CMSG_SPACE * count))()
+        self.iovecs = (_IoVec * count)()
+        self.msgs = (_MMsgHdr * count)()
+        
+        payload_base = ctypes.addressof(self.payloads)
+        addr_base = ctypes.addressof(self.addrs)
+        control_base = ctypes.addressof(self.controls)
+        for i in range(count):
+            self.iovecs[i].iov_base = payload_base + i * MAX_DATAGRAM
+            self.iovecs[i].iov_len = MAX_DATAGRAM
+            hdr = self.msgs[i].msg_hdr
+            hdr.msg_name = addr_base + i * SOCKADDR_SIZE
+            hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+            hdr.msg_iovlen = 1
+            hdr.msg_control = control_base + i * GRO_CMSG_SPACE
+    
+    def reset(self):
+        """Restore the in/out fields the kernel overwrites."""
+        for i in range(self.count):
+            self.msgs[i].msg_hdr.msg_namelen = SOCKADDR_SIZE
+            self.msgs[i].msg_hdr.msg_controllen = GRO_CMSG_SPACE
+            self.msgs[i].msg_hdr.msg_flags = 0
+    
+    def payload(self, i: int) -> bytes:
+        start = i * MAX_DATAGRAM
+        return self.payloads[start:start + self.msgs[i].msg_len]
+    
+    def segment_size(self, i: int) -> int:
+        """UDP_GRO segment size reported for message i, or 0 if none."""
+        if self.msgs[i].msg_hdr.msg_controllen < ctypes.sizeof(_CMsgHdr) + 4:
+            return 0
+        start = ctypes.addressof(self.controls) + i * GRO_CMSG_SPACE
+        cmsg = _CMsgHdr.from_address(start)
+        if cmsg.cmsg_level != SOL_UDP or cmsg.cmsg_type != UDP_GRO:
+            return 0
+        return ctypes.c_int.from_address(start + socket.CMSG_LEN(0)).value
+    
+    def src_ip(self, i: int) -> str:
+        # Senders (and their source ports) repeat, so the decoded text is
+        # cached per raw address as the kernel wrote it
+        start = i * SOCKADDR_SIZE
+        raw = self.addrs[start:start + self.msgs[i].msg_hdr.msg_namelen]
+        ip = _src_ip_cache.get(raw)
+        if ip is None:
+            ip = _decode_sockaddr(raw)
+            if len(_src_ip_cache) >= SRC_IP_CACHE_SIZE:
+                _src_ip_cache.clear()
+            _src_ip_cache[raw] = ip
+        return ip
 
 
 class UdpListener:
@@ -17,6 +161,10 @@ class UdpListener:
     Can receive syslog, JSON logs, or any text-based data.
     """
     
+    # Kernel receive buffer requested in start(); absorbs bursts between
+    # reads (the kernel caps it at net.core.rmem_max)
+    RCVBUF_BYTES = 16 << 20
+    
     def __init__(self, host: str = "0.0.0.0", port: int = 5140, timeout: float = 1.0):
         """
         Initialize listener.
@@ -31,6 +179,9 @@ class UdpListener:
         self.timeout = timeout
         self.socket = None
         self._running = False
+        self._recv_buffers: Optional[_RecvmmsgBuffers] = None
+        self._gro = False
+        self._pending: List[Dict[str, Any]] = []
     
     def start(self):
         """Open UDP socket and start listening."""
@@ -40,12 +191,28 @@ class UdpListener:
         
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RCVBUF_BYTES)
+        except OSError as e:
+            print(f"[UdpListener] Could not set SO_RCVBUF: {e}")
+        self._gro = self._enable_gro()
         self.socket.bind((self.host, self.port))
         self.socket.settimeout(self.timeout)
         
         self._running = True
         print(f"[UdpListener] Started on UDP {self.host}:{self.port}")
     
+    def _enable_gro(self) -> bool:
+        """Turn on UDP_GRO; False where the kernel or platform lacks it."""
+        if not sys.platform.startswith("linux") or not GRO_CMSG_SPACE:
+            return False
+        try:
+            self.socket.setsockopt(SOL_UDP, UDP_GRO, 1)
+        except OSError as e:
+            print(f"[UdpListener] UDP_GRO not available: {e}")
+            return False
+        return True
+    
     def receive(self) -> Optional[Dict[str, Any]]:
         """
         Receive one UDP message.
@@ -56,12 +223,20 @@ class UdpListener:
         if not self._running:
             raise RuntimeError("Listener not started. Call start() first.")
         
+        if self._gro:
+            # One read can carry several coalesced datagrams; hand them out
+            # one per call
+            if not self._pending:
+                self._pending = self.receive_batch()
+                self._pending.reverse()
+            return self._pending.pop() if self._pending else None
+        
         try:
             data, addr = self.socket.recvfrom(65535)
             message = data.decode("utf-8", errors="replace").strip()
             
             return {
-                "recv_time": datetime.now().isoformat(),
+                "recv_time": now_iso(),
                 "src_ip": addr[0],
                 "line": message
             }
@@ -71,6 +246,91 @@ class UdpListener:
             print(f"[UdpListener] Error: {e}")
             return None
     
+    def receive_batch(self, max_msgs: int = 64) -> List[Dict[str, Any]]:
+        """
+        Receive up to max_msgs UDP messages with as few syscalls as possible.
+        
+        Waits up to the socket timeout for the first datagram, then drains
+        whatever is queued without blocking - with one recvmmsg(2) call on
+        Linux, or a non-blocking recvfrom loop elsewhere. With UDP_GRO on,
+        each read may hold several coalesced datagrams, which are split
+        back apart, so more than max_msgs messages can be returned.
+        
+        Returns:
+            List of {recv_time, src_ip, line} dicts (empty on timeout)
+        """
+        if not self._running:
+            raise RuntimeError("Listener not started. Call start() first.")
+        
+        try:
+            readable, _, _ = select.select([self.socket], [], [], self.timeout)
+            if not readable:
+                return []
+            
+            if _recvmmsg is not None:
+                datagrams = self._recvmmsg(max_msgs)
+            else:
+                datagrams = self._drain_recvfrom(max_msgs)
+        except Exception as e:
+            print(f"[UdpListener] Error: {e}")
+            return []
+        
+        recv_time = now_iso()
+        return [
+            {
+                "recv_time": recv_time,
+                "src_ip": src_ip,
+                "line": data.decode("utf-8", errors="replace").strip()
+            }
+            for data, src_ip in datagrams
+        ]
+    
+    def _recvmmsg(self, max_msgs: int) -> List[tuple]:
+        """Read up to max_msgs queued datagrams with one recvmmsg call."""
+        if self._recv_buffers is None or self._recv_buffers.count != max_msgs:
+            self._recv_buffers = _RecvmmsgBuffers(max_msgs)
+        buffers = self._recv_buffers
+        buffers.reset()
+        
+        count = _recvmmsg(self.socket.fileno(), buffers.msgs, max_msgs, MSG_DONTWAIT, None)
+        if count < 0:
+            errno = ctypes.get_errno()
+            if errno in (11, 35):  # EAGAIN / EWOULDBLOCK: nothing queued after all
+                return []
+            raise OSError(errno, "recvmmsg failed")
+        
+        if not self._gro:
+            return [(buffers.payload(i), buffers.src_ip(i)) for i in range(count)]
+        
+        datagrams = []
+        for i in range(count):
+            src_ip = buffers.src_ip(i)
+            for data in _split_gro(buffers.payload(i), buffers.segment_size(i)):
+                datagrams.append((data, src_ip))
+        return datagrams
+    
+    def _drain_recvfrom(self, max_msgs: int) -> List[tuple]:
+        """Portable fallback: non-blocking recvfrom until the queue is empty."""
+        datagrams = []
+        reads = 0
+        while reads < max_msgs:
+            try:
+                if self._gro:
+                    data, ancdata, _, addr = self.socket.recvmsg(MAX_DATAGRAM, GRO_CMSG_SPACE, MSG_DONTWAIT)
+                else:
+                    data, addr = self.socket.recvfrom(MAX_DATAGRAM, MSG_DONTWAIT)
+                    ancdata = ()
+            except (BlockingIOError, socket.timeout):
+                break
+            reads += 1
+            
+            segment_size = 0
+            for level, kind, value in ancdata:
+                if level == SOL_UDP and kind == UDP_GRO:
+                    segment_size = int.from_bytes(value[:4], sys.byteorder)
+            datagrams.extend((segment, addr[0]) for segment in _split_gro(data, segment_size))
+        return datagrams
+    
     def stop(self):
         """Close socket."""
         if self.socket:
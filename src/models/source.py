@@ -1,8 +1,8 @@
 """
 Data models for log sources in the Agentless SIEM
 """
-from typing import Literal, Optional
-from datetime import datetime
+from typing import Iterable, List, Literal, Optional
+from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 
 
@@ -54,20 +54,37 @@ class LogSource(BaseModel):
         }
 
 
-def calculate_source_status(last_seen: datetime) -> Literal["online", "delayed", "offline"]:
+SourceStatus = Literal["online", "delayed", "offline"]
+
+# Status thresholds, kept as timedeltas so ages compare without conversion
+ONLINE_WITHIN = timedelta(seconds=5)
+DELAYED_WITHIN = timedelta(seconds=30)
+
+
+def calculate_source_statuses(
+    last_seen_list: Iterable[datetime],
+    now: Optional[datetime] = None
+) -> List[SourceStatus]:
     """
-    Calculate source status based on last seen timestamp
+    Calculate the status of many sources against a single clock reading
     
     Rules:
     - online: last_seen < 5 seconds ago
     - delayed: 5-30 seconds ago
     - offline: > 30 seconds ago
     """
-    delta = (datetime.now() - last_seen).total_seconds()
+    now = now or datetime.now()
+    online_after = now - ONLINE_WITHIN
+    delayed_after = now - DELAYED_WITHIN
     
-    if delta < 5:
-        return "online"
-    elif delta < 30:
-        return "delayed"
-    else:
-        return "offline"
+    return [
+        "online" if last_seen > online_after
+        else "delayed" if last_seen > delayed_after
+        else "offline"
+        for last_seen in last_seen_list
+    ]
+
+
+def calculate_source_status(last_seen: datetime) -> SourceStatus:
+    """Calculate source status based on last seen timestamp"""
+    return calculate_source_statuses([last_seen])[0]
@@ -6,14 +6,43 @@ Supports multiple timestamp formats and common Linux system services.
 """
 
 import re
-import datetime
-import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 import polars as pl
 from src.base.base_parser import BaseParser
 
 
+# SSH login pattern, shared by per-row and batch enrichment
+SSH_PATTERN = (
+    r"(?P<ssh_action>Accepted|Failed)\s+"
+    r"(?:password|publickey)\s+for\s+"
+    r"(?:invalid\s+user\s+)?"
+    r"(?P<ssh_user>\S+)\s+from\s+"
+    r"(?P<ssh_ip>\S+)"
+)
+SSH_FIELDS = ["ssh_action", "ssh_user", "ssh_ip"]
+
+# Syslog header pattern, shared by per-row parsing and the Polars batch path
+HEADER_PATTERN = (
+    r"(?P<timestamp>"
+    r"^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}[\.\d]*[Z\+\-\:0-9]*|"  # ISO format
+    r"^\S+\s+\S+\s+\S+|"  # BSD syslog format (e.g., "Dec 06 14:30:45")
+    r"^\S+"  # Fallback for other formats
+    r")"
+    r"\s+"
+    r"(?P<hostname>\S+)"
+    r"\s+"
+    r"(?P<app_name>[^:\[\s]+)"
+    r"(?:\[(?P<pid>\d+)\])?"
+    r":\s+"
+    r"(?P<raw_message>.*)"
+)
+HEADER_FIELDS = ["timestamp", "hostname", "app_name", "pid", "raw_message"]
+
+# Lines starting like an Nginx access log are left to the Nginx parser
+NGINX_PREFIX_PATTERN = r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\s+-"
+
+
 class LinuxParser(BaseParser):
     """
     Parser for Linux syslog format logs.
@@ -36,29 +65,13 @@ class LinuxParser(BaseParser):
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
         # Main syslog header pattern
-        self.header_pattern = re.compile(
-            r"(?P<timestamp>"
-            r"^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}[\.\d]*[Z\+\-\:0-9]*|"  # ISO format
-            r"^\S+\s+\S+\s+\S+|"  # BSD syslog format (e.g., "Dec 06 14:30:45")
-            r"^\S+"  # Fallback for other formats
-            r")"
-            r"\s+"
-            r"(?P<hostname>\S+)"
-            r"\s+"
-            r"(?P<app_name>[^:\[\s]+)"
-            r"(?:\[(?P<pid>\d+)\])?"
-            r":\s+"
-            r"(?P<raw_message>.*)"
-        )
+        self.header_pattern = re.compile(HEADER_PATTERN)
         
         # SSH event pattern for enrichment
-        self.ssh_pattern = re.compile(
-            r"(?P<ssh_action>Accepted|Failed)\s+"
-            r"(?:password|publickey)\s+for\s+"
-            r"(?:invalid\s+user\s+)?"
-            r"(?P<ssh_user>\S+)\s+from\s+"
-            r"(?P<ssh_ip>\S+)"
-        )
+        self.ssh_pattern = re.compile(SSH_PATTERN)
+        
+        # Nginx-looking prefix that can_parse rejects
+        self.nginx_prefix_pattern = re.compile(NGINX_PREFIX_PATTERN)
     
     def get_log_type(self) -> str:
         """Return log type identifier."""
@@ -80,8 +93,9 @@ class LinuxParser(BaseParser):
         if raw_log.startswith("{"):
             return False
         
-        # Reject if it looks like Nginx (starts with IP address)
-        if re.match(r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\s+-", raw_log):
+        # Reject if it looks like Nginx (starts with IP address); only lines
+        # starting with a digit can match, so skip the regex for the rest
+        if raw_log[:1].isdigit() and self.nginx_prefix_pattern.match(raw_log):
             return False
         
         # Check if it matches syslog header pattern
@@ -123,34 +137,45 @@ class LinuxParser(BaseParser):
         """
         Parse a batch of Linux logs into a DataFrame.
         
+        The header regex runs inside Polars over the whole line column
+        instead of once per line in Python; it applies the same filters as
+        can_parse and the same pid conversion as parse.
+        
         Args:
             logs: List of log dictionaries with 'line', 'src_ip', 'recv_time'
             
         Returns:
             Polars DataFrame with parsed and enriched data, or None if no logs match
         """
-        parsed_logs = []
+        if not logs:
+            return None
         
-        for log in logs:
-            raw_line = log.get("line", "").strip()
-            
-            if not self.can_parse(raw_line):
-                continue
-            
-            metadata = {
-                "src_ip": log.get("src_ip", ""),
-                "recv_time": log.get("recv_time", "")
-            }
-            
-            parsed = self.parse(raw_line, metadata)
-            if parsed:
-                parsed_logs.append(parsed)
+        df = pl.DataFrame(
+            {
+                "line": [log.get("line", "") for log in logs],
+                "src_ip": [log.get("src_ip", "") for log in logs],
+                "recv_time": [log.get("recv_time", "") for log in logs]
+            },
+            schema={"line": pl.String, "src_ip": pl.String, "recv_time": pl.String}
+        )
         
-        if not parsed_logs:
-            return None
+        line = pl.col("line").str.strip_chars()
+        df = (
+            df.with_columns(line)
+            # Same rejections as can_parse: JSON and Nginx-looking lines
+            .filter(
+                ~pl.col("line").str.starts_with("{")
+                & ~pl.col("line").str.contains(NGINX_PREFIX_PATTERN)
+            )
+            .with_columns(pl.col("line").str.extract_groups(HEADER_PATTERN).alias("header"))
+            .unnest("header")
+            .drop_nulls("hostname")
+            .with_columns(pl.col("pid").cast(pl.Int64, strict=False))
+            .select(HEADER_FIELDS + ["src_ip", "recv_time"])
+        )
         
-        # Create DataFrame
-        df = pl.DataFrame(parsed_logs)
+        if df.is_empty():
+            return None
         
         # Apply batch-level SSH enrichment
         df = self._enrich_ssh_batch(df)
@@ -185,7 +210,9 @@ class LinuxParser(BaseParser):
         """
         Apply SSH enrichment to entire DataFrame using Polars operations.
         
-        More efficient than row-by-row enrichment for large batches.
+        The regex only runs over the sshd rows; the result is joined back,
+        so other rows get null SSH columns. SSH columns already present
+        (from per-row enrichment) are replaced.
         
         Args:
             df: Polars DataFrame with parsed Linux logs
@@ -196,47 +223,38 @@ class LinuxParser(BaseParser):
         if "app_name" not in df.columns or "raw_message" not in df.columns:
             return df
         
-        # Extract SSH details using regex on raw_message
-        ssh_pattern_str = (
-            r"(?P<ssh_action>Accepted|Failed)\s+"
-            r"(?:password|publickey)\s+for\s+"
-            r"(?:invalid\s+user\s+)?"
-            r"(?P<ssh_user>\S+)\s+from\s+"
-            r"(?P<ssh_ip>\S+)"
-        )
+        df = df.drop(SSH_FIELDS, strict=False).with_row_index("_row")
         
-        # Apply SSH parsing only to sshd logs
-        df = df.with_columns(
-            pl.when(pl.col("app_name") == "sshd")
-            .then(pl.col("raw_message").str.extract_groups(ssh_pattern_str))
-            .otherwise(None)
-            .alias("ssh_details")
+        # Extract SSH details from the sshd rows only
+        ssh = (
+            df.filter(pl.col("app_name") == "sshd")
+            .select(
+                "_row",
+                pl.col("raw_message").str.extract_groups(SSH_PATTERN).alias("ssh_details")
+            )
+            .unnest("ssh_details")
         )
         
-        # Unnest SSH details into separate columns
-        if "ssh_details" in df.columns:
-            df = df.unnest("ssh_details")
-        
-        return df
+        return df.join(ssh, on="_row", how="left", maintain_order="left").drop("_row")
     
-    def write_to_file(self, df: pl.DataFrame, format: str = "csv") -> str:
+    def write_to_file(self, df: Union[pl.DataFrame, pl.LazyFrame], format: str = "csv") -> str:
         """Write parsed Linux logs to file.
         
         Args:
-            df: Polars DataFrame with parsed logs
-            format: Output format ('csv' or 'json')
+            df: Polars DataFrame with parsed logs, or a LazyFrame to stream
+            format: Output format ('csv', 'json' or 'feather')
             
         Returns:
             Path to the written file
         """
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        
         if format == "json":
-            filename = os.path.join(self.output_dir, f"batch_{timestamp}.json")
-            df.write_ndjson(filename)
+            filename = self._batch_filename("json")
+        elif format == "feather":
+            filename = self._batch_filename("feather")
         else:  # csv
-            filename = os.path.join(self.output_dir, f"batch_{timestamp}.csv")
-            df.write_csv(filename)
+            filename = self._batch_filename("csv")
+        
+        rows = self._write_frame(df, filename, format)
         
-        print(f"[LinuxParser] Wrote {len(df)} records to {filename}")
+        print(f"[LinuxParser] Wrote {'all' if rows is None else rows} records to {filename}")
         return filename
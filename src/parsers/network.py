@@ -3,9 +3,13 @@ import datetime
 import json
 import re
 import sqlite3
+from collections import OrderedDict
+from itertools import islice
 from fastapi import FastAPI, Query, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 
+from src.utils import fastjson
+
 # Sigma Rule Engine integration
 from src.workers.sigma_rule_engine import SigmaRuleEngine
 
@@ -16,16 +20,21 @@ def get_db_connection():
 # --- IroncladParser Implementation ---
 class IroncladParser:
     sigma_engine = None
+    # Max (hostname, ip_address, server_type) -> id entries kept per parser
+    SERVER_CACHE_SIZE = 4096
 
-    def _init_(self):
+    def __init__(self):
         self.conn = get_db_connection()
+        # LRU of server ids; cleared on rollback since new ids may vanish
+        self._server_cache = OrderedDict()
         # Initialize SigmaRuleEngine if not already
         if IroncladParser.sigma_engine is None:
             IroncladParser.sigma_engine = SigmaRuleEngine(r"./Sigma_Rules")
             IroncladParser.sigma_engine.load_rules()
 
+        # Patterns are compiled once per parser, not looked up per line
         # Linux log pattern
-        self.linux_header_pattern = (
+        self.linux_header_pattern = re.compile(
             r"(?P<timestamp>"
             r"^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}[\.\d][Z\+\-\:0-9]|" 
             r"^\S+\s+\S+\s+\S+|" 
@@ -41,7 +50,7 @@ class IroncladParser:
         )
 
         # Nginx log pattern
-        self.nginx_pattern = (
+        self.nginx_pattern = re.compile(
             r"(?P<remote_addr>[\d\.]+)\s+" 
             r"-\s+(?P<remote_user>\S+)\s+" 
             r"\[(?P<time_local>.*?)\]\s+" 
@@ -55,7 +64,7 @@ class IroncladParser:
         )
 
         # Zeek conn.log pattern
-        self.zeek_conn_pattern = (
+        self.zeek_conn_pattern = re.compile(
             r'(?P<ts>\d+\.\d+)\s+'
             r'(?P<uid>\S+)\s+'
             r'(?P<orig_h>\S+)\s+'
@@ -77,59 +86,146 @@ class IroncladParser:
             r'(?P<resp_ip_bytes>\d+)'
         )
 
+        # Text formats by first character: nginx (remote_addr) and Zeek (ts)
+        # lines can only start with a digit or '.', so any other line is
+        # tried against the Linux pattern alone. Order matches the original
+        # nginx, linux, zeek precedence.
+        numeric_candidates = (
+            ("nginx", self.nginx_pattern),
+            ("linux", self.linux_header_pattern),
+            ("zeek", self.zeek_conn_pattern),
+        )
+        self.linux_candidates = (("linux", self.linux_header_pattern),)
+        self.text_log_dispatch = dict.fromkeys("0123456789.", numeric_candidates)
+        self.text_log_groups = {
+            "nginx": tuple(self.nginx_pattern.groupindex),
+            "linux": tuple(self.linux_header_pattern.groupindex),
+            "zeek": tuple(self.zeek_conn_pattern.groupindex),
+        }
+
+        # Optional SSH detection on Linux messages
+        self.ssh_pattern = re.compile(
+            r"(?P<ssh_action>Accepted|Failed)\s+(?:password|publickey)\s+for\s+(?:invalid\s+user\s+)?(?P<ssh_user>\S+)\s+from\s+(?P<ssh_ip>\S+)"
+        )
+
+        # "hostname" string field of a JSON (Windows) line, read without
+        # decoding the whole event
+        self.json_hostname_pattern = re.compile(r'"hostname"\s*:\s*"([^"\\]*)"')
+
     # ------------------ DB helpers ------------------
     def get_or_create_server(self, hostname, ip_address, server_type):
+        key = (hostname, ip_address, server_type)
+        server_id = self._server_cache.get(key)
+        if server_id is not None:
+            self._server_cache.move_to_end(key)
+            return server_id
+
         cur = self.conn.cursor()
         cur.execute("SELECT id FROM server WHERE hostname=? AND ip_address=? AND server_type=?", 
-                    (hostname, ip_address, server_type))
+                    key)
         row = cur.fetchone()
         if row:
-            return row[0]
-        cur.execute("INSERT INTO server (hostname, ip_address, server_type) VALUES (?, ?, ?)", 
-                    (hostname, ip_address, server_type))
-        self.conn.commit()
-        return cur.lastrowid
+            server_id = row[0]
+        else:
+            # Committed by the caller together with the batch
+            cur.execute("INSERT INTO server (hostname, ip_address, server_type) VALUES (?, ?, ?)", 
+                        key)
+            server_id = cur.lastrowid
+
+        self._server_cache[key] = server_id
+        if len(self._server_cache) > self.SERVER_CACHE_SIZE:
+            self._server_cache.popitem(last=False)
+        return server_id
+
+    def rollback(self):
+        self.conn.rollback()
+        self._server_cache.clear()
 
     def insert_log_entry(self, server_id, recv_time, log_source, content):
-        cur = self.conn.cursor()
-        cur.execute("INSERT INTO log_entry (server_id, recv_time, log_source, content) VALUES (?, ?, ?, ?)", 
-                    (server_id, recv_time, log_source, content))
+        log_entry_id = self.insert_log_entries([(server_id, recv_time, log_source, content)])[0]
         self.conn.commit()
-        log_entry_id = cur.lastrowid
-
-        # --- Sigma Rule Matching ---
-        log_entry = {
-            'id': log_entry_id,
-            'timestamp': recv_time,
-            'log_type': log_source,
-            'raw_line': content,
-            'hostname': None,
-            'ip_address': None
-        }
-        alerts = IroncladParser.sigma_engine.match_log(log_entry)
-        if alerts:
-            for alert in alerts:
-                cur.execute(
-                    """
-                    INSERT INTO alert (log_entry_id, server_id, rule_id, severity, title, description, alert_metadata, triggered_at, resolved)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        log_entry_id,
-                        server_id,
-                        alert.get('rule_id'),
-                        alert.get('severity'),
-                        alert.get('rule_title'),
-                        alert.get('rule_description'),
-                        json.dumps(alert),
-                        alert.get('timestamp'),
-                        0
-                    )
-                )
-            self.conn.commit()
         return log_entry_id
 
+    def insert_log_entries(self, entries):
+        """
+        Insert (server_id, recv_time, log_source, content) rows and their
+        Sigma alerts with one executemany per table. Does not commit.
+        """
+        if not entries:
+            return []
+        cur = self.conn.cursor()
+        cur.executemany("INSERT INTO log_entry (server_id, recv_time, log_source, content) VALUES (?, ?, ?, ?)", 
+                        entries)
+        # The open write transaction holds the lock, so the ids assigned
+        # above are one contiguous range ending at last_insert_rowid()
+        if cur.rowcount != len(entries):
+            raise sqlite3.DatabaseError(f"inserted {cur.rowcount} of {len(entries)} log entries")
+        cur.execute("SELECT last_insert_rowid()")
+        first_id = cur.fetchone()[0] - len(entries) + 1
+        log_entry_ids = list(range(first_id, first_id + len(entries)))
+
+        # --- Sigma Rule Matching (whole batch at once) ---
+        log_entries = [
+            {
+                'id': log_entry_id,
+                'timestamp': recv_time,
+                'log_type': log_source,
+                'raw_line': content,
+                'hostname': None,
+                'ip_address': None
+            }
+            for log_entry_id, (server_id, recv_time, log_source, content) in zip(log_entry_ids, entries)
+        ]
+        server_ids = dict(zip(log_entry_ids, (entry[0] for entry in entries)))
+        alert_rows = []
+        for alert in IroncladParser.sigma_engine.match_logs(log_entries):
+            alert_rows.append((
+                alert['log_id'],
+                server_ids[alert['log_id']],
+                alert.get('rule_id'),
+                alert.get('severity'),
+                alert.get('rule_title'),
+                alert.get('rule_description'),
+                fastjson.dumps(alert),
+                alert.get('timestamp'),
+                0
+            ))
+        if alert_rows:
+            cur.executemany(
+                """
+                INSERT INTO alert (log_entry_id, server_id, rule_id, severity, title, description, alert_metadata, triggered_at, resolved)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                alert_rows
+            )
+        return log_entry_ids
+
     # ------------------ Log Parsing ------------------
+    def match_text_log(self, raw_line):
+        """Return (kind, match) for a text log line, or (None, None)."""
+        if not raw_line:
+            return None, None
+        candidates = self.text_log_dispatch.get(raw_line[0])
+        if candidates is None:
+            # Other Unicode digits still satisfy \d in the nginx/Zeek patterns
+            candidates = self.linux_candidates if not raw_line[0].isdecimal() else self.text_log_dispatch["0"]
+        for kind, pattern in candidates:
+            match = pattern.match(raw_line)
+            if match:
+                return kind, match
+        return None, None
+
+    def json_hostname(self, raw_line):
+        """
+        Return the hostname of a JSON log line, decoding the full event only
+        when the targeted match fails (escaped or missing value). Raises
+        JSONDecodeError for lines that are not JSON at all.
+        """
+        match = self.json_hostname_pattern.search(raw_line)
+        if match and raw_line.endswith("}"):
+            return match.group(1)
+        return fastjson.loads(raw_line).get("hostname", "")
+
     @staticmethod
     def parse_windows_message_field(message_str):
         if not message_str:
@@ -159,6 +255,17 @@ class IroncladParser:
     def process_batch(self, batch_data):
         if not batch_data:
             return
+        # Everything below is one transaction: rows are collected while
+        # parsing and written with executemany, then committed once
+        try:
+            self._process_batch(batch_data)
+            self.conn.commit()
+        except Exception:
+            self.rollback()
+            raise
+
+    def _process_batch(self, batch_data):
+        entries = []
         text_logs = []
         for item in batch_data:
             raw_line = item.get("line", "").strip()
@@ -167,11 +274,10 @@ class IroncladParser:
             if raw_line.startswith("{"):
                 # JSON log (Windows)
                 try:
-                    parsed_obj = json.loads(raw_line)
-                    hostname = parsed_obj.get("hostname", "")
+                    hostname = self.json_hostname(raw_line)
                     log_source = "windows"
                     server_id = self.get_or_create_server(hostname, src_ip, log_source)
-                    self.insert_log_entry(server_id, recv_time, log_source, raw_line)
+                    entries.append((server_id, recv_time, log_source, raw_line))
                 except json.JSONDecodeError:
                     text_logs.append(item)
             else:
@@ -182,42 +288,42 @@ class IroncladParser:
             src_ip = item.get("src_ip", "")
             recv_time = item.get("recv_time", "")
 
+            kind, match = self.match_text_log(raw_line)
+            if not match:
+                continue
+            details = {name: match.group(name) for name in self.text_log_groups[kind]}
+
             # --- Nginx logs ---
-            nginx_match = re.match(self.nginx_pattern, raw_line)
-            if nginx_match:
-                details = nginx_match.groupdict()
+            if kind == "nginx":
                 hostname = src_ip
                 log_source = "nginx"
                 server_id = self.get_or_create_server(hostname, src_ip, log_source)
-                self.insert_log_entry(server_id, recv_time, log_source, raw_line)
+                entries.append((server_id, recv_time, log_source, raw_line))
                 continue
 
             # --- Linux logs ---
-            linux_match = re.match(self.linux_header_pattern, raw_line)
-            if linux_match:
-                details = linux_match.groupdict()
+            if kind == "linux":
                 details["raw_message"] = details.get("raw_message", "")
                 hostname = details.get("hostname", src_ip)
                 log_source = "linux"
                 server_id = self.get_or_create_server(hostname, src_ip, log_source)
-                self.insert_log_entry(server_id, recv_time, log_source, raw_line)
+                entries.append((server_id, recv_time, log_source, raw_line))
                 # Optional SSH detection
-                ssh_pattern = r"(?P<ssh_action>Accepted|Failed)\s+(?:password|publickey)\s+for\s+(?:invalid\s+user\s+)?(?P<ssh_user>\S+)\s+from\s+(?P<ssh_ip>\S+)"
-                ssh_match = re.search(ssh_pattern, details["raw_message"])
+                ssh_match = self.ssh_pattern.search(details["raw_message"])
                 if ssh_match:
                     details.update(ssh_match.groupdict())
                 continue
 
             # --- Zeek conn.log ---
-            zeek_match = re.match(self.zeek_conn_pattern, raw_line)
-            if zeek_match:
-                details = zeek_match.groupdict()
+            if kind == "zeek":
                 hostname = details.get("orig_h")
                 log_source = "zeek_conn"
                 server_id = self.get_or_create_server(hostname, details.get("orig_h"), log_source)
-                self.insert_log_entry(server_id, recv_time, log_source, json.dumps(details))
+                entries.append((server_id, recv_time, log_source, fastjson.dumps(details)))
                 continue
 
+        self.insert_log_entries(entries)
+
 # ------------------ FastAPI & CORS ------------------
 app = FastAPI()
 app.add_middleware(
@@ -229,60 +335,66 @@ app.add_middleware(
 )
 
 # ------------------ File Ingestion ------------------
+# Files are read lazily: FILE_CHUNK_LINES lines go through process_batch's
+# parse/insert path at a time, committed every FILE_COMMIT_LINES lines
+FILE_CHUNK_LINES = 1000
+FILE_COMMIT_LINES = 10000
+
+def iter_file_items(file_path, recv_time, skip_comments=False, json_lines=False):
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line or (skip_comments and line.startswith("#")):
+                continue
+            if json_lines:
+                # Validate only; the original line is what gets stored
+                try:
+                    fastjson.loads(line)
+                except Exception as e:
+                    print(f"[WARN] Could not parse JSON line: {e}")
+                    continue
+            yield {
+                'recv_time': recv_time,
+                'src_ip': 'file_upload',
+                'line': line
+            }
+
+def ingest_items(parser, items):
+    count = 0
+    try:
+        while True:
+            chunk = list(islice(items, FILE_CHUNK_LINES))
+            if not chunk:
+                break
+            parser._process_batch(chunk)
+            count += len(chunk)
+            if count % FILE_COMMIT_LINES == 0:
+                parser.conn.commit()
+        parser.conn.commit()
+    except Exception:
+        parser.rollback()
+        raise
+    return count
+
 def parse_and_ingest_file(file_path, log_source, hostname=None, ip_address=None):
     parser = IroncladParser()
-    batch = []
     now = datetime.datetime.now().isoformat()
     ext = os.path.splitext(file_path)[1].lower()
 
     # Windows JSON logs
     if log_source == "windows" and ext == ".json":
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    event = json.loads(line)
-                    batch.append({
-                        'recv_time': now,
-                        'src_ip': 'file_upload',
-                        'line': json.dumps(event)
-                    })
-                except Exception as e:
-                    print(f"[WARN] Could not parse JSON line: {e}")
-        parser.process_batch(batch)
-        return {"status": "success", "message": f"Ingested {len(batch)} windows log events from {file_path}"}
+        count = ingest_items(parser, iter_file_items(file_path, now, json_lines=True))
+        return {"status": "success", "message": f"Ingested {count} windows log events from {file_path}"}
 
     # Linux / Nginx logs
     elif log_source in ["linux", "nginx"] and ext in [".log", ".csv"]:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                batch.append({
-                    'recv_time': now,
-                    'src_ip': 'file_upload',
-                    'line': line
-                })
-        parser.process_batch(batch)
-        return {"status": "success", "message": f"Ingested {len(batch)} {log_source} log lines from {file_path}"}
+        count = ingest_items(parser, iter_file_items(file_path, now))
+        return {"status": "success", "message": f"Ingested {count} {log_source} log lines from {file_path}"}
 
     # Zeek conn.log
     elif log_source == "zeek_conn" and ext in [".log", ".conn", ".txt"]:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                batch.append({
-                    'recv_time': now,
-                    'src_ip': 'file_upload',
-                    'line': line
-                })
-        parser.process_batch(batch)
-        return {"status": "success", "message": f"Ingested {len(batch)} Zeek conn.log events"}
+        count = ingest_items(parser, iter_file_items(file_path, now, skip_comments=True))
+        return {"status": "success", "message": f"Ingested {count} Zeek conn.log events"}
 
     else:
         return {"status": "error", "message": f"Unsupported file type or log_source: {ext}, {log_source}"}
@@ -299,7 +411,3 @@ async def ingest_logs(
         f.write(await file.read())
     result = parse_and_ingest_file(file_location, log_source)
     return result
-
-
-
-with new parser for conn.log
\ No newline at end of file
@@ -6,12 +6,35 @@ Supports combined log format and custom formats.
 """
 
 import re
-import datetime
-import os
-from typing import Dict, List, Any, Optional
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 import polars as pl
-from src.base.base_parser import BaseParser
+from src.base.base_parser import BaseParser, BATCH_MIN_ROWS, ROW_INDEX
+
+# Nginx combined log format pattern (with optional referer and user-agent)
+ACCESS_PATTERN = (
+    r"(?P<remote_addr>[\d\.]+)\s+"
+    r"-\s+(?P<remote_user>\S+)\s+"
+    r"\[(?P<time_local>.*?)\]\s+"
+    r'"(?P<request_method>\S+)\s+'
+    r'(?P<request_uri>\S+)\s+'
+    r'(?P<server_protocol>[^"]+)"\s+'
+    r'(?P<status>\d+)\s+'
+    r'(?P<body_bytes_sent>\d+)'
+    r'(?:\s+"(?P<http_referer>[^"]*)"\s+"(?P<http_user_agent>[^"]*)")?'
+)
+# Values enrich() assigns to status_category; the batch column is an Enum of these
+STATUS_CATEGORIES = ["success", "redirect", "client_error", "server_error", "unknown"]
+
+ACCESS_FIELDS = [
+    "remote_addr", "remote_user", "time_local", "request_method", "request_uri",
+    "server_protocol", "status", "body_bytes_sent", "http_referer", "http_user_agent"
+]
+
+# Distinct time_local values whose converted timestamp enrich() remembers;
+# a burst of access log lines shares a handful of seconds
+TIMESTAMP_CACHE_SIZE = 1024
 
 
 class NginxParser(BaseParser):
@@ -35,18 +58,11 @@ class NginxParser(BaseParser):
         # Ensure output directory exists
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Nginx combined log format pattern (with optional referer and user-agent)
-        self.access_pattern = re.compile(
-            r"(?P<remote_addr>[\d\.]+)\s+"
-            r"-\s+(?P<remote_user>\S+)\s+"
-            r"\[(?P<time_local>.*?)\]\s+"
-            r'"(?P<request_method>\S+)\s+'
-            r'(?P<request_uri>\S+)\s+'
-            r'(?P<server_protocol>[^"]+)"\s+'
-            r'(?P<status>\d+)\s+'
-            r'(?P<body_bytes_sent>\d+)'
-            r'(?:\s+"(?P<http_referer>[^"]*)"\s+"(?P<http_user_agent>[^"]*)")?'
-        )
+        # Nginx combined log format pattern
+        self.access_pattern = re.compile(ACCESS_PATTERN)
+        
+        # time_local -> "%Y-%m-%d %H:%M:%S" (None when it does not parse)
+        self._timestamps: Dict[str, Optional[str]] = {}
     
     def get_log_type(self) -> str:
         """Return log type identifier."""
@@ -60,13 +76,15 @@ class NginxParser(BaseParser):
             raw_log: Raw log line
             
         Returns:
-            True if log matches Nginx pattern (starts with IP address and has bracketed timestamp)
+            True if log looks like an Nginx line (starts with a digit and has
+            a bracketed timestamp and a quoted request)
         """
         raw_log = raw_log.strip()
         
         # Nginx access logs: IP - user [timestamp] "request" status size
-        # Check for IP at start and bracketed timestamp
-        return (re.match(r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\s+", raw_log) is not None 
+        # Plain substring checks only; parse() runs the one regex and is the
+        # real "did it match" test
+        return (raw_log[:1].isdigit()
                 and "[" in raw_log and "]" in raw_log and '"' in raw_log)
     
     def parse(self, raw_log: str, metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
@@ -80,7 +98,13 @@ class NginxParser(BaseParser):
         Returns:
             Parsed dictionary or None if parsing fails
         """
-        match = self.access_pattern.match(raw_log.strip())
+        raw_log = raw_log.strip()
+        
+        # Skip the regex for lines that cannot be access log entries
+        if not self.can_parse(raw_log):
+            return None
+        
+        match = self.access_pattern.match(raw_log)
         
         if not match:
             return None
@@ -104,34 +128,62 @@ class NginxParser(BaseParser):
         """
         Parse a batch of Nginx logs into a DataFrame.
         
+        The access log regex runs inside Polars (a linear-time engine) over
+        the whole line column instead of once per line in Python; the same
+        prefilter as can_parse and the same conversions as parse are applied
+        as column expressions, and normalize does the enrichment.
+        
         Args:
             logs: List of log dictionaries with 'line', 'src_ip', 'recv_time'
             
         Returns:
             Polars DataFrame with parsed data, or None if no logs match
         """
-        parsed_logs = []
+        df = self._parse_frame(logs)
+        return None if df is None else df.drop(ROW_INDEX)
+    
+    def parse_many(self, logs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Vectorized parse_many for lists of at least BATCH_MIN_ROWS logs."""
+        if len(logs) < BATCH_MIN_ROWS:
+            return super().parse_many(logs)
+        return self._rows_from_frame(self._parse_frame(logs), len(logs))
+    
+    def _parse_frame(self, logs: List[Dict[str, Any]]) -> Optional[pl.DataFrame]:
+        """parse_batch, keeping each row's input position in ROW_INDEX."""
+        if not logs:
+            return None
         
-        for log in logs:
-            raw_line = log.get("line", "").strip()
-            
-            if not self.can_parse(raw_line):
-                continue
-            
-            metadata = {
-                "src_ip": log.get("src_ip", ""),
-                "recv_time": log.get("recv_time", "")
-            }
-            
-            parsed = self.parse(raw_line, metadata)
-            if parsed:
-                parsed_logs.append(parsed)
+        df = pl.DataFrame(
+            {
+                "line": [log.get("line", "") for log in logs],
+                "src_ip": [log.get("src_ip", "") for log in logs],
+                "recv_time": [log.get("recv_time", "") for log in logs]
+            },
+            schema={"line": pl.String, "src_ip": pl.String, "recv_time": pl.String}
+        ).with_row_index(ROW_INDEX)
         
-        if not parsed_logs:
-            return None
+        line = pl.col("line").str.strip_chars()
+        df = (
+            df.with_columns(line)
+            # Same substring prefilter as can_parse
+            .filter(
+                pl.col("line").str.contains(r"^[0-9]")
+                & pl.col("line").str.contains("[", literal=True)
+                & pl.col("line").str.contains("]", literal=True)
+                & pl.col("line").str.contains('"', literal=True)
+            )
+            .with_columns(pl.col("line").str.extract_groups(f"^(?:{ACCESS_PATTERN})").alias("access"))
+            .unnest("access")
+            .drop_nulls("remote_addr")
+            .with_columns(
+                pl.col("status").cast(pl.Int64, strict=False),
+                pl.col("body_bytes_sent").cast(pl.Int64, strict=False)
+            )
+            .select(ACCESS_FIELDS + ["src_ip", "recv_time", ROW_INDEX])
+        )
         
-        # Create DataFrame
-        df = pl.DataFrame(parsed_logs)
+        if df.is_empty():
+            return None
         
         # Apply normalization
         df = self.normalize(df)
@@ -158,13 +210,9 @@ class NginxParser(BaseParser):
         # Parse timestamp from time_local (06/Dec/2025:04:17:07 +0000)
         time_local = parsed_data.get("time_local")
         if time_local:
-            try:
-                from datetime import datetime
-                # Parse nginx timestamp format
-                dt = datetime.strptime(time_local.split()[0], "%d/%b/%Y:%H:%M:%S")
-                parsed_data["timestamp"] = dt.strftime("%Y-%m-%d %H:%M:%S")
-            except (ValueError, IndexError):
-                pass
+            timestamp = self._timestamp(time_local)
+            if timestamp is not None:
+                parsed_data["timestamp"] = timestamp
         
         # Add hostname from remote_addr if not provided
         if "hostname" not in parsed_data:
@@ -186,38 +234,78 @@ class NginxParser(BaseParser):
         
         return parsed_data
     
+    def _timestamp(self, time_local: str) -> Optional[str]:
+        """time_local as "%Y-%m-%d %H:%M:%S", or None; strptime runs once per value."""
+        try:
+            return self._timestamps[time_local]
+        except KeyError:
+            pass
+        
+        try:
+            # Parse nginx timestamp format
+            dt = datetime.strptime(time_local.split()[0], "%d/%b/%Y:%H:%M:%S")
+            timestamp = dt.strftime("%Y-%m-%d %H:%M:%S")
+        except (ValueError, IndexError):
+            timestamp = None
+        
+        if len(self._timestamps) >= TIMESTAMP_CACHE_SIZE:
+            self._timestamps.clear()
+        self._timestamps[time_local] = timestamp
+        return timestamp
+    
     def normalize(self, df: pl.DataFrame) -> pl.DataFrame:
         """
         Apply normalization to Nginx fields.
         
+        Adds the same timestamp, hostname and status_category columns that
+        enrich() sets per row, as one set of column expressions.
+        
         Args:
             df: Polars DataFrame with raw Nginx fields
             
         Returns:
             Normalized DataFrame
         """
-        # Add any Nginx-specific normalizations here
-        # For now, pass through as Nginx field names are already clear
-        return df
+        status = pl.col("status")
+        hostname = pl.col("remote_addr")
+        if "hostname" in df.columns:
+            hostname = pl.coalesce("hostname", "remote_addr")
+        
+        return df.with_columns(
+            # strptime's %Y wants exactly four digits, chrono's does not
+            pl.col("time_local").str.extract(r"^\s*(\d{1,2}/[A-Za-z]{3}/\d{4}:\d{1,2}:\d{1,2}:\d{1,2})(?:\s|$)")
+            .str.strptime(pl.Datetime, "%d/%b/%Y:%H:%M:%S", strict=False)
+            .dt.strftime("%Y-%m-%d %H:%M:%S")
+            .alias("timestamp"),
+            hostname.alias("hostname"),
+            pl.when(status.is_null() | (status == 0)).then(None)
+            .when(status.is_between(200, 299)).then(pl.lit("success"))
+            .when(status.is_between(300, 399)).then(pl.lit("redirect"))
+            .when(status.is_between(400, 499)).then(pl.lit("client_error"))
+            .when(status.is_between(500, 599)).then(pl.lit("server_error"))
+            .otherwise(pl.lit("unknown"))
+            .cast(pl.Enum(STATUS_CATEGORIES))
+            .alias("status_category")
+        )
     
-    def write_to_file(self, df: pl.DataFrame, format: str = "csv") -> str:
+    def write_to_file(self, df: Union[pl.DataFrame, pl.LazyFrame], format: str = "csv") -> str:
         """Write parsed Nginx logs to file.
         
         Args:
-            df: Polars DataFrame with parsed logs
-            format: Output format ('csv' or 'json')
+            df: Polars DataFrame with parsed logs, or a LazyFrame to stream
+            format: Output format ('csv', 'json' or 'feather')
             
         Returns:
             Path to the written file
         """
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        
         if format == "json":
-            filename = os.path.join(self.output_dir, f"batch_{timestamp}.json")
-            df.write_ndjson(filename)
+            filename = self._batch_filename("json")
+        elif format == "feather":
+            filename = self._batch_filename("feather")
         else:  # csv
-            filename = os.path.join(self.output_dir, f"batch_{timestamp}.csv")
-            df.write_csv(filename)
+            filename = self._batch_filename("csv")
+        
+        rows = self._write_frame(df, filename, format)
         
-        print(f"[NginxParser] Wrote {len(df)} records to {filename}")
+        print(f"[NginxParser] Wrote {'all' if rows is None else rows} records to {filename}")
         return filename
@@ -4,6 +4,7 @@ Parser Manager
 Manages multiple parsers and auto-detects the correct one for each log.
 """
 
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 from src.base.base_parser import BaseParser
 from src.parsers.windows_parser import WindowsParser
@@ -16,9 +17,14 @@ class ParserManager:
     """
     Manages parser registry and auto-detection.
 
-    Tries parsers in order until one matches.
+    Tries parsers in order until one matches. The parser that last matched
+    a source IP is tried first for that source's next line, since a source
+    nearly always sends a single log format.
     """
 
+    # Source IPs whose last matching parser is remembered
+    PARSER_CACHE_SIZE = 4096
+
     def __init__(self, output_dir: str = "./collected_logs/processed"):
         """
         Initialize parser manager with default parsers.
@@ -36,6 +42,9 @@ class ParserManager:
             LinuxParser(output_dir=f"{output_dir}/linux")  # Default fallback
         ]
 
+        # src_ip -> parser that last matched it, least recently used first
+        self._parser_cache: "OrderedDict[str, BaseParser]" = OrderedDict()
+
         print(f"[ParserManager] Registered {len(self.parsers)} parsers: "
               f"{', '.join(p.get_log_type() for p in self.parsers)}")
 
@@ -54,26 +63,118 @@ class ParserManager:
         if not raw_line:
             return None
 
-        # Try each parser
+        src_ip = raw_data.get("src_ip")
+        metadata = {
+            "recv_time": raw_data.get("recv_time"),
+            "src_ip": src_ip
+        }
+
+        # Parser that handled this source last time
+        cached = self._parser_cache.get(src_ip)
+        if cached is not None:
+            self._parser_cache.move_to_end(src_ip)
+            parsed = cached.try_parse(raw_line, metadata)
+            if parsed:
+                return self._finish(parsed, cached, raw_line)
+
+        # Try each parser; try_parse detects and parses in a single pass
         for parser in self.parsers:
-            if parser.can_parse(raw_line):
-                metadata = {
-                    "recv_time": raw_data.get("recv_time"),
-                    "src_ip": raw_data.get("src_ip")
-                }
+            if parser is cached:
+                continue
 
-                parsed = parser.parse(raw_line, metadata)
+            parsed = parser.try_parse(raw_line, metadata)
 
-                if parsed:
-                    # Add log type and raw line
-                    parsed["log_type"] = parser.get_log_type()
-                    parsed["raw_line"] = raw_line
-                    return parsed
+            if parsed:
+                self._parser_cache[src_ip] = parser
+                if len(self._parser_cache) > self.PARSER_CACHE_SIZE:
+                    self._parser_cache.popitem(last=False)
+                return self._finish(parsed, parser, raw_line)
 
         # No parser matched
         print(f"[ParserManager] No parser matched: {raw_line[:80]}...")
         return None
 
+    def parse_as(self, raw_data: Dict[str, Any], log_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse a log whose type is already known, e.g. one stored at ingest.
+
+        The parser registered for log_type is tried directly, skipping
+        detection; if it rejects the line, parse() auto-detects as usual.
+
+        Args:
+            raw_data: {recv_time, src_ip, line}
+            log_type: Expected log type ('linux', 'windows', ...)
+
+        Returns:
+            Parsed dict with 'log_type' field or None
+        """
+        raw_line = raw_data.get("line", "")
+        parser = self.get_parser_by_type(log_type)
+
+        if raw_line and parser is not None:
+            metadata = {
+                "recv_time": raw_data.get("recv_time"),
+                "src_ip": raw_data.get("src_ip")
+            }
+            parsed = parser.try_parse(raw_line, metadata)
+            if parsed:
+                return self._finish(parsed, parser, raw_line)
+
+        return self.parse(raw_data)
+
+    def parse_many(self, raw_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Parse a list of logs with one parse_many call per parser.
+
+        Parsers are visited in priority order. Each takes the remaining logs
+        its cheap can_parse check accepts and parses them in one call, and
+        whatever it rejects moves on to the next parser, so every log ends
+        up with the same parser parse() would pick.
+
+        Args:
+            raw_data_list: List of {recv_time, src_ip, line}
+
+        Returns:
+            Parsed dicts (with 'log_type' and 'raw_line') for the logs that
+            parsed, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(raw_data_list)
+        remaining = [i for i, raw_data in enumerate(raw_data_list) if raw_data.get("line")]
+
+        for parser in self.parsers:
+            if not remaining:
+                break
+
+            mine, rest = [], []
+            for i in remaining:
+                if parser.can_parse(raw_data_list[i]["line"]):
+                    mine.append(i)
+                else:
+                    rest.append(i)
+
+            if mine:
+                parsed_logs = parser.parse_many([raw_data_list[i] for i in mine])
+                for i, parsed in zip(mine, parsed_logs):
+                    if parsed:
+                        results[i] = self._finish(parsed, parser, raw_data_list[i]["line"])
+                    else:
+                        rest.append(i)
+
+            remaining = rest
+
+        # No parser matched
+        for i in remaining:
+            print(f"[ParserManager] No parser matched: {raw_data_list[i]['line'][:80]}...")
+
+        return [parsed for parsed in results if parsed]
+
+    @staticmethod
+    def _finish(parsed: Dict[str, Any], parser: BaseParser, raw_line: str) -> Dict[str, Any]:
+        """Add log type and raw line to a parser's result."""
+        parsed["log_type"] = parser.get_log_type()
+        parsed["raw_line"] = raw_line
+        return parsed
+
     def get_parser_by_type(self, log_type: str) -> Optional[BaseParser]:
         """Get parser by log type name."""
         for parser in self.parsers:
@@ -94,6 +195,9 @@ class ParserManager:
         else:
             self.parsers.append(parser)
 
+        # Priorities changed; let every source be detected again
+        self._parser_cache.clear()
+
         print(f"[ParserManager] Registered {parser.get_log_type()} parser")
 
     def list_parsers(self) -> List[str]:
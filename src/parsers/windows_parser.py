@@ -5,14 +5,19 @@ Handles parsing of Windows Event Log JSON format with dynamic schema support.
 Includes Sigma normalization for security-focused field standardization.
 """
 
-import json
 import re
-import datetime
-import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 import polars as pl
-from src.base.base_parser import BaseParser
+from src.base.base_parser import BaseParser, ROW_INDEX
+from src.utils import fastjson
+
+# Below this many rows parsing messages row by row is faster than the
+# column-wise pass (exploding lines and pivoting has a fixed cost)
+MESSAGE_BATCH_MIN_ROWS = 1000
+
+# Suffix for message keys that clash with an existing column while merging
+MESSAGE_SUFFIX = "__message"
 
 
 class WindowsParser(BaseParser):
@@ -45,6 +50,7 @@ class WindowsParser(BaseParser):
             "CallerProcessName": "process_name",
             "SubjectUserName": "subject_user",
         }
+        self._sigma_keys = frozenset(self.sigma_field_mapping)
         self.output_dir = output_dir
         # Ensure output directory exists
         Path(output_dir).mkdir(parents=True, exist_ok=True)
@@ -61,17 +67,10 @@ class WindowsParser(BaseParser):
             raw_log: Raw log line
             
         Returns:
-            True if line starts with '{' and is valid JSON
+            True if line starts with '{'; parse() does the one JSON decode
+            and returns None for invalid JSON
         """
-        raw_log = raw_log.strip()
-        if not raw_log.startswith("{"):
-            return False
-        
-        try:
-            json.loads(raw_log)
-            return True
-        except json.JSONDecodeError:
-            return False
+        return raw_log.lstrip().startswith("{")
     
     def parse(self, raw_log: str, metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
@@ -84,28 +83,49 @@ class WindowsParser(BaseParser):
         Returns:
             Parsed dictionary or None if parsing fails
         """
+        parsed = self._decode(raw_log, metadata)
+        if parsed is None:
+            return None
+        
+        return self.enrich(self._expand_message(parsed))
+    
+    def _expand_message(self, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse nested message field if present."""
+        if "message" in parsed and isinstance(parsed["message"], str):
+            message_data = self._parse_message_field(parsed["message"])
+            parsed.update(message_data)
+        return parsed
+    
+    @staticmethod
+    def _decode(raw_log: Union[str, bytes], metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Decode the JSON line and add metadata; no message field parsing.
+        
+        Both JSON backends skip surrounding whitespace, so the line is not
+        stripped first, and bytes are decoded without a separate UTF-8 step.
+        """
         try:
-            parsed = json.loads(raw_log.strip())
-            
-            # Add metadata if provided
-            if metadata:
-                parsed.update(metadata)
-            
-            # Parse nested message field if present
-            if "message" in parsed and isinstance(parsed["message"], str):
-                message_data = self._parse_message_field(parsed["message"])
-                parsed.update(message_data)
-            
-            return self.enrich(parsed)
-            
-        except json.JSONDecodeError as e:
+            parsed = fastjson.loads(raw_log)
+        except ValueError as e:
+            # JSONDecodeError (stdlib and orjson) or invalid UTF-8 in bytes
             print(f"JSON decode error: {e}")
             return None
+        
+        # Add metadata if provided
+        if metadata:
+            parsed.update(metadata)
+        
+        return parsed
     
     def parse_batch(self, logs: List[Dict[str, Any]]) -> Optional[pl.DataFrame]:
         """
         Parse a batch of Windows logs into a DataFrame.
         
+        JSON is decoded per row, but from MESSAGE_BATCH_MIN_ROWS rows on the
+        multi-line 'message' fields are split into key/value columns for
+        the whole batch at once (see _message_fields) rather than line by
+        line in Python.
+        
         Args:
             logs: List of log dictionaries with 'line', 'src_ip', 'recv_time'
             
@@ -114,10 +134,16 @@ class WindowsParser(BaseParser):
         """
         parsed_logs = []
         
+        # Bound methods hoisted out of the per-row loop
+        can_parse = self.can_parse
+        decode = self._decode
+        enrich = self.enrich
+        append = parsed_logs.append
+        
         for log in logs:
-            raw_line = log.get("line", "").strip()
+            raw_line = log.get("line", "")
             
-            if not self.can_parse(raw_line):
+            if not can_parse(raw_line):
                 continue
             
             metadata = {
@@ -125,21 +151,108 @@ class WindowsParser(BaseParser):
                 "recv_time": log.get("recv_time", "")
             }
             
-            parsed = self.parse(raw_line, metadata)
+            parsed = decode(raw_line, metadata)
             if parsed:
-                parsed_logs.append(parsed)
+                append(enrich(parsed))
         
         if not parsed_logs:
             return None
         
-        # Create DataFrame with dynamic schema
-        df = pl.DataFrame(parsed_logs)
+        # Column-wise message parsing only pays off on larger batches, and
+        # needs 'message' to be a string column
+        vectorize = (
+            len(parsed_logs) >= MESSAGE_BATCH_MIN_ROWS
+            and all(isinstance(p.get("message", ""), (str, type(None))) for p in parsed_logs)
+        )
+        if not vectorize:
+            parsed_logs = [self._expand_message(p) for p in parsed_logs]
+        
+        # Create DataFrame with dynamic schema; infer from every row so keys
+        # that first appear after Polars' default 100 rows are not dropped
+        df = pl.DataFrame(parsed_logs, infer_schema_length=None)
+        
+        if vectorize and "message" in df.columns:
+            df = self._add_message_fields(df)
         
         # Apply normalization
         df = self.normalize(df)
         
         return df
     
+    def _add_message_fields(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Add the _parse_message_field keys of every row's message as columns.
+        
+        Like dict.update in parse(), a message key replaces a column of the
+        same name wherever that row's message has it.
+        """
+        fields = self._message_fields(df.select(pl.col("message")).with_row_index(ROW_INDEX))
+        if fields.width == 1:
+            return df
+        
+        df = df.with_row_index(ROW_INDEX)
+        clashes = [name for name in fields.columns if name != ROW_INDEX and name in df.columns]
+        fields = fields.rename({name: f"{name}{MESSAGE_SUFFIX}" for name in clashes})
+        
+        df = df.join(fields, on=ROW_INDEX, how="left", maintain_order="left")
+        if clashes:
+            df = df.with_columns(
+                pl.coalesce(pl.col(f"{name}{MESSAGE_SUFFIX}"), pl.col(name).cast(pl.String)).alias(name)
+                for name in clashes
+            ).drop(f"{name}{MESSAGE_SUFFIX}" for name in clashes)
+        
+        return df.drop(ROW_INDEX)
+    
+    @staticmethod
+    def _message_fields(messages: pl.DataFrame) -> pl.DataFrame:
+        """
+        Column-wise _parse_message_field.
+        
+        Args:
+            messages: Frame with ROW_INDEX and a String 'message' column
+            
+        Returns:
+            One row per ROW_INDEX that had fields, one column per key
+        """
+        key = pl.col("key").str.replace_all(" ", "_", literal=True)
+        section = pl.col("section")
+        
+        pairs = (
+            messages
+            .select(
+                ROW_INDEX,
+                pl.col("message").str.replace_all("\r", "", literal=True).str.split("\n").alias("line")
+            )
+            .explode("line")
+            .with_columns(pl.col("line").str.strip_chars())
+            .filter(pl.col("line").str.contains(":", literal=True))
+            # Split on first colon only
+            .with_columns(pl.col("line").str.splitn(":", 2).struct.rename_fields(["key", "value"]).alias("pair"))
+            .unnest("pair")
+            .with_columns(pl.col("key").str.strip_chars(), pl.col("value").str.strip_chars())
+            # A key with no value is a section header (e.g., "Subject:")
+            .with_columns(
+                pl.when(pl.col("value") == "")
+                .then(pl.col("key").str.replace_all(" ", "", literal=True))
+                .forward_fill()
+                .over(ROW_INDEX)
+                .fill_null("")
+                .alias("section")
+            )
+            .filter(pl.col("value") != "")
+            .select(
+                ROW_INDEX,
+                pl.when(section == "").then(key).otherwise(section + "_" + key).alias("key"),
+                "value"
+            )
+        )
+        
+        if pairs.is_empty():
+            return messages.select(ROW_INDEX).clear()
+        
+        # Later lines win, as with repeated dict assignment
+        return pairs.pivot(on="key", index=ROW_INDEX, values="value", aggregate_function="last")
+    
     def enrich(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Enrich parsed Windows log data.
@@ -173,42 +286,39 @@ class WindowsParser(BaseParser):
         existing_cols = set(df.columns)
         
         # Only rename fields that exist in the DataFrame AND don't conflict with existing columns
-        valid_renames = {}
-        for old_name, new_name in self.sigma_field_mapping.items():
-            if old_name in existing_cols and new_name not in existing_cols:
-                valid_renames[old_name] = new_name
-        
-        if valid_renames:
-            df = df.rename(valid_renames)
-        
-        # Cleanup: Extract process name from full path
-        if "parent" in df.columns:
-            df = df.with_columns(
-                pl.col("parent")
-                .str.split("\\")
-                .list.last()
-                .alias("parent_name")
-            )
+        if not self._sigma_keys.isdisjoint(existing_cols):
+            valid_renames = {}
+            for old_name, new_name in self.sigma_field_mapping.items():
+                if old_name in existing_cols and new_name not in existing_cols:
+                    valid_renames[old_name] = new_name
+            
+            if valid_renames:
+                df = df.rename(valid_renames)
+                existing_cols = set(df.columns)
         
-        if "name" in df.columns:
-            df = df.with_columns(
-                pl.col("name")
-                .str.split("\\")
-                .list.last()
-                .alias("process_name")
-            )
+        # Cleanup: Extract process name from full path, all in one pass
+        basenames = []
+        if "parent" in existing_cols:
+            basenames.append(self._basename("parent").alias("parent_name"))
         
-        if "process_name" in df.columns and "process_name" != "name":
+        if "name" in existing_cols:
+            basenames.append(self._basename("name").alias("process_name"))
+            # process_name was just derived from name; its basename is the same
+            basenames.append(self._basename("name").alias("process_basename"))
+        elif "process_name" in existing_cols:
             # Also extract basename from process_name field if it exists
-            df = df.with_columns(
-                pl.col("process_name")
-                .str.split("\\")
-                .list.last()
-                .alias("process_basename")
-            )
+            basenames.append(self._basename("process_name").alias("process_basename"))
+        
+        if basenames:
+            df = df.with_columns(basenames)
         
         return df
     
+    @staticmethod
+    def _basename(column: str) -> pl.Expr:
+        """Last component of a Windows path column."""
+        return pl.col(column).str.split("\\").list.last()
+    
     @staticmethod
     def _parse_message_field(message_str: str) -> Dict[str, Any]:
         """
@@ -268,24 +378,24 @@ class WindowsParser(BaseParser):
         
         return extracted_data
     
-    def write_to_file(self, df: pl.DataFrame, format: str = "json") -> str:
+    def write_to_file(self, df: Union[pl.DataFrame, pl.LazyFrame], format: str = "json") -> str:
         """Write parsed Windows logs to file.
         
         Args:
-            df: Polars DataFrame with parsed logs
-            format: Output format ('json' or 'csv')
+            df: Polars DataFrame with parsed logs, or a LazyFrame to stream
+            format: Output format ('json', 'csv' or 'feather')
             
         Returns:
             Path to the written file
         """
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        
         if format == "json":
-            filename = os.path.join(self.output_dir, f"batch_{timestamp}.json")
-            df.write_ndjson(filename)
+            filename = self._batch_filename("json")
+        elif format == "feather":
+            filename = self._batch_filename("feather")
         else:  # csv
-            filename = os.path.join(self.output_dir, f"batch_{timestamp}.csv")
-            df.write_csv(filename)
+            filename = self._batch_filename("csv")
+        
+        rows = self._write_frame(df, filename, format)
         
-        print(f"[WindowsParser] Wrote {len(df)} records to {filename}")
+        print(f"[WindowsParser] Wrote {'all' if rows is None else rows} records to {filename}")
         return filename
@@ -5,13 +5,40 @@ Parses Zeek conn.log lines into structured fields based on schema.
 Integrates with BaseParser used by IngestionWorker's ParserManager.
 """
 
-import re
+import io
+import math
+import sys
+import time
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 import polars as pl
-from datetime import datetime
 
-from src.base.base_parser import BaseParser
+from src.base.base_parser import BaseParser, BATCH_MIN_ROWS, ROW_INDEX
+
+# conn.log columns in order; lines are whitespace separated
+FIELD_NAMES = (
+    "ts", "uid", "orig_h", "orig_p", "resp_h", "resp_p", "proto", "service",
+    "duration", "orig_bytes", "resp_bytes", "conn_state", "local_orig",
+    "missed_bytes", "history", "orig_pkts", "orig_ip_bytes", "resp_pkts",
+    "resp_ip_bytes",
+)
+MIN_FIELDS = len(FIELD_NAMES)
+
+# Columns that must be plain digits for the line to count as conn.log
+DIGIT_FIELDS = ("orig_p", "resp_p", "missed_bytes", "orig_pkts", "orig_ip_bytes", "resp_pkts", "resp_ip_bytes")
+DIGIT_FIELD_INDEXES = tuple(FIELD_NAMES.index(name) for name in DIGIT_FIELDS)
+
+# Byte counters that are '-' when Zeek did not see the payload
+BYTE_FIELDS = ("orig_bytes", "resp_bytes")
+
+# Last second datetime can represent (9999-12-31 23:59:59 UTC)
+MAX_EPOCH_SECOND = 253402300799
+
+# Low-cardinality text columns: interned per row, Categorical in batches
+REPEATED_FIELDS = ("proto", "service", "conn_state", "local_orig", "history")
+
+# Optional trailing column; accepted but not kept
+CSV_COLUMNS = FIELD_NAMES + ("tunnel_parents",)
 
 
 class ZeekConnParser(BaseParser):
@@ -21,57 +48,68 @@ class ZeekConnParser(BaseParser):
         self.output_dir = output_dir
         Path(output_dir).mkdir(parents=True, exist_ok=True)
 
-        self.conn_pattern = re.compile(
-            r"(?P<ts>\d+\.\d+)\s+"
-            r"(?P<uid>\S+)\s+"
-            r"(?P<orig_h>\S+)\s+"
-            r"(?P<orig_p>\d+)\s+"
-            r"(?P<resp_h>\S+)\s+"
-            r"(?P<resp_p>\d+)\s+"
-            r"(?P<proto>\S+)\s+"
-            r"(?P<service>\S+)\s+"
-            r"(?P<duration>\S+)\s+"
-            r"(?P<orig_bytes>\S+)\s+"
-            r"(?P<resp_bytes>\S+)\s+"
-            r"(?P<conn_state>\S+)\s+"
-            r"(?P<local_orig>\S+)\s+"
-            r"(?P<missed_bytes>\d+)\s+"
-            r"(?P<history>\S+)\s+"
-            r"(?P<orig_pkts>\d+)\s+"
-            r"(?P<orig_ip_bytes>\d+)\s+"
-            r"(?P<resp_pkts>\d+)\s+"
-            r"(?P<resp_ip_bytes>\d+)(?:\s+\(empty\)|\s+\S+)?$"
-        )
+        # Last formatted second; conn.log lines arrive roughly in time order
+        self._ts_second: Optional[int] = None
+        self._ts_text: Optional[str] = None
 
     def get_log_type(self) -> str:
         return "zeek_conn"
 
+    @staticmethod
+    def _split_fields(raw_log: str) -> Optional[Dict[str, Any]]:
+        """Split a conn.log line on whitespace and validate the numeric columns."""
+        fields = raw_log.split()
+        # 19 columns plus at most one trailing column (tunnel_parents)
+        if not MIN_FIELDS <= len(fields) <= MIN_FIELDS + 1:
+            return None
+
+        whole, dot, frac = fields[0].partition(".")
+        if not (dot and whole.isdecimal() and frac.isdecimal()):
+            return None
+        for i in DIGIT_FIELD_INDEXES:
+            if not fields[i].isdecimal():
+                return None
+
+        return dict(zip(FIELD_NAMES, fields))
+
+    def _format_epoch(self, ts_epoch: float) -> str:
+        """UTC 'YYYY-mm-dd HH:MM:SS' for an epoch, formatted once per second."""
+        # Round to microseconds first, as datetime.utcfromtimestamp does
+        second = math.floor(round(ts_epoch, 6))
+        if second > MAX_EPOCH_SECOND:
+            raise ValueError(f"epoch out of range: {ts_epoch}")
+        if second != self._ts_second:
+            self._ts_text = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(second))
+            self._ts_second = second
+        return self._ts_text
+
     def can_parse(self, raw_log: str) -> bool:
-        raw_log = raw_log.strip()
-        if not raw_log or raw_log.startswith("#"):
-            return False
-        # Starts with epoch float and matches expected columns
-        return self.conn_pattern.match(raw_log) is not None
+        raw_log = raw_log.lstrip()
+        # Starts with an epoch float; parse() checks the columns
+        first = raw_log.split(None, 1)[0] if raw_log else ""
+        return first[:1].isdigit() and "." in first
 
     def parse(self, raw_log: str, metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
-        m = self.conn_pattern.match(raw_log.strip())
-        if not m:
+        d = self._split_fields(raw_log)
+        if d is None:
             return None
-        d = m.groupdict()
+
+        # Share one string object per distinct value across buffered rows
+        for k in REPEATED_FIELDS:
+            d[k] = sys.intern(d[k])
 
         # Normalize numeric fields and epoch timestamp
         try:
             d["ts_epoch"] = float(d.get("ts", 0.0))
-            d["timestamp"] = datetime.utcfromtimestamp(
-                d["ts_epoch"]).strftime("%Y-%m-%d %H:%M:%S")
+            d["timestamp"] = self._format_epoch(d["ts_epoch"])
         except Exception:
             d["timestamp"] = None
-        for k in ("orig_p", "resp_p", "missed_bytes", "orig_pkts", "orig_ip_bytes", "resp_pkts", "resp_ip_bytes"):
+        for k in DIGIT_FIELDS:
             try:
                 d[k] = int(d[k])
             except Exception:
                 d[k] = None
-        for k in ("orig_bytes", "resp_bytes"):
+        for k in BYTE_FIELDS:
             v = d.get(k)
             if v == "-":
                 d[k] = None
@@ -88,16 +126,75 @@ class ZeekConnParser(BaseParser):
         return d
 
     def parse_batch(self, logs: List[Dict[str, Any]]) -> Optional[pl.DataFrame]:
-        rows: List[Dict[str, Any]] = []
-        for log in logs:
-            raw_line = log.get("line", "")
-            if not self.can_parse(raw_line):
-                continue
-            md = {"src_ip": log.get("src_ip"),
-                  "recv_time": log.get("recv_time")}
-            parsed = self.parse(raw_line, md)
-            if parsed:
-                rows.append(parsed)
-        if not rows:
+        """
+        Parse a batch of conn.log lines into a DataFrame.
+
+        The lines are normalised to single tabs and read in one pass by
+        Polars' CSV reader; the column checks and numeric casts of parse()
+        then run as column expressions instead of per row in Python.
+        """
+        df = self._parse_frame(logs)
+        return None if df is None else df.drop(ROW_INDEX)
+
+    def parse_many(self, logs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Vectorized parse_many for lists of at least BATCH_MIN_ROWS logs."""
+        if len(logs) < BATCH_MIN_ROWS:
+            return super().parse_many(logs)
+        return self._rows_from_frame(self._parse_frame(logs), len(logs))
+
+    def _parse_frame(self, logs: List[Dict[str, Any]]) -> Optional[pl.DataFrame]:
+        """parse_batch, keeping each row's input position in ROW_INDEX."""
+        if not logs:
+            return None
+
+        df = pl.DataFrame(
+            {
+                "line": [log.get("line", "") for log in logs],
+                "src_ip": [log.get("src_ip") for log in logs],
+                "recv_time": [log.get("recv_time") for log in logs]
+            },
+            schema={"line": pl.String, "src_ip": pl.String, "recv_time": pl.String}
+        ).with_row_index(ROW_INDEX)
+
+        # Same whitespace splitting as _split_fields: 19 or 20 columns
+        df = df.with_columns(pl.col("line").str.strip_chars().str.replace_all(r"\s+", "\t"))
+        df = df.filter(
+            pl.col("line").str.count_matches("\t", literal=True).is_between(MIN_FIELDS - 1, MIN_FIELDS)
+        )
+        if df.is_empty():
             return None
-        return pl.DataFrame(rows)
+
+        fields = pl.read_csv(
+            io.StringIO(df["line"].str.join("\n").item() + "\n"),
+            separator="\t",
+            has_header=False,
+            quote_char=None,
+            new_columns=list(CSV_COLUMNS),
+            schema={name: pl.String for name in CSV_COLUMNS},
+            # tunnel_parents is all null when no line in the batch has it
+            missing_columns="insert"
+        )
+        df = pl.concat([fields, df.select("src_ip", "recv_time", ROW_INDEX)], how="horizontal")
+
+        valid = pl.col("ts").str.contains(r"^\d+\.\d+$")
+        for name in DIGIT_FIELDS:
+            valid = valid & pl.col(name).str.contains(r"^\d+$")
+        df = df.filter(valid)
+        if df.is_empty():
+            return None
+
+        ts_epoch = pl.col("ts").cast(pl.Float64)
+        df = df.with_columns(
+            [pl.col(name).cast(pl.Int64, strict=False) for name in DIGIT_FIELDS + BYTE_FIELDS]
+            + [pl.col(name).cast(pl.Categorical) for name in REPEATED_FIELDS]
+            + [
+                ts_epoch.alias("ts_epoch"),
+                pl.from_epoch((ts_epoch * 1_000_000).round().cast(pl.Int64, strict=False), time_unit="us")
+                .dt.strftime("%Y-%m-%d %H:%M:%S")
+                .alias("timestamp"),
+                # required for ingestion worker save step
+                pl.col("orig_h").alias("hostname")
+            ]
+        )
+
+        return df.select(list(FIELD_NAMES) + ["ts_epoch", "timestamp", "src_ip", "recv_time", "hostname", ROW_INDEX])
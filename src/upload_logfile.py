@@ -16,6 +16,37 @@ def get_db_connection():
 
 # --- IroncladParser Implementation ---
 
+# Compiled once at import; process_batch matches every uploaded line
+LINUX_HEADER_PATTERN = re.compile(
+    r"(?P<timestamp>"
+    r"^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}[\.\d]*[Z\+\-\:0-9]*|"
+    r"^\S+\s+\S+\s+\S+|"
+    r"^\S+"
+    r")"
+    r"\s+"
+    r"(?P<hostname>\S+)"
+    r"\s+"
+    r"(?P<app_name>[^:\[\s]+)"
+    r"(?:\[(?P<pid>\d+)\])?"
+    r":\s+"
+    r"(?P<raw_message>.*)"
+)
+NGINX_PATTERN = re.compile(
+    r"(?P<remote_addr>[\d\.]+)\s+"
+    r"-\s+(?P<remote_user>\S+)\s+"
+    r"\[(?P<time_local>.*?)\]\s+"
+    r'"(?P<request_method>\S+)\s+'
+    r'(?P<request_uri>\S+)\s+'
+    r'(?P<server_protocol>[^\"]+)"\s+'
+    r'(?P<status>\d+)\s+'
+    r'(?P<body_bytes_sent>\d+)\s+'
+    r'"(?P<http_referer>[^\"]*)"\s+'
+    r'"(?P<http_user_agent>[^\"]*)"'
+)
+SSH_PATTERN = re.compile(
+    r"(?P<ssh_action>Accepted|Failed)\s+(?:password|publickey)\s+for\s+(?:invalid\s+user\s+)?(?P<ssh_user>\S+)\s+from\s+(?P<ssh_ip>\S+)"
+)
+
 
 class IroncladParser:
 
@@ -23,32 +54,8 @@ class IroncladParser:
         self.conn = get_db_connection()
         # Defer alert generation to the background Sigma worker.
         # The worker reads new logs from DB and stores alerts.
-        self.linux_header_pattern = (
-            r"(?P<timestamp>"
-            r"^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}[\.\d]*[Z\+\-\:0-9]*|"
-            r"^\S+\s+\S+\s+\S+|"
-            r"^\S+"
-            r")"
-            r"\s+"
-            r"(?P<hostname>\S+)"
-            r"\s+"
-            r"(?P<app_name>[^:\[\s]+)"
-            r"(?:\[(?P<pid>\d+)\])?"
-            r":\s+"
-            r"(?P<raw_message>.*)"
-        )
-        self.nginx_pattern = (
-            r"(?P<remote_addr>[\d\.]+)\s+"
-            r"-\s+(?P<remote_user>\S+)\s+"
-            r"\[(?P<time_local>.*?)\]\s+"
-            r'"(?P<request_method>\S+)\s+'
-            r'(?P<request_uri>\S+)\s+'
-            r'(?P<server_protocol>[^\"]+)"\s+'
-            r'(?P<status>\d+)\s+'
-            r'(?P<body_bytes_sent>\d+)\s+'
-            r'"(?P<http_referer>[^\"]*)"\s+'
-            r'"(?P<http_user_agent>[^\"]*)"'
-        )
+        self.linux_header_pattern = LINUX_HEADER_PATTERN
+        self.nginx_pattern = NGINX_PATTERN
 
     def get_or_create_server(self, hostname, ip_address, server_type):
         cur = self.conn.cursor()
@@ -127,7 +134,7 @@ class IroncladParser:
             raw_line = item.get("line", "").strip()
             src_ip = item.get("src_ip", "")
             recv_time = item.get("recv_time", "")
-            nginx_match = re.match(self.nginx_pattern, raw_line)
+            nginx_match = self.nginx_pattern.match(raw_line)
             if nginx_match:
                 details = nginx_match.groupdict()
                 hostname = src_ip
@@ -137,7 +144,7 @@ class IroncladParser:
                 self.insert_log_entry(
                     server_id, recv_time, log_source, raw_line)
             else:
-                linux_match = re.match(self.linux_header_pattern, raw_line)
+                linux_match = self.linux_header_pattern.match(raw_line)
                 if linux_match:
                     details = linux_match.groupdict()
                     details["raw_message"] = details.get("raw_message", "")
@@ -147,8 +154,7 @@ class IroncladParser:
                         hostname, src_ip, log_source)
                     self.insert_log_entry(
                         server_id, recv_time, log_source, raw_line)
-                    ssh_pattern = r"(?P<ssh_action>Accepted|Failed)\s+(?:password|publickey)\s+for\s+(?:invalid\s+user\s+)?(?P<ssh_user>\S+)\s+from\s+(?P<ssh_ip>\S+)"
-                    ssh_match = re.search(ssh_pattern, details["raw_message"])
+                    ssh_match = SSH_PATTERN.search(details["raw_message"])
                     if ssh_match:
                         details.update(ssh_match.groupdict())
 
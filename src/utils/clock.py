@@ -0,0 +1,28 @@
+"""
+Cached wall-clock timestamps for hot paths.
+
+now_iso() reformats datetime.now() at most once per CLOCK_RESOLUTION_NS
+(checked with the monotonic clock), so a receive loop handling thousands
+of packets per second shares one string instead of building one per call.
+"""
+
+import time
+from datetime import datetime
+
+# Timestamps may lag the real clock by up to this much
+CLOCK_RESOLUTION_NS = 10_000_000  # 10ms
+
+# (monotonic deadline, formatted timestamp); replaced as one tuple so
+# concurrent readers never see a mismatched pair
+_cached = (0, "")
+
+
+def now_iso() -> str:
+    """datetime.now().isoformat(), refreshed every CLOCK_RESOLUTION_NS."""
+    global _cached
+    deadline, stamp = _cached
+    now_ns = time.monotonic_ns()
+    if now_ns >= deadline:
+        stamp = datetime.now().isoformat()
+        _cached = (now_ns + CLOCK_RESOLUTION_NS, stamp)
+    return stamp
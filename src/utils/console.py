@@ -0,0 +1,60 @@
+"""
+Background console output for worker threads.
+
+say() is print() without the wait: it appends the line to a deque and
+returns. One daemon thread takes everything queued since its last pass
+and writes it with a single sys.stdout.write + flush, so a burst of error
+lines costs the hot path an append each instead of a locked write.
+"""
+
+import atexit
+import sys
+import threading
+from collections import deque
+
+# Formatted lines waiting for the writer thread
+_pending: deque = deque()
+_wake = threading.Event()
+
+# Held while draining, so flush() and the writer never interleave lines
+_drain_lock = threading.Lock()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def say(*values, sep: str = " ") -> None:
+    """Queue a line for stdout, formatted like print(*values, sep=sep)."""
+    _pending.append(sep.join(map(str, values)))
+    _wake.set()
+    if _writer is None:
+        _start_writer()
+
+
+def flush() -> None:
+    """Write every queued line now (also runs at interpreter exit)."""
+    with _drain_lock:
+        lines = []
+        while _pending:
+            lines.append(_pending.popleft())
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+
+def _write_loop() -> None:
+    """Writer thread: sleep until say() queues something, then flush it."""
+    while True:
+        _wake.wait()
+        _wake.clear()
+        flush()
+
+
+def _start_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="console-writer", daemon=True)
+            _writer.start()
+
+
+atexit.register(flush)
@@ -0,0 +1,32 @@
+"""
+JSON helpers for hot paths.
+
+Uses orjson when it is installed and falls back to the stdlib json module.
+dumps() always returns str so callers can store the result in TEXT columns.
+"""
+
+import json
+
+# orjson is optional; its JSONDecodeError subclasses json.JSONDecodeError,
+# so existing ``except json.JSONDecodeError`` handlers keep working
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+    def loads(data):
+        """Decode JSON from str or bytes."""
+        return orjson.loads(data)
+
+    def dumps(obj) -> str:
+        """Encode obj as a JSON string."""
+        return orjson.dumps(obj).decode()
+else:
+    loads = json.loads
+
+    def dumps(obj) -> str:
+        """Encode obj as a JSON string."""
+        return json.dumps(obj)
@@ -6,12 +6,17 @@ import os
 log_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'logs')
 os.makedirs(log_dir, exist_ok=True)
 
-# Configure logger
+# Configure logger; sinks are written from loguru's background thread
+# (enqueue=True) so callers never wait on console or file I/O, including
+# zip compression at rotation
 logger.remove()
 logger.add(
     sys.stdout,
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level="INFO"
+    level="INFO",
+    enqueue=True,
+    backtrace=False,
+    diagnose=False
 )
 logger.add(
     os.path.join(log_dir, "app.log"),
@@ -19,11 +24,19 @@ logger.add(
     retention="10 days",
     compression="zip",
     level="DEBUG",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+    enqueue=True,
+    backtrace=False,
+    diagnose=False
 )
 
+# Lazy logger for hot paths: callable arguments are only evaluated when a
+# sink accepts the level, e.g. log.debug("parsed {}", lambda: big_dict)
+log = logger.opt(lazy=True)
+
 # Example usage
 if __name__ == "__main__":
     logger.info("Logger is configured and ready to use.")
     logger.debug("This is a debug message.")
+    log.debug("Lazy debug message: {}", lambda: "only formatted when DEBUG is enabled")
     logger.error("This is an error message.")
\ No newline at end of file
@@ -6,39 +6,110 @@ Main orchestration: Listen → Parse → Save
 Now uses Repository Pattern for clean database access.
 """
 
+import os
 import time
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
 from datetime import datetime
+import queue
 import threading
 import signal
 import sys
 
 from src.listener.listener import UdpListener
+from src.utils import fastjson
+from src.utils.console import say
 from src.parsers.parser_manager import ParserManager
 from src.db import (
     get_or_create_server,
+    get_or_create_servers,
     insert_raw_log,
-    SessionLocal
+    insert_raw_logs_fast,
+    count_logs_by_source,
+    session_scope
 )
 
+# Batch flush thresholds; INGEST_BATCH_SIZE plays the role of rsyslog's
+# queue.dequeueBatchSize
+BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "64"))
+BATCH_TIMEOUT = float(os.environ.get("INGEST_BATCH_TIMEOUT", "0.1"))
+
+# Datagrams pulled from the socket per receive_batch() call
+RECV_BATCH_SIZE = 64
+
+# Optional CPU to pin the receive thread to (Linux only)
+RECV_CPU = os.environ.get("INGEST_RECV_CPU")
+
+# Timestamp strings whose parsed datetime is remembered; a batch's logs
+# share a handful of seconds, and strptime dominates per-row flush cost
+TIMESTAMP_CACHE_SIZE = 4096
+_timestamp_cache: Dict[str, Optional[datetime]] = {}
+
+
+def _parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse a "%Y-%m-%d %H:%M:%S" timestamp, or None; cached per string."""
+    try:
+        return _timestamp_cache[value]
+    except KeyError:
+        pass
+    
+    parsed = None
+    if len(value) == 19 and value[10] == " " and value[4] == value[7] == "-" and value[13] == value[16] == ":":
+        # The zero-padded layout: fromisoformat is C, ~5x cheaper than strptime
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    if parsed is None:
+        # strptime also takes unpadded or space-padded fields ("2025-1-5 1:2:3")
+        try:
+            parsed = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    
+    if len(_timestamp_cache) >= TIMESTAMP_CACHE_SIZE:
+        _timestamp_cache.clear()
+    _timestamp_cache[value] = parsed
+    return parsed
+
 
 class IngestionWorker:
     """
     Orchestrates the complete log ingestion pipeline.
     
-    Flow:
-        1. Listen for UDP logs on port 5140
-        2. Parse logs using ParserManager
-        3. Batch logs (100 or 5 seconds)
-        4. Save to database
+    Flow (one thread per stage):
+        1. Receive thread: listen for UDP logs on port 5140
+        2. Parser thread: parse logs using ParserManager and batch them
+           (BATCH_SIZE logs or BATCH_TIMEOUT seconds)
+        3. Writer thread: save each batch to the database in one
+           transaction
+    
+    The receive thread only does syscalls, so it never waits on a regex
+    or a commit.
     """
     
+    # Received messages waiting for the parser; when exceeded the receive
+    # loop blocks (backpressure) instead of buffering without bound
+    PARSE_QUEUE_MESSAGES = 8192
+    
+    # Most received messages handed to ParserManager.parse_many at once
+    PARSE_CHUNK_MESSAGES = 4096
+    
+    # Full batches waiting for the writer; when exceeded the parser blocks
+    WRITE_QUEUE_BATCHES = 8
+    
+    # (hostname, ip, server_type) -> server id entries kept by the writer
+    SERVER_CACHE_SIZE = 4096
+    
+    # Seconds _print_stats reuses the per-source log counts
+    STATS_CACHE_SECONDS = 2.0
+    
     def __init__(
         self,
         host: str = "0.0.0.0",
         port: int = 514,
-        batch_size: int = 100,
-        batch_timeout: float = 5.0,
+        batch_size: int = BATCH_SIZE,
+        batch_timeout: float = BATCH_TIMEOUT,
         output_dir: str = "./collected_logs/processed"
     ):
         """
@@ -57,13 +128,31 @@ class IngestionWorker:
         self.batch_timeout = batch_timeout
         
         # Components
-        self.listener = UdpListener(host=host, port=port, timeout=1.0)
+        # Wake at least once per batch_timeout so partial batches get flushed
+        self.listener = UdpListener(host=host, port=port, timeout=min(1.0, batch_timeout))
         self.parser_manager = ParserManager(output_dir=output_dir)
         
         # State
         self.running = False
         self.batch: List[Dict[str, Any]] = []
-        self.last_batch_time = time.time()
+        self.last_batch_time = time.monotonic()
+        
+        # Background parser (started by run); queue items are receive_batch() lists
+        self._parse_queue: queue.Queue = queue.Queue(
+            maxsize=max(1, self.PARSE_QUEUE_MESSAGES // RECV_BATCH_SIZE)
+        )
+        self._parser_thread: Optional[threading.Thread] = None
+        
+        # Background writer (started by run)
+        self._write_queue: queue.Queue = queue.Queue(maxsize=self.WRITE_QUEUE_BATCHES)
+        self._writer_thread: Optional[threading.Thread] = None
+        
+        # Committed server ids, most recently used last (writer thread only)
+        self._server_ids: "OrderedDict[tuple, int]" = OrderedDict()
+        
+        # Last count_logs_by_source() result and when it was taken
+        self._db_counts: Optional[Dict[str, int]] = None
+        self._db_counts_at = 0.0
         
         # Stats
         self.stats = {
@@ -73,190 +162,395 @@ class IngestionWorker:
             "errors": 0,
             "batches": 0
         }
+        # The receive, parser and writer threads add their counts under this lock
+        self._stats_lock = threading.Lock()
+        
+        # stats["parsed"] value at which the parser thread next prints stats
+        self._next_stats_at = 100
         
-        print("[IngestionWorker] Initialized")
-        print(f"  Listening: {host}:{port}")
-        print(f"  Batch: {batch_size} logs or {batch_timeout}s")
-        print(f"  Parsers: {', '.join(self.parser_manager.list_parsers())}")
+        say("[IngestionWorker] Initialized")
+        say(f"  Listening: {host}:{port}")
+        say(f"  Batch: {batch_size} logs or {batch_timeout}s")
+        say(f"  Parsers: {', '.join(self.parser_manager.list_parsers())}")
     
     def _should_flush_batch(self) -> bool:
         """Check if batch should be flushed."""
         if len(self.batch) >= self.batch_size:
             return True
         
-        if len(self.batch) > 0 and (time.time() - self.last_batch_time) >= self.batch_timeout:
+        if len(self.batch) > 0 and (time.monotonic() - self.last_batch_time) >= self.batch_timeout:
             return True
         
         return False
     
     def _flush_batch(self):
-        """Save batch to database using repository pattern."""
+        """
+        Hand the current batch off for saving.
+        
+        While run() is active the batch is queued for the writer thread;
+        otherwise it is written synchronously.
+        """
         if not self.batch:
             return
         
-        batch_size = len(self.batch)
+        batch = self.batch
+        self.batch = []
+        self.last_batch_time = time.monotonic()
+        
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            self._write_queue.put(batch)
+        else:
+            self._write_batch(batch)
+    
+    def _parser_loop(self):
+        """Parse received messages into batches until the None sentinel arrives."""
+        while True:
+            try:
+                messages = self._parse_queue.get(timeout=self.batch_timeout)
+            except queue.Empty:
+                messages = []
+            
+            if messages is None:
+                break
+            
+            # Take whatever else is already queued so each parser gets a
+            # bigger slice per parse_many call
+            stop = False
+            while messages and len(messages) < self.PARSE_CHUNK_MESSAGES:
+                try:
+                    more = self._parse_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    stop = True
+                    break
+                messages.extend(more)
+            
+            self._process_logs(messages)
+            
+            # Flush on size or timeout
+            if self._should_flush_batch():
+                self._flush_batch()
+            
+            # Print stats every 100 logs
+            parsed = self.stats["parsed"]
+            if parsed >= self._next_stats_at:
+                self._next_stats_at = parsed - parsed % 100 + 100
+                self._print_stats()
+            
+            if stop:
+                break
+        
+        # Flush remaining logs
+        if self.batch:
+            say(f"[IngestionWorker] Flushing remaining {len(self.batch)} logs...")
+            self._flush_batch()
+    
+    def _start_parser(self):
+        """Start the background parser thread."""
+        self._parser_thread = threading.Thread(target=self._parser_loop, daemon=True)
+        self._parser_thread.start()
+    
+    def _stop_parser(self):
+        """Let the parser drain queued messages and flush, then stop it."""
+        if self._parser_thread is None:
+            return
+        self._parse_queue.put(None)
+        self._parser_thread.join()
+        self._parser_thread = None
+    
+    def _pin_receive_thread(self):
+        """Pin the calling (receive) thread to RECV_CPU, if configured."""
+        if RECV_CPU is None or not hasattr(os, "sched_setaffinity"):
+            return
+        try:
+            # pid 0 is the calling thread on Linux
+            os.sched_setaffinity(0, {int(RECV_CPU)})
+            say(f"[IngestionWorker] Receive thread pinned to CPU {RECV_CPU}")
+        except (OSError, ValueError) as e:
+            say(f"[IngestionWorker] Could not pin receive thread: {e}")
+    
+    def _writer_loop(self):
+        """Drain queued batches until the None sentinel arrives."""
+        while True:
+            batch = self._write_queue.get()
+            if batch is None:
+                break
+            self._write_batch(batch)
+    
+    def _start_writer(self):
+        """Start the background writer thread."""
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
+    
+    def _stop_writer(self):
+        """Let the writer finish queued batches, then stop it."""
+        if self._writer_thread is None:
+            return
+        self._write_queue.put(None)
+        self._writer_thread.join()
+        self._writer_thread = None
+    
+    @staticmethod
+    def _log_fields(log_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Pull server and log_entry fields out of a parsed log."""
+        get = log_data.get
+        
+        # Get log source - try multiple keys
+        log_source = get("log_source") or get("log_type") or "unknown"
+        
+        # Parse timestamp if it's a string
+        recv_time = get("timestamp") or get("recv_time")
+        if recv_time and isinstance(recv_time, str):
+            recv_time = _parse_timestamp(recv_time)
+        
+        # Get content - handle both raw_line and line
+        content = get("raw_line") or get("line")
+        if not content:
+            # Store the parsed fields as JSON so the row stays machine-readable
+            try:
+                content = fastjson.dumps(log_data)
+            except (TypeError, ValueError):
+                content = str(log_data)
+        
+        return {
+            "hostname": get("hostname", "unknown"),
+            "ip": get("source_ip") or get("src_ip", "0.0.0.0"),
+            "log_source": log_source,
+            "content": content,
+            "recv_time": recv_time
+        }
+    
+    def _cached_server_ids(self, keys: List[tuple]) -> Dict[tuple, int]:
+        """Server ids already known for keys, refreshing their LRU position."""
+        server_ids = {}
+        for key in keys:
+            server_id = self._server_ids.get(key)
+            if server_id is not None and key not in server_ids:
+                self._server_ids.move_to_end(key)
+                server_ids[key] = server_id
+        return server_ids
+    
+    def _remember_server_ids(self, server_ids: Dict[tuple, int]):
+        """Add committed server ids to the LRU, evicting the oldest."""
+        for key, server_id in server_ids.items():
+            self._server_ids[key] = server_id
+            self._server_ids.move_to_end(key)
+        while len(self._server_ids) > self.SERVER_CACHE_SIZE:
+            self._server_ids.popitem(last=False)
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """
+        Save batch to database in one transaction with one DBAPI executemany.
+        
+        Servers for the whole batch are resolved up front by
+        get_or_create_servers.
+        
+        If the bulk insert fails the batch is retried row by row so a
+        single bad log does not drop the rest.
+        """
+        try:
+            with session_scope() as db:
+                entries = [self._log_fields(log_data) for log_data in batch]
+                keys = [(fields["hostname"], fields["ip"], fields["log_source"]) for fields in entries]
+                
+                server_ids = self._cached_server_ids(keys)
+                missing = [key for key in keys if key not in server_ids]
+                if missing:
+                    # The rest of the batch's servers in one lookup and one insert
+                    server_ids.update(get_or_create_servers(missing, session=db))
+                
+                rows = [
+                    {
+                        "server_id": server_ids[key],
+                        "log_source": fields["log_source"],
+                        "content": fields["content"],
+                        "recv_time": fields["recv_time"]
+                    }
+                    for key, fields in zip(keys, entries)
+                ]
+                
+                # The ids are not needed here, so skip RETURNING and the
+                # statement compile
+                insert_raw_logs_fast(rows, session=db)
+        
+        except Exception as e:
+            say(f"[IngestionWorker] Bulk insert failed ({e}), saving row by row")
+            self._write_batch_rows(batch)
+            return
+        
+        # Committed, so any servers created for this batch are safe to reuse
+        self._remember_server_ids(server_ids)
+        
+        self._add_stats(saved=len(batch), batches=1)
+        
+        say(f"[IngestionWorker] Batch saved: {len(batch)}/{len(batch)} logs")
+    
+    def _write_batch_rows(self, batch: List[Dict[str, Any]]):
+        """Save batch one row at a time, isolating bad rows in savepoints."""
+        batch_size = len(batch)
         saved_count = 0
         
         try:
-            for log_data in self.batch:
-                try:
-                    # Extract server info
-                    hostname = log_data.get("hostname", "unknown")
-                    ip = log_data.get("source_ip") or log_data.get("src_ip", "0.0.0.0")
-                    
-                    # Get log source - try multiple keys
-                    log_source = (
-                        log_data.get("log_source") or 
-                        log_data.get("log_type") or 
-                        "unknown"
-                    )
-                    
-                    # Get content - handle both raw_line and line
-                    content = log_data.get("raw_line") or log_data.get("line") or str(log_data)
-                    
-                    # Parse timestamp if it's a string
-                    recv_time = log_data.get("timestamp") or log_data.get("recv_time")
-                    if recv_time and isinstance(recv_time, str):
-                        try:
-                            from datetime import datetime
-                            recv_time = datetime.strptime(recv_time, "%Y-%m-%d %H:%M:%S")
-                        except:
-                            recv_time = None
-                    
-                    # Get or create server
-                    server_id = get_or_create_server(
-                        hostname=hostname,
-                        ip=ip,
-                        server_type=log_source
-                    )
-                    
-                    # Insert raw log
-                    log_id = insert_raw_log(
-                        server_id=server_id,
-                        log_source=log_source,
-                        content=content,
-                        recv_time=recv_time
-                    )
-                    
-                    saved_count += 1
+            # One transaction per batch; each log gets a savepoint so a bad
+            # row is rolled back on its own
+            with session_scope() as db:
+                for log_data in batch:
+                    try:
+                        with db.begin_nested():
+                            fields = self._log_fields(log_data)
+                            
+                            # Get or create server
+                            server_id = get_or_create_server(
+                                hostname=fields["hostname"],
+                                ip=fields["ip"],
+                                server_type=fields["log_source"],
+                                session=db
+                            )
+                            
+                            # Insert raw log
+                            insert_raw_log(
+                                server_id=server_id,
+                                log_source=fields["log_source"],
+                                content=fields["content"],
+                                recv_time=fields["recv_time"],
+                                session=db
+                            )
+                        
+                        saved_count += 1
                     
-                except Exception as e:
-                    print(f"[IngestionWorker] Error saving log: {e}")
-                    print(f"  Log data keys: {list(log_data.keys())}")
-                    import traceback
-                    traceback.print_exc()
-                    self.stats["errors"] += 1
+                    except Exception as e:
+                        say(f"[IngestionWorker] Error saving log: {e!r}")
+                        say(f"  Log data keys: {list(log_data.keys())}")
+                        self._add_stats(errors=1)
             
-            self.stats["saved"] += saved_count
-            self.stats["batches"] += 1
+            self._add_stats(saved=saved_count, batches=1)
             
-            print(f"[IngestionWorker] Batch saved: {saved_count}/{batch_size} logs")
+            say(f"[IngestionWorker] Batch saved: {saved_count}/{batch_size} logs")
             
         except Exception as e:
-            print(f"[IngestionWorker] Error in batch processing: {e}")
-            self.stats["errors"] += batch_size - saved_count
+            say(f"[IngestionWorker] Error in batch processing: {e}")
+            self._add_stats(errors=batch_size - saved_count)
+    
+    def _process_logs(self, messages: List[Dict[str, Any]]):
+        """Parse received messages in one ParserManager.parse_many call and batch them."""
+        if not messages:
+            return
         
-        finally:
-            # Clear batch
-            self.batch.clear()
-            self.last_batch_time = time.time()
+        try:
+            parsed_logs = self.parser_manager.parse_many(messages)
+        except Exception as e:
+            say(f"[IngestionWorker] Error parsing {len(messages)} logs, retrying one by one: {e}")
+            # Count locally; stats is updated once for the whole chunk
+            parsed_count = 0
+            for raw_data in messages:
+                parsed_count += self._process_log(raw_data)
+                if len(self.batch) >= self.batch_size:
+                    self._flush_batch()
+            self._add_stats(parsed=parsed_count, errors=len(messages) - parsed_count)
+            return
+        
+        self._add_stats(parsed=len(parsed_logs), errors=len(messages) - len(parsed_logs))
+        
+        for parsed in parsed_logs:
+            self.batch.append(parsed)
+            if len(self.batch) >= self.batch_size:
+                self._flush_batch()
     
-    def _process_log(self, raw_data: Dict[str, Any]):
-        """Process single log: parse and add to batch."""
+    def _process_log(self, raw_data: Dict[str, Any]) -> bool:
+        """
+        Process single log: parse and add to batch.
+        
+        Returns:
+            True if the log was parsed and batched; the caller counts it
+        """
         try:
             # Parse log
             parsed = self.parser_manager.parse(raw_data)
             
             if parsed:
                 self.batch.append(parsed)
-                self.stats["parsed"] += 1
-            else:
-                self.stats["errors"] += 1
+                return True
+            return False
         
         except Exception as e:
-            print(f"[IngestionWorker] Error processing log: {e}")
-            print(f"  Raw: {raw_data.get('line', '')[:80]}...")
-            self.stats["errors"] += 1
+            say(f"[IngestionWorker] Error processing log: {e}")
+            say(f"  Raw: {raw_data.get('line', '')[:80]}...")
+            return False
     
     def run(self):
         """
         Main loop: listen → parse → batch → save.
         
-        Runs until stopped with Ctrl+C.
+        This thread only receives; parsing and saving run on the parser
+        and writer threads. Runs until stopped with Ctrl+C.
         """
-        print("[IngestionWorker] Starting...")
+        say("[IngestionWorker] Starting...")
         self.running = True
+        self._start_writer()
+        self._start_parser()
+        self._pin_receive_thread()
         
         with self.listener:
             while self.running:
                 try:
-                    # Listen for log
-                    raw_data = self.listener.receive()
+                    # Listen for logs (everything queued on the socket at once)
+                    messages = self.listener.receive_batch(RECV_BATCH_SIZE)
                     
-                    if raw_data:
-                        self.stats["received"] += 1
-                        
-                        # Process log
-                        self._process_log(raw_data)
-                        
-                        # Check if batch should be flushed
-                        if self._should_flush_batch():
-                            self._flush_batch()
-                    
-                    # Print stats every 100 logs
-                    if self.stats["received"] % 100 == 0 and self.stats["received"] > 0:
-                        self._print_stats()
+                    if messages:
+                        self._add_stats(received=len(messages))
+                        self._parse_queue.put(messages)
                 
                 except KeyboardInterrupt:
-                    print("\n[IngestionWorker] Shutting down...")
+                    say("\n[IngestionWorker] Shutting down...")
                     break
                 
                 except Exception as e:
-                    print(f"[IngestionWorker] Error in main loop: {e}")
-                    self.stats["errors"] += 1
+                    say(f"[IngestionWorker] Error in main loop: {e}")
+                    self._add_stats(errors=1)
         
-        # Flush remaining logs
-        if self.batch:
-            print(f"[IngestionWorker] Flushing remaining {len(self.batch)} logs...")
-            self._flush_batch()
+        # Parse what is still queued, then wait for it to reach the database
+        self._stop_parser()
+        self._stop_writer()
         
         # Final stats
         self._print_stats()
         
         self.running = False
         
-        print("[IngestionWorker] Stopped")
+        say("[IngestionWorker] Stopped")
+    
+    def _add_stats(self, **counts: int):
+        """Add counts to self.stats; called from several threads."""
+        with self._stats_lock:
+            for key, count in counts.items():
+                self.stats[key] += count
     
     def _print_stats(self):
         """Print current statistics."""
-        print(f"\n{'='*60}")
-        print(f"[Stats] Received: {self.stats['received']}")
-        print(f"[Stats] Parsed:   {self.stats['parsed']}")
-        print(f"[Stats] Saved:    {self.stats['saved']}")
-        print(f"[Stats] Errors:   {self.stats['errors']}")
-        print(f"[Stats] Batches:  {self.stats['batches']}")
-        
-        # Query database stats
+        stats = self.get_stats()
+        say(f"\n{'='*60}")
+        say(f"[Stats] Received: {stats['received']}")
+        say(f"[Stats] Parsed:   {stats['parsed']}")
+        say(f"[Stats] Saved:    {stats['saved']}")
+        say(f"[Stats] Errors:   {stats['errors']}")
+        say(f"[Stats] Batches:  {stats['batches']}")
+        
+        # Query database stats (one GROUP BY, reused for STATS_CACHE_SECONDS)
         try:
-            from src.db import get_recent_logs
-            from src.db.models import LogEntry
-            
-            db = SessionLocal()
-            total_logs = db.query(LogEntry).count()
-            
-            # Count by type
-            linux_count = db.query(LogEntry).filter_by(log_source="linux").count()
-            windows_count = db.query(LogEntry).filter_by(log_source="windows").count()
-            nginx_count = db.query(LogEntry).filter_by(log_source="nginx").count()
-            
-            db.close()
+            now = time.monotonic()
+            if self._db_counts is None or now - self._db_counts_at >= self.STATS_CACHE_SECONDS:
+                self._db_counts = count_logs_by_source()
+                self._db_counts_at = now
+            counts = self._db_counts
             
-            print(f"[Stats] DB Total: {total_logs}")
-            print(f"[Stats] By Type:  Linux={linux_count}, Windows={windows_count}, Nginx={nginx_count}")
+            say(f"[Stats] DB Total: {sum(counts.values())}")
+            say(f"[Stats] By Type:  Linux={counts.get('linux', 0)}, "
+                  f"Windows={counts.get('windows', 0)}, Nginx={counts.get('nginx', 0)}")
         except Exception as e:
-            print(f"[Stats] Could not query DB: {e}")
+            say(f"[Stats] Could not query DB: {e}")
         
-        print(f"{'='*60}\n")
+        say(f"{'='*60}\n")
     
     def stop(self):
         """Stop worker gracefully."""
@@ -265,12 +559,12 @@ class IngestionWorker:
     def start(self):
         """Start worker in background thread."""
         if hasattr(self, '_thread') and self._thread and self._thread.is_alive():
-            print("[IngestionWorker] Already running")
+            say("[IngestionWorker] Already running")
             return
         
         self._thread = threading.Thread(target=self.run, daemon=True)
         self._thread.start()
-        print("[IngestionWorker] Started in background thread")
+        say("[IngestionWorker] Started in background thread")
     
     def is_running(self) -> bool:
         """Check if worker is running."""
@@ -278,14 +572,15 @@ class IngestionWorker:
     
     def get_stats(self) -> Dict[str, int]:
         """Get current statistics."""
-        return self.stats.copy()
+        with self._stats_lock:
+            return self.stats.copy()
 
 
 # Signal handler for graceful shutdown
 def signal_handler(worker):
     """Handle Ctrl+C gracefully."""
     def handler(signum, frame):
-        print("\n[Signal] Received interrupt signal")
+        say("\n[Signal] Received interrupt signal")
         worker.stop()
         sys.exit(0)
     return handler
@@ -297,8 +592,6 @@ if __name__ == "__main__":
     worker = IngestionWorker(
         host="0.0.0.0",
         port=514,
-        batch_size=100,
-        batch_timeout=5.0,
         output_dir="./collected_logs/processed"
     )
     
@@ -309,5 +602,5 @@ if __name__ == "__main__":
     try:
         worker.run()
     except Exception as e:
-        print(f"[Error] Fatal error: {e}")
+        say(f"[Error] Fatal error: {e}")
         worker.stop()
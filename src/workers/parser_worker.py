@@ -5,22 +5,31 @@ Background worker that reads unparsed logs from the database,
 extracts detailed fields, and saves them to detail tables.
 """
 
+import os
+import socket
+import threading
 import time
 import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from src.db.setup import SessionLocal
+from src.db.setup import SessionLocal, engine
 from src.db.models import LogEntry
-from src.db.repository.log_repo import get_unparsed_linux_logs, get_unparsed_windows_logs, get_unparsed_nginx_logs
-from src.db.repository.linux_repo import insert_linux_details
-from src.db.repository.windows_repo import insert_windows_details
-from src.db.repository.nginx_repo import insert_nginx_details
+from src.db.repository.log_repo import claim_unparsed_logs, mark_logs_unparseable, release_log_claims
+from src.db.repository.linux_repo import insert_linux_details_bulk
+from src.db.repository.windows_repo import insert_windows_details_bulk
+from src.db.repository.nginx_repo import insert_nginx_details_bulk
 from src.parsers.parser_manager import ParserManager
+from src.utils.console import say
+
+# Seconds between PRAGMA data_version checks while waiting for new logs
+WAKE_CHECK_INTERVAL = 0.2
 
 
 class ParserWorker:
@@ -31,7 +40,11 @@ class ParserWorker:
     1. Poll database for unparsed logs
     2. Parse each log using ParserManager
     3. Save parsed details to detail tables
-    4. Sleep and repeat
+    4. Wait for the next commit (or poll_interval) and repeat
+    
+    The Linux, Windows and Nginx pipelines touch separate tables, so each
+    poll runs them side by side on a small thread pool; every repository
+    call opens its own session.
     """
     
     def __init__(
@@ -49,9 +62,20 @@ class ParserWorker:
         self.poll_interval = poll_interval
         self.batch_size = batch_size
         
-        self.parser_manager = ParserManager()
+        # ParserManager keeps per-source caches, so each pool thread gets its own
+        self._local = threading.local()
         self.running = False
         
+        # Run side by side each poll, one pool thread per log type
+        self._pipelines = (
+            self._process_linux_logs,
+            self._process_windows_logs,
+            self._process_nginx_logs
+        )
+        
+        # Unique per worker so several can claim batches side by side
+        self.claim_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        
         # Statistics
         self.stats = {
             'logs_processed': 0,
@@ -61,60 +85,106 @@ class ParserWorker:
             'errors': 0,
             'started_at': None
         }
+        # Pipelines add their per-batch counts under this lock
+        self._stats_lock = threading.Lock()
         
-        print("[ParserWorker] Initialized (Repository Pattern)")
-        print(f"  Poll Interval: {poll_interval}s")
-        print(f"  Batch Size: {batch_size}")
+        say("[ParserWorker] Initialized (Repository Pattern)")
+        say(f"  Poll Interval: {poll_interval}s")
+        say(f"  Batch Size: {batch_size}")
     
     def run(self):
         """Main worker loop."""
-        print("[ParserWorker] Starting...")
+        say("[ParserWorker] Starting...")
         
         self.running = True
         self.stats['started_at'] = datetime.now().isoformat()
+        executor = ThreadPoolExecutor(
+            max_workers=len(self._pipelines),
+            thread_name_prefix="parser-worker"
+        )
         
-        print("[ParserWorker] Running...")
+        # Held for the whole run: data_version only moves when *another*
+        # connection commits
+        watcher = engine.connect()
+        version = self._data_version(watcher)
+        
+        say("[ParserWorker] Running...")
         
         try:
             while self.running:
-                # Process each log type
-                processed = 0
-                processed += self._process_linux_logs()
-                processed += self._process_windows_logs()
-                processed += self._process_nginx_logs()
+                # Process every log type concurrently
+                futures = [executor.submit(pipeline) for pipeline in self._pipelines]
+                processed = sum(future.result() for future in futures)
                 
                 if processed > 0:
-                    print(f"[ParserWorker] Processed {processed} logs | "
+                    say(f"[ParserWorker] Processed {processed} logs | "
                           f"Linux: {self.stats['linux_parsed']} | "
                           f"Windows: {self.stats['windows_parsed']} | "
                           f"Nginx: {self.stats['nginx_parsed']} | "
                           f"Errors: {self.stats['errors']}")
                 
-                # Sleep before next poll
-                time.sleep(self.poll_interval)
+                # Sleep until something is committed (or poll_interval passes)
+                version = self._wait_for_commit(watcher, version)
         
         except KeyboardInterrupt:
-            print("\n[ParserWorker] Interrupted")
+            say("\n[ParserWorker] Interrupted")
         
         except Exception as e:
-            print(f"[ParserWorker] Fatal error: {e}")
+            say(f"[ParserWorker] Fatal error: {e}")
             import traceback
-            traceback.print_exc()
+            say(traceback.format_exc())
         
         finally:
             self.running = False
-            print("[ParserWorker] Stopped")
+            executor.shutdown(wait=True)
+            watcher.close()
+            try:
+                release_log_claims(self.claim_id)
+            except Exception as e:
+                say(f"[ParserWorker] Error releasing claims: {e}")
+            say("[ParserWorker] Stopped")
+    
+    @staticmethod
+    def _data_version(conn) -> int:
+        """SQLite's counter of commits made by other connections."""
+        return conn.exec_driver_sql("PRAGMA data_version").scalar()
+    
+    def _wait_for_commit(self, conn, version: int) -> int:
+        """
+        Block until the database changes, poll_interval passes or stop().
+        
+        Stands in for LISTEN/NOTIFY on SQLite: checking data_version every
+        WAKE_CHECK_INTERVAL is far cheaper than the claim queries, so new
+        logs are picked up within a fraction of a second while an idle
+        database costs no claim queries at all.
+        
+        Returns:
+            The data_version seen last, to pass to the next call
+        """
+        deadline = time.monotonic() + self.poll_interval
+        while self.running:
+            current = self._data_version(conn)
+            if current != version:
+                return current
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return current
+            time.sleep(min(WAKE_CHECK_INTERVAL, remaining))
+        return version
     
     def _process_linux_logs(self) -> int:
         """Process unparsed Linux logs."""
         try:
-            # Get unparsed logs
-            unparsed = get_unparsed_linux_logs(limit=self.batch_size)
+            # Claim unparsed logs so other workers skip them
+            unparsed = claim_unparsed_logs("linux", self.claim_id, limit=self.batch_size)
             
             if not unparsed:
                 return 0
             
-            processed = 0
+            details = []
+            failed = []  # rejected by every parser
+            errors = 0   # parse raised
             
             for log_entry in unparsed:
                 try:
@@ -122,44 +192,55 @@ class ParserWorker:
                     parsed = self._parse_linux_log(log_entry.content)
                     
                     if parsed:
-                        # Save to linux_log_details
-                        insert_linux_details(
-                            log_entry_id=log_entry.id,
-                            timestamp=parsed.get('timestamp'),
-                            app_name=parsed.get('app_name') or parsed.get('program'),
-                            pid=parsed.get('pid'),
-                            raw_message=parsed.get('message') or parsed.get('raw_message'),
-                            ssh_action=parsed.get('ssh_action'),
-                            ssh_user=parsed.get('ssh_user'),
-                            ssh_ip=parsed.get('ssh_ip')
-                        )
-                        
-                        self.stats['linux_parsed'] += 1
-                        processed += 1
+                        details.append({
+                            "log_entry_id": log_entry.id,
+                            "timestamp": self._to_datetime(parsed.get('timestamp')),
+                            "app_name": parsed.get('app_name') or parsed.get('program'),
+                            "pid": parsed.get('pid'),
+                            "raw_message": parsed.get('message') or parsed.get('raw_message'),
+                            "ssh_action": parsed.get('ssh_action'),
+                            "ssh_user": parsed.get('ssh_user'),
+                            "ssh_ip": parsed.get('ssh_ip')
+                        })
                     else:
-                        self.stats['errors'] += 1
+                        failed.append(log_entry.id)
                 
                 except Exception as e:
-                    print(f"[ParserWorker] Error parsing Linux log {log_entry.id}: {e}")
-                    self.stats['errors'] += 1
+                    # Not the content's fault: left unsaved, so the claim is released
+                    say(f"[ParserWorker] Error parsing Linux log {log_entry.id}: {e}")
+                    errors += 1
             
-            self.stats['logs_processed'] += processed
+            # Save the whole batch to linux_log_details in one transaction
+            if details:
+                try:
+                    insert_linux_details_bulk(details)
+                except Exception as e:
+                    say(f"[ParserWorker] Error saving Linux details: {e}")
+                    self._add_stats(errors=errors + len(failed) + len(details))
+                    self._settle_batch(unparsed, [], failed)
+                    return 0
+            
+            self._settle_batch(unparsed, details, failed)
+            processed = len(details)
+            self._add_stats(linux_parsed=processed, logs_processed=processed, errors=errors + len(failed))
             return processed
         
         except Exception as e:
-            print(f"[ParserWorker] Error in _process_linux_logs: {e}")
+            say(f"[ParserWorker] Error in _process_linux_logs: {e}")
             return 0
     
     def _process_windows_logs(self) -> int:
         """Process unparsed Windows logs."""
         try:
-            # Get unparsed logs
-            unparsed = get_unparsed_windows_logs(limit=self.batch_size)
+            # Claim unparsed logs so other workers skip them
+            unparsed = claim_unparsed_logs("windows", self.claim_id, limit=self.batch_size)
             
             if not unparsed:
                 return 0
             
-            processed = 0
+            details = []
+            failed = []  # rejected by every parser
+            errors = 0   # parse raised
             
             for log_entry in unparsed:
                 try:
@@ -167,38 +248,49 @@ class ParserWorker:
                     parsed = self._parse_windows_log(log_entry.content)
                     
                     if parsed:
-                        # Save to windows_log_details
-                        insert_windows_details(
-                            log_entry_id=log_entry.id,
-                            content=log_entry.content  # Store full content as JSON/text
-                        )
-                        
-                        self.stats['windows_parsed'] += 1
-                        processed += 1
+                        details.append({
+                            "log_entry_id": log_entry.id,
+                            "event_json": parsed
+                        })
                     else:
-                        self.stats['errors'] += 1
+                        failed.append(log_entry.id)
                 
                 except Exception as e:
-                    print(f"[ParserWorker] Error parsing Windows log {log_entry.id}: {e}")
-                    self.stats['errors'] += 1
+                    # Not the content's fault: left unsaved, so the claim is released
+                    say(f"[ParserWorker] Error parsing Windows log {log_entry.id}: {e}")
+                    errors += 1
+            
+            # Save the whole batch to windows_log_details in one transaction
+            if details:
+                try:
+                    insert_windows_details_bulk(details)
+                except Exception as e:
+                    say(f"[ParserWorker] Error saving Windows details: {e}")
+                    self._add_stats(errors=errors + len(failed) + len(details))
+                    self._settle_batch(unparsed, [], failed)
+                    return 0
             
-            self.stats['logs_processed'] += processed
+            self._settle_batch(unparsed, details, failed)
+            processed = len(details)
+            self._add_stats(windows_parsed=processed, logs_processed=processed, errors=errors + len(failed))
             return processed
         
         except Exception as e:
-            print(f"[ParserWorker] Error in _process_windows_logs: {e}")
+            say(f"[ParserWorker] Error in _process_windows_logs: {e}")
             return 0
     
     def _process_nginx_logs(self) -> int:
         """Process unparsed Nginx logs."""
         try:
-            # Get unparsed logs
-            unparsed = get_unparsed_nginx_logs(limit=self.batch_size)
+            # Claim unparsed logs so other workers skip them
+            unparsed = claim_unparsed_logs("nginx", self.claim_id, limit=self.batch_size)
             
             if not unparsed:
                 return 0
             
-            processed = 0
+            details = []
+            failed = []  # rejected by every parser
+            errors = 0   # parse raised
             
             for log_entry in unparsed:
                 try:
@@ -206,76 +298,139 @@ class ParserWorker:
                     parsed = self._parse_nginx_log(log_entry.content)
                     
                     if parsed:
-                        # Save to nginx_log_details
-                        insert_nginx_details(
-                            log_entry_id=log_entry.id,
-                            remote_addr=parsed.get('remote_addr'),
-                            timestamp=parsed.get('timestamp'),
-                            request_method=parsed.get('request_method') or parsed.get('method'),
-                            request_uri=parsed.get('request_uri') or parsed.get('path'),
-                            status=parsed.get('status') or parsed.get('status_code'),
-                            body_bytes_sent=parsed.get('body_bytes_sent') or parsed.get('bytes'),
-                            http_referer=parsed.get('http_referer') or parsed.get('referer'),
-                            http_user_agent=parsed.get('http_user_agent') or parsed.get('user_agent')
-                        )
-                        
-                        self.stats['nginx_parsed'] += 1
-                        processed += 1
+                        details.append({
+                            "log_entry_id": log_entry.id,
+                            "remote_addr": parsed.get('remote_addr'),
+                            "remote_user": parsed.get('remote_user'),
+                            # enrich() already turned time_local into "%Y-%m-%d %H:%M:%S"
+                            "time_local": self._to_datetime(parsed.get('timestamp')),
+                            "request_method": parsed.get('request_method') or parsed.get('method'),
+                            "request_uri": parsed.get('request_uri') or parsed.get('path'),
+                            "status": parsed.get('status') or parsed.get('status_code'),
+                            "body_bytes_sent": parsed.get('body_bytes_sent') or parsed.get('bytes'),
+                            "http_referer": parsed.get('http_referer') or parsed.get('referer'),
+                            "http_user_agent": parsed.get('http_user_agent') or parsed.get('user_agent')
+                        })
                     else:
-                        self.stats['errors'] += 1
+                        failed.append(log_entry.id)
                 
                 except Exception as e:
-                    print(f"[ParserWorker] Error parsing Nginx log {log_entry.id}: {e}")
-                    self.stats['errors'] += 1
+                    # Not the content's fault: left unsaved, so the claim is released
+                    say(f"[ParserWorker] Error parsing Nginx log {log_entry.id}: {e}")
+                    errors += 1
+            
+            # Save the whole batch to nginx_log_details in one transaction
+            if details:
+                try:
+                    insert_nginx_details_bulk(details)
+                except Exception as e:
+                    say(f"[ParserWorker] Error saving Nginx details: {e}")
+                    self._add_stats(errors=errors + len(failed) + len(details))
+                    self._settle_batch(unparsed, [], failed)
+                    return 0
             
-            self.stats['logs_processed'] += processed
+            self._settle_batch(unparsed, details, failed)
+            processed = len(details)
+            self._add_stats(nginx_parsed=processed, logs_processed=processed, errors=errors + len(failed))
             return processed
         
         except Exception as e:
-            print(f"[ParserWorker] Error in _process_nginx_logs: {e}")
+            say(f"[ParserWorker] Error in _process_nginx_logs: {e}")
             return 0
     
-    def _parse_linux_log(self, content: str) -> Optional[dict]:
-        """Parse Linux log content."""
+    def _settle_batch(self, claimed, saved: list, failed: List[int]):
+        """
+        Hand back a batch's claims once its details were saved (or not).
+        
+        Entries no parser accepted are marked parsed without a details
+        row: parsing the same content again fails the same way, so they
+        are not claimed again. The others without a details row (their
+        parse raised or their save failed) are released for the next poll
+        to retry.
+        """
+        done = {detail["log_entry_id"] for detail in saved}
+        done.update(failed)
+        unsaved = [row.id for row in claimed if row.id not in done]
         try:
-            # Use the parser manager to parse
-            raw_data = {'line': content, 'log_type': 'linux'}
-            parsed = self.parser_manager.parse(raw_data)
-            return parsed
+            if failed:
+                mark_logs_unparseable(failed)
+            if unsaved:
+                release_log_claims(self.claim_id, unsaved)
         except Exception as e:
-            print(f"[ParserWorker] Linux parse error: {e}")
-            return None
+            # The lease runs out on its own; another poll picks them up then
+            say(f"[ParserWorker] Error releasing claims: {e}")
     
-    def _parse_windows_log(self, content: str) -> Optional[dict]:
-        """Parse Windows log content."""
+    def _add_stats(self, **counts: int):
+        """Add one batch's counts to self.stats."""
+        with self._stats_lock:
+            for key, count in counts.items():
+                self.stats[key] += count
+    
+    @staticmethod
+    def _to_datetime(value) -> Optional[datetime]:
+        """
+        Convert a parser timestamp string for a DateTime column.
+        
+        Accepts ISO 8601 / "%Y-%m-%d %H:%M:%S" and year-less syslog stamps
+        ("Jan 15 10:23:45", taken as the current year); anything else is None.
+        """
+        if value is None or isinstance(value, datetime):
+            return value
         try:
-            # Use the parser manager to parse
-            raw_data = {'line': content, 'log_type': 'windows'}
-            parsed = self.parser_manager.parse(raw_data)
-            return parsed
-        except Exception as e:
-            print(f"[ParserWorker] Windows parse error: {e}")
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            return datetime.strptime(f"{datetime.now().year} {value}", "%Y %b %d %H:%M:%S")
+        except ValueError:
             return None
     
+    def _parser_manager(self) -> ParserManager:
+        """This thread's ParserManager, created on first use."""
+        manager = getattr(self._local, "parser_manager", None)
+        if manager is None:
+            manager = self._local.parser_manager = ParserManager()
+        return manager
+    
+    def _parse_linux_log(self, content: str) -> Optional[dict]:
+        """
+        Parse Linux log content.
+        
+        Returns None only when no parser accepts the line; parser errors
+        propagate, so the caller can retry the entry instead of retiring it.
+        """
+        raw_data = {'line': content, 'log_type': 'linux'}
+        return self._parser_manager().parse_as(raw_data, 'linux')
+    
+    def _parse_windows_log(self, content: str) -> Optional[dict]:
+        """
+        Parse Windows log content.
+        
+        Returns None only when no parser accepts the line; parser errors
+        propagate, so the caller can retry the entry instead of retiring it.
+        """
+        raw_data = {'line': content, 'log_type': 'windows'}
+        return self._parser_manager().parse_as(raw_data, 'windows')
+    
     def _parse_nginx_log(self, content: str) -> Optional[dict]:
-        """Parse Nginx log content."""
-        try:
-            # Use the parser manager to parse
-            raw_data = {'line': content, 'log_type': 'nginx'}
-            parsed = self.parser_manager.parse(raw_data)
-            return parsed
-        except Exception as e:
-            print(f"[ParserWorker] Nginx parse error: {e}")
-            return None
+        """
+        Parse Nginx log content.
+        
+        Returns None only when no parser accepts the line; parser errors
+        propagate, so the caller can retry the entry instead of retiring it.
+        """
+        raw_data = {'line': content, 'log_type': 'nginx'}
+        return self._parser_manager().parse_as(raw_data, 'nginx')
     
     def stop(self):
         """Stop worker gracefully."""
         self.running = False
-        print("[ParserWorker] Stopping...")
+        say("[ParserWorker] Stopping...")
     
     def get_stats(self) -> dict:
         """Get worker statistics."""
-        return self.stats.copy()
+        with self._stats_lock:
+            return self.stats.copy()
 
 
 # Entry point for standalone execution
@@ -283,7 +438,7 @@ if __name__ == "__main__":
     import signal
     
     def signal_handler(signum, frame):
-        print("\n[Signal] Received interrupt signal")
+        say("\n[Signal] Received interrupt signal")
         worker.stop()
         sys.exit(0)
     
@@ -300,6 +455,6 @@ if __name__ == "__main__":
     try:
         worker.run()
     except Exception as e:
-        print(f"[Error] Fatal error: {e}")
+        say(f"[Error] Fatal error: {e}")
         import traceback
-        traceback.print_exc()
+        say(traceback.format_exc())
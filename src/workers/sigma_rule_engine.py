@@ -5,12 +5,95 @@ Core engine for loading and matching Sigma rules against log entries.
 Supports field mapping, condition evaluation, and alert generation.
 """
 
+import os
+import pickle
 import re
+from re import _parser as regex_parser
 import yaml
+import polars as pl
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Set
-from dataclasses import dataclass
-from datetime import datetime
+from typing import Callable, Dict, Any, FrozenSet, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+
+from src.utils import fastjson
+from src.utils.clock import now_iso
+
+# pyahocorasick is optional; without it match_log tests each rule literal
+# against the log with `in`
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# libyaml's loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+# Modifiers match_batch turns into Polars string expressions; values without
+# a modifier compile to equality unless they hold a '*' wildcard
+BATCH_MODIFIERS = ('contains', 'startswith', 'endswith')
+
+# Parsed rules are pickled here inside the rules directory, and reused
+# while every rule file keeps its size and mtime. Bump the version when
+# SigmaRule or the condition nodes change shape.
+RULE_CACHE_FILE = ".sigma_cache.pkl"
+RULE_CACHE_VERSION = 1
+
+# Alerts carry at most this many characters of the log line
+ALERT_RAW_LINE_CHARS = 500
+
+# Log entry fields copied into an alert's matched_fields, in this order
+MATCHED_FIELDS = ('timestamp', 'hostname', 'program', 'message',
+                  'event_id', 'channel', 'method', 'path', 'status_code')
+
+# Distinct |re and wildcard rule values whose compiled pattern is kept
+PATTERN_CACHE_SIZE = 4096
+
+# Required substrings shorter than this are not worth checking before a regex
+REGEX_LITERAL_MIN_LENGTH = 2
+
+# A wildcard value whose text between leading/trailing '*' has none of
+# these is matched with a string method instead of its regex
+REGEX_METACHARACTERS = frozenset('.^$*+?{}[]\\|()')
+
+# Joins a log's lowercased values for the literal prefilter; rule values
+# never contain it, so a literal cannot match across two fields
+PREFILTER_SEPARATOR = "\x00"
+
+# Condition tokens: parentheses, or runs of anything else
+CONDITION_TOKEN = re.compile(r"[()]|[^\s()]+")
+
+# Relative cost of matching one value with each modifier, for ordering the
+# children of and/or nodes cheapest first; |re and wildcards cost the most
+MODIFIER_COSTS = {None: 1, 'startswith': 2, 'endswith': 2, 'contains': 3}
+REGEX_COST = 8
+
+
+@dataclass
+class SelectionRef:
+    """Condition leaf: the detection block with this name must match."""
+    name: str
+
+
+@dataclass
+class NotNode:
+    """Condition node: the child must not match."""
+    child: Any
+
+
+@dataclass
+class AndNode:
+    """Condition node: every child must match."""
+    children: List[Any]
+
+
+@dataclass
+class OrNode:
+    """Condition node: some child must match (an empty OrNode never does)."""
+    children: List[Any]
 
 
 @dataclass
@@ -27,6 +110,11 @@ class SigmaRule:
     references: List[str]
     author: str
     file_path: str
+    # Parsed detection condition; filled on load or first use
+    condition_ast: Any = None
+    # (log_type, {block name: compiled selection}, fast matcher or None);
+    # filled on first match
+    compiled_selections: Any = None
     
     def get_log_type(self) -> Optional[str]:
         """Determine log type from logsource."""
@@ -43,6 +131,70 @@ class SigmaRule:
         return None
 
 
+# LogValues slot for a field not looked up yet (None means missing)
+UNRESOLVED = object()
+
+
+class LogValues:
+    """
+    A log entry's field values as the matcher sees them.
+    
+    Each field resolves like the rule lookup always has: the entry's own
+    value, else parsed_data's, else raw_line. It is converted to str and
+    lowercased once per log, however many rules read it, and kept in a
+    list slot indexed by the engine's integer id for the field.
+    """
+    
+    __slots__ = ('log_entry', 'parsed', '_values')
+    
+    def __init__(self, log_entry: Dict[str, Any], parsed: Dict[str, Any], field_count: int = 0):
+        self.log_entry = log_entry
+        self.parsed = parsed
+        self._values: List[Any] = [UNRESOLVED] * field_count
+    
+    def get(self, field_id: int, log_field: str) -> Optional[str]:
+        """Lowercased value for log_field, or None if even raw_line is missing."""
+        values = self._values
+        try:
+            text = values[field_id]
+        except IndexError:
+            # Field first seen after this log's values were created
+            values.extend([UNRESOLVED] * (field_id + 1 - len(values)))
+            text = UNRESOLVED
+        if text is not UNRESOLVED:
+            return text
+        
+        value = self.log_entry.get(log_field)
+        if value is None:
+            value = self.parsed.get(log_field)
+        if value is None:
+            value = self.log_entry.get('raw_line', '')
+        
+        text = None if value is None else str(value).lower()
+        values[field_id] = text
+        return text
+
+
+@dataclass
+class RulePrefilter:
+    """
+    Literal index over one log type's rules, built by _prefilter.
+    
+    A rule is only evaluated if the log contains one of its literals, or if
+    it has none (always). Rules in bucketed additionally need the log's
+    value for some field to equal one of theirs: buckets holds
+    (field id, log field, {value: rule indexes}) per such field.
+    """
+    rules: List[SigmaRule]
+    rule_count: int
+    literals: List[str] = field(default_factory=list)
+    literal_rules: List[List[int]] = field(default_factory=list)
+    always: List[int] = field(default_factory=list)
+    automaton: Any = None
+    buckets: List[Tuple[int, str, Dict[str, List[int]]]] = field(default_factory=list)
+    bucketed: Set[int] = field(default_factory=set)
+
+
 class SigmaRuleEngine:
     """
     Sigma Rule Engine for detecting security events in logs.
@@ -69,6 +221,21 @@ class SigmaRuleEngine:
         }
         self.total_rules = 0
         
+        # (log_type, rule index, frame columns) -> compiled Polars predicate,
+        # or None for rules that match_batch evaluates row by row
+        self._batch_expr_cache: Dict[tuple, Optional[pl.Expr]] = {}
+        
+        # (lowercased rule value, is |re) -> compiled pattern, or None if
+        # the value is not a valid regex
+        self._patterns: Dict[tuple, Optional[re.Pattern]] = {}
+        
+        # log field name -> dense id used to index LogValues; ids are never
+        # reused, since compiled selections on rules hold them
+        self._field_ids: Dict[str, int] = {}
+        
+        # log_type -> literal prefilter over self.rules[log_type]
+        self._prefilters: Dict[str, RulePrefilter] = {}
+        
         # Field mapping for different log types
         self.field_mappings = {
             'linux': {
@@ -109,30 +276,32 @@ class SigmaRuleEngine:
             print(f"[SigmaEngine] Rules directory not found: {self.rules_dir}")
             return 0
         
-        loaded = 0
+        self._batch_expr_cache.clear()
+        self._prefilters.clear()
         
-        # Load rules by type
-        for log_type in ['Linux', 'Windows', 'Nginx']:
-            type_dir = self.rules_dir / log_type
-            
-            if not type_dir.exists():
-                continue
-            
-            # Find all YAML files
-            for rule_file in type_dir.rglob("*.yml"):
-                # Skip disabled rules
-                if '.disabled' in rule_file.suffix:
-                    continue
-                
+        rule_files = self._rule_files()
+        manifest = []
+        for _, rule_file in rule_files:
+            stat = rule_file.stat()
+            manifest.append((str(rule_file.relative_to(self.rules_dir)), stat.st_mtime_ns, stat.st_size))
+        
+        parsed_rules = self._read_rule_cache(manifest)
+        if parsed_rules is None:
+            parsed_rules = []
+            for rule_type, rule_file in rule_files:
                 try:
                     rule = self._load_rule_file(rule_file)
                     if rule:
-                        rule_type = log_type.lower()
-                        self.rules[rule_type].append(rule)
-                        loaded += 1
+                        parsed_rules.append((rule_type, rule))
                 
                 except Exception as e:
                     print(f"[SigmaEngine] Error loading {rule_file.name}: {e}")
+            
+            self._write_rule_cache(manifest, parsed_rules)
+        
+        for rule_type, rule in parsed_rules:
+            self.rules[rule_type].append(rule)
+        loaded = len(parsed_rules)
         
         self.total_rules = loaded
         print(f"[SigmaEngine] Loaded {loaded} rules:")
@@ -142,10 +311,57 @@ class SigmaRuleEngine:
         
         return loaded
     
+    def _rule_files(self) -> List[Tuple[str, Path]]:
+        """(log type, path) of every rule YAML file, in load order."""
+        rule_files = []
+        
+        # Load rules by type
+        for log_type in ['Linux', 'Windows', 'Nginx']:
+            type_dir = self.rules_dir / log_type
+            
+            if not type_dir.exists():
+                continue
+            
+            # Find all YAML files
+            for rule_file in type_dir.rglob("*.yml"):
+                # Skip disabled rules
+                if '.disabled' in rule_file.suffix:
+                    continue
+                rule_files.append((log_type.lower(), rule_file))
+        
+        return rule_files
+    
+    def _read_rule_cache(self, manifest: list) -> Optional[List[Tuple[str, SigmaRule]]]:
+        """Rules pickled by an earlier load of the same files, or None."""
+        try:
+            with open(self.rules_dir / RULE_CACHE_FILE, 'rb') as f:
+                version, cached_manifest, parsed_rules = pickle.load(f)
+        except Exception:
+            return None
+        
+        if version != RULE_CACHE_VERSION or cached_manifest != manifest:
+            return None
+        return parsed_rules
+    
+    def _write_rule_cache(self, manifest: list, parsed_rules: List[Tuple[str, SigmaRule]]) -> None:
+        """Pickle freshly parsed rules for the next load; best effort."""
+        cache_path = self.rules_dir / RULE_CACHE_FILE
+        temp_path = cache_path.with_name(f"{RULE_CACHE_FILE}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump((RULE_CACHE_VERSION, manifest, parsed_rules), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            print(f"[SigmaEngine] Could not write rule cache: {e}")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+    
     def _load_rule_file(self, rule_file: Path) -> Optional[SigmaRule]:
         """Load a single Sigma rule from YAML file."""
         with open(rule_file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=SafeLoader)
         
         if not data or 'detection' not in data:
             return None
@@ -161,15 +377,114 @@ class SigmaRuleEngine:
             falsepositives=data.get('falsepositives', []),
             references=data.get('references', []),
             author=data.get('author', 'Unknown'),
-            file_path=str(rule_file)
+            file_path=str(rule_file),
+            condition_ast=self._compile_condition(data.get('detection', {}))
         )
     
-    def match_log(self, log_entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _condition(self, rule: SigmaRule) -> Any:
+        """The rule's parsed condition, compiled now if the rule was built elsewhere."""
+        if rule.condition_ast is None:
+            rule.condition_ast = self._compile_condition(rule.detection)
+        return rule.condition_ast
+    
+    def _compile_condition(self, detection: Any) -> Any:
+        """
+        Parse detection['condition'] into SelectionRef/NotNode/AndNode/OrNode.
+        
+        Supports and, or, not and parentheses (not binds tightest, then
+        and); a list of conditions means any of them. Anything else, such
+        as "1 of them" or aggregations, gives an empty OrNode and the rule
+        never matches. Children of and/or nodes are put cheapest first.
+        """
+        condition = detection.get('condition', 'selection') if isinstance(detection, dict) else None
+        conditions = condition if isinstance(condition, list) else [condition]
+        
+        nodes = []
+        for text in conditions:
+            if not isinstance(text, str):
+                continue
+            tokens = CONDITION_TOKEN.findall(text)
+            try:
+                node, end = self._parse_or(tokens, 0)
+            except (IndexError, ValueError):
+                continue
+            if end == len(tokens):
+                nodes.append(node)
+        
+        node = nodes[0] if len(nodes) == 1 else OrNode(nodes)
+        self._order_by_cost(node, detection)
+        return node
+    
+    def _parse_or(self, tokens: List[str], pos: int) -> tuple:
+        """or_expr := and_expr ('or' and_expr)*; returns (node, next position)."""
+        node, pos = self._parse_and(tokens, pos)
+        children = [node]
+        while pos < len(tokens) and tokens[pos].lower() == 'or':
+            node, pos = self._parse_and(tokens, pos + 1)
+            children.append(node)
+        return (children[0] if len(children) == 1 else OrNode(children)), pos
+    
+    def _parse_and(self, tokens: List[str], pos: int) -> tuple:
+        """and_expr := not_expr ('and' not_expr)*"""
+        node, pos = self._parse_not(tokens, pos)
+        children = [node]
+        while pos < len(tokens) and tokens[pos].lower() == 'and':
+            node, pos = self._parse_not(tokens, pos + 1)
+            children.append(node)
+        return (children[0] if len(children) == 1 else AndNode(children)), pos
+    
+    def _parse_not(self, tokens: List[str], pos: int) -> tuple:
+        """not_expr := 'not' not_expr | '(' or_expr ')' | selection name"""
+        token = tokens[pos]
+        if token.lower() == 'not':
+            child, pos = self._parse_not(tokens, pos + 1)
+            return NotNode(child), pos
+        if token == '(':
+            node, pos = self._parse_or(tokens, pos + 1)
+            if tokens[pos] != ')':
+                raise ValueError("expected ')'")
+            return node, pos + 1
+        if token == ')' or token.lower() in ('and', 'or') or not re.fullmatch(r"[\w.-]+", token):
+            raise ValueError(f"unexpected {token!r}")
+        return SelectionRef(token), pos + 1
+    
+    def _order_by_cost(self, node: Any, detection: Any) -> int:
+        """Sort and/or children cheapest first, in place; returns the node's cost."""
+        if isinstance(node, SelectionRef):
+            selection = detection.get(node.name, {}) if isinstance(detection, dict) else {}
+            return self._selection_cost(selection)
+        if isinstance(node, NotNode):
+            return self._order_by_cost(node.child, detection)
+        
+        costs = [self._order_by_cost(child, detection) for child in node.children]
+        order = sorted(range(len(costs)), key=costs.__getitem__)
+        node.children = [node.children[i] for i in order]
+        return sum(costs)
+    
+    def _selection_cost(self, selection: Any) -> int:
+        """Rough cost of evaluating one selection block."""
+        if isinstance(selection, list):
+            return sum(self._selection_cost(item) for item in selection if isinstance(item, dict))
+        if not isinstance(selection, dict):
+            return 0
+        
+        cost = 0
+        for field_name, values in selection.items():
+            modifier = field_name.split('|', 1)[1] if '|' in field_name else None
+            values = values if isinstance(values, list) else [values]
+            for value in values:
+                wildcard = modifier not in BATCH_MODIFIERS and '*' in str(value)
+                cost += REGEX_COST if modifier == 're' or wildcard else MODIFIER_COSTS.get(modifier, 1)
+        return cost
+    
+    def match_log(self, log_entry: Dict[str, Any], timestamp: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Match a log entry against all relevant Sigma rules.
         
         Args:
             log_entry: Parsed log entry with fields
+            timestamp: Alert timestamp shared by a batch of calls
+                (default: now)
         
         Returns:
             List of alerts (rule matches)
@@ -179,15 +494,445 @@ class SigmaRuleEngine:
             return []
         
         alerts = []
+        rules = self.rules[log_type]
+        parsed = self._parsed_data(log_entry)
+        values = LogValues(log_entry, parsed, len(self._field_ids))
         
-        for rule in self.rules[log_type]:
-            if self._evaluate_rule(rule, log_entry, log_type):
-                alert = self._create_alert(rule, log_entry)
+        # Only rules whose literals occur in the log can match
+        for rule_index in self._candidate_rules(log_type, log_entry, parsed, values):
+            rule = rules[rule_index]
+            fast_match = self._compiled(rule, log_type)[2]
+            if fast_match is not None:
+                matched = fast_match(values)
+            else:
+                matched = self._evaluate_rule(rule, log_entry, log_type, parsed, values)
+            if matched:
+                if timestamp is None:
+                    timestamp = now_iso()
+                alert = self._create_alert(rule, log_entry, timestamp)
                 alerts.append(alert)
         
         return alerts
     
-    def _evaluate_rule(self, rule: SigmaRule, log_entry: Dict[str, Any], log_type: str) -> bool:
+    def _parsed_data(self, log_entry: Dict[str, Any]) -> Dict[str, Any]:
+        """log_entry['parsed_data'] decoded once per log; {} if absent or not a JSON object."""
+        if 'parsed_data' not in log_entry:
+            return {}
+        try:
+            parsed = fastjson.loads(log_entry['parsed_data'])
+        except Exception:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+    
+    def _candidate_rules(self, log_type: str, log_entry: Dict[str, Any],
+                         parsed: Dict[str, Any], values: Optional[LogValues] = None) -> List[int]:
+        """Indexes into self.rules[log_type] of rules that may match, in order."""
+        prefilter = self._prefilter(log_type)
+        if not prefilter.literals:
+            candidates = prefilter.always
+        else:
+            candidates = self._literal_candidates(prefilter, log_entry, parsed)
+        
+        if not prefilter.buckets:
+            return candidates
+        
+        # Bucketed rules need one of their values in the log's field
+        if values is None:
+            values = LogValues(log_entry, parsed, len(self._field_ids))
+        allowed = set()
+        for field_id, log_field, value_rules in prefilter.buckets:
+            allowed.update(value_rules.get(values.get(field_id, log_field), ()))
+        bucketed = prefilter.bucketed
+        return [rule_index for rule_index in candidates if rule_index not in bucketed or rule_index in allowed]
+    
+    def _literal_candidates(self, prefilter: RulePrefilter, log_entry: Dict[str, Any],
+                            parsed: Dict[str, Any]) -> List[int]:
+        """Rules whose literals occur somewhere in the log, plus the always ones."""
+        # Every value a selection can compare against, lowercased as
+        # LogValues does: the entry's own fields (raw_line included)
+        # and the values inside parsed_data
+        values = [str(value).lower() for value in log_entry.values() if value is not None]
+        values.extend(str(value).lower() for value in parsed.values() if value is not None)
+        text = PREFILTER_SEPARATOR.join(values)
+        
+        candidates = set(prefilter.always)
+        if prefilter.automaton is not None:
+            for _, literal_index in prefilter.automaton.iter(text):
+                candidates.update(prefilter.literal_rules[literal_index])
+        else:
+            for literal, rule_indexes in zip(prefilter.literals, prefilter.literal_rules):
+                if literal in text:
+                    candidates.update(rule_indexes)
+        return sorted(candidates)
+    
+    def _prefilter(self, log_type: str) -> RulePrefilter:
+        """Literal prefilter for a log type, rebuilt when its rule list is replaced or grows."""
+        rules = self.rules[log_type]
+        prefilter = self._prefilters.get(log_type)
+        if prefilter is not None and prefilter.rules is rules and prefilter.rule_count == len(rules):
+            return prefilter
+        
+        prefilter = RulePrefilter(rules=rules, rule_count=len(rules))
+        positions: Dict[str, int] = {}
+        for rule_index, rule in enumerate(rules):
+            literals = self._rule_literals(rule)
+            if literals is None:
+                prefilter.always.append(rule_index)
+                continue
+            # An empty set means the rule can never match: skip it outright
+            for literal in literals:
+                if literal not in positions:
+                    positions[literal] = len(prefilter.literals)
+                    prefilter.literals.append(literal)
+                    prefilter.literal_rules.append([])
+                prefilter.literal_rules[positions[literal]].append(rule_index)
+        
+        if ahocorasick is not None and prefilter.literals:
+            automaton = ahocorasick.Automaton()
+            for literal_index, literal in enumerate(prefilter.literals):
+                automaton.add_word(literal, literal_index)
+            automaton.make_automaton()
+            prefilter.automaton = automaton
+        
+        buckets: Dict[int, Tuple[str, Dict[str, List[int]]]] = {}
+        for rule_index, rule in enumerate(rules):
+            requirement = self._condition_requirement(self._condition(rule), self._selections(rule, log_type))
+            if requirement is None:
+                continue
+            field_id, log_field, rule_values = requirement
+            value_rules = buckets.setdefault(field_id, (log_field, {}))[1]
+            for value in rule_values:
+                value_rules.setdefault(value, []).append(rule_index)
+            prefilter.bucketed.add(rule_index)
+        prefilter.buckets = [(field_id, log_field, value_rules)
+                             for field_id, (log_field, value_rules) in buckets.items()]
+        
+        self._prefilters[log_type] = prefilter
+        return prefilter
+    
+    def _condition_requirement(self, node: Any,
+                               selections: Dict[str, list]) -> Optional[Tuple[int, str, FrozenSet[str]]]:
+        """
+        A field every log matching node has one of a few exact values in.
+        
+        Returns (field id, log field, lowercased values) from equality-only
+        fields, or None if the condition does not pin any field down.
+        """
+        if isinstance(node, SelectionRef):
+            return self._selection_requirement(selections.get(node.name, ()))
+        
+        if isinstance(node, NotNode):
+            return None
+        
+        if isinstance(node, AndNode):
+            # Every child must match: any child's requirement holds
+            for child in node.children:
+                requirement = self._condition_requirement(child, selections)
+                if requirement is not None:
+                    return requirement
+            return None
+        
+        # Any child may match: all of them must pin the same field
+        requirements = [self._condition_requirement(child, selections) for child in node.children]
+        if not requirements or None in requirements:
+            return None
+        field_id, log_field, _ = requirements[0]
+        if any(requirement[0] != field_id for requirement in requirements):
+            return None
+        return field_id, log_field, frozenset().union(*(requirement[2] for requirement in requirements))
+    
+    def _selection_requirement(self, alternatives: list) -> Optional[Tuple[int, str, FrozenSet[str]]]:
+        """_condition_requirement for one compiled selection block."""
+        if not alternatives:
+            return None
+        
+        # Equality-only fields of each alternative; a field shared by all of
+        # them is required, with any alternative's values
+        found = []
+        for fields in alternatives:
+            exact: Dict[int, Tuple[str, FrozenSet[str]]] = {}
+            for field_id, log_field, matchers in fields:
+                if field_id not in exact and all(kind == 'equals' for kind, _ in matchers):
+                    exact[field_id] = (log_field, frozenset(operand for _, operand in matchers))
+            found.append(exact)
+        
+        for field_id, (log_field, rule_values) in found[0].items():
+            if all(field_id in exact for exact in found[1:]):
+                return field_id, log_field, rule_values.union(*(exact[field_id][1] for exact in found[1:]))
+        return None
+    
+    def _rule_literals(self, rule: SigmaRule) -> Optional[FrozenSet[str]]:
+        """
+        Lowercased literals one of which every log matching the rule contains.
+        
+        None when the rule has no such literals (|re, wildcards, not) and
+        must always be evaluated; an empty set when it can never match.
+        """
+        if not isinstance(rule.detection, dict):
+            return None
+        return self._condition_literals(self._condition(rule), rule.detection)
+    
+    def _condition_literals(self, node: Any, detection: Dict[str, Any]) -> Optional[FrozenSet[str]]:
+        """_rule_literals for one condition node."""
+        if isinstance(node, SelectionRef):
+            return self._selection_literals(detection.get(node.name, {}))
+        
+        if isinstance(node, NotNode):
+            return None
+        
+        if isinstance(node, AndNode):
+            # Every child must match: one child's literals are enough
+            return self._most_selective([self._condition_literals(child, detection) for child in node.children])
+        
+        # Any child may match: every child needs literals
+        found = set()
+        for child in node.children:
+            literals = self._condition_literals(child, detection)
+            if literals is None:
+                return None
+            found.update(literals)
+        return frozenset(found)
+    
+    def _selection_literals(self, selection: Any) -> Optional[FrozenSet[str]]:
+        """_rule_literals for one selection block."""
+        if not selection:
+            return frozenset()
+        
+        if isinstance(selection, list):
+            found = set()
+            for item in selection:
+                if isinstance(item, dict):
+                    literals = self._selection_literals(item)
+                    if literals is None:
+                        return None
+                    found.update(literals)
+            return frozenset(found)
+        
+        if not isinstance(selection, dict):
+            return frozenset()
+        
+        # Every field must match, so any one field's values will do
+        options = []
+        for field_name, values in selection.items():
+            modifier = field_name.split('|', 1)[1] if '|' in field_name else None
+            if modifier == 're':
+                continue
+            
+            values = values if isinstance(values, list) else [values]
+            literals = frozenset(str(value).lower() for value in values)
+            if not literals:
+                return frozenset()
+            
+            # '*' is a wildcard unless a substring modifier is set
+            if '' in literals or (modifier not in BATCH_MODIFIERS and any('*' in value for value in literals)):
+                continue
+            options.append(literals)
+        
+        return self._most_selective(options)
+    
+    def _most_selective(self, options: List[Optional[FrozenSet[str]]]) -> Optional[FrozenSet[str]]:
+        """Of several literal sets that all must hold, the one with the longest shortest literal."""
+        options = [literals for literals in options if literals is not None]
+        if not options:
+            return None
+        if not all(options):
+            # One part can never match, so neither can the whole
+            return frozenset()
+        return max(options, key=lambda literals: min(map(len, literals)))
+    
+    def match_logs(self, log_entries: List[Dict[str, Any]],
+                   timestamp: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Match many log entries at once; same alerts as calling match_log on
+        each entry in turn, in the same order.
+        
+        Args:
+            log_entries: Log entries with the same keys (id, log_type, raw_line, ...)
+            timestamp: Timestamp for every alert (default: now)
+        
+        Returns:
+            List of alerts for the whole batch
+        """
+        if not log_entries:
+            return []
+        
+        # match_batch evaluates every rule row by row when entries carry
+        # parsed_data, so the frame would only add overhead
+        if any('parsed_data' in entry for entry in log_entries):
+            return [alert for entry in log_entries for alert in self.match_log(entry, timestamp)]
+        
+        df = pl.DataFrame(log_entries, infer_schema_length=None)
+        matches = self.match_batch(df)
+        
+        if timestamp is None:
+            timestamp = now_iso()
+        return [
+            self._create_alert(self.rules[log_type][rule_index], log_entries[row], timestamp)
+            for row, log_type, rule_index in matches.iter_rows()
+        ]
+    
+    def match_batch(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Evaluate all rules over a DataFrame of log entries.
+        
+        Each rule's selections are compiled once into Polars boolean
+        expressions and run over whole columns. Rules using the |re modifier
+        or '*' wildcards (Python regex semantics) are evaluated row by row,
+        as is every rule when the frame carries a parsed_data column; rows
+        only try the rules match_log's prefilter leaves for them.
+        
+        Args:
+            df: One row per log entry; needs log_type and raw_line columns
+        
+        Returns:
+            DataFrame of matches with columns row (position in df),
+            log_type and rule_index (position in self.rules[log_type]),
+            ordered by row then rule_index
+        """
+        schema = {'row': pl.UInt32, 'log_type': pl.Utf8, 'rule_index': pl.UInt32}
+        if df.is_empty() or 'log_type' not in df.columns:
+            return pl.DataFrame(schema=schema)
+        
+        columns = frozenset(df.columns)
+        row_only = 'parsed_data' in columns
+        indexed = df.with_row_index('row')
+        
+        found = []
+        for log_type, rules in self.rules.items():
+            if not rules:
+                continue
+            subset = indexed.filter(pl.col('log_type') == log_type)
+            if subset.is_empty():
+                continue
+            
+            exprs = {}
+            row_rules = []
+            for rule_index, rule in enumerate(rules):
+                expr = None if row_only else self._batch_expr(log_type, rule_index, rule, columns)
+                if expr is None:
+                    row_rules.append(rule_index)
+                else:
+                    exprs[f"rule_{rule_index}"] = expr
+            
+            if exprs:
+                hits = subset.lazy().select(pl.col('row'), **exprs).collect()
+                for name in exprs:
+                    rule_index = int(name[len("rule_"):])
+                    for row in hits.filter(pl.col(name)).get_column('row'):
+                        found.append((row, log_type, rule_index))
+            
+            if row_rules:
+                row_rule_set = set(row_rules)
+                for entry in subset.iter_rows(named=True):
+                    parsed = self._parsed_data(entry)
+                    values = LogValues(entry, parsed, len(self._field_ids))
+                    for rule_index in self._candidate_rules(log_type, entry, parsed, values):
+                        if rule_index not in row_rule_set:
+                            continue
+                        if self._evaluate_rule(rules[rule_index], entry, log_type, values=values):
+                            found.append((entry['row'], log_type, rule_index))
+        
+        found.sort(key=lambda match: (match[0], match[2]))
+        return pl.DataFrame(found, schema=schema, orient='row')
+    
+    def _batch_expr(self, log_type: str, rule_index: int, rule: SigmaRule,
+                    columns: frozenset) -> Optional[pl.Expr]:
+        """Cached Polars predicate for a rule, or None if it needs per-row matching."""
+        key = (log_type, rule_index, columns)
+        if key not in self._batch_expr_cache:
+            if self._needs_row_matching(rule.detection):
+                self._batch_expr_cache[key] = None
+            else:
+                self._batch_expr_cache[key] = self._rule_expr(rule, log_type, columns)
+        return self._batch_expr_cache[key]
+    
+    def _needs_row_matching(self, detection: Any) -> bool:
+        """True if any selection uses |re or a '*' wildcard value."""
+        if isinstance(detection, list):
+            return any(self._needs_row_matching(item) for item in detection)
+        if not isinstance(detection, dict):
+            return False
+        
+        for field, values in detection.items():
+            if isinstance(values, (dict, list)) and self._needs_row_matching(values):
+                return True
+            modifier = field.split('|', 1)[1] if '|' in field else None
+            if modifier == 're':
+                return True
+            if modifier not in BATCH_MODIFIERS:
+                for value in (values if isinstance(values, list) else [values]):
+                    if '*' in str(value):
+                        return True
+        return False
+    
+    def _rule_expr(self, rule: SigmaRule, log_type: str, columns: frozenset) -> pl.Expr:
+        """Polars counterpart of _evaluate_rule."""
+        return self._condition_expr(self._condition(rule), rule.detection, log_type, columns)
+    
+    def _condition_expr(self, node: Any, detection: Dict[str, Any], log_type: str,
+                        columns: frozenset) -> pl.Expr:
+        """Polars counterpart of _evaluate_condition."""
+        if isinstance(node, SelectionRef):
+            return self._selection_expr(detection.get(node.name, {}), log_type, columns)
+        if isinstance(node, NotNode):
+            return ~self._condition_expr(node.child, detection, log_type, columns)
+        
+        children = [self._condition_expr(child, detection, log_type, columns) for child in node.children]
+        if isinstance(node, AndNode):
+            return pl.all_horizontal(children)
+        return pl.any_horizontal(children) if children else pl.lit(False)
+    
+    def _selection_expr(self, selection: Any, log_type: str, columns: frozenset) -> pl.Expr:
+        """Polars counterpart of _evaluate_selection; never null."""
+        if not selection:
+            return pl.lit(False)
+        
+        if isinstance(selection, list):
+            items = [
+                self._selection_expr(item, log_type, columns)
+                for item in selection if isinstance(item, dict)
+            ]
+            return pl.any_horizontal(items) if items else pl.lit(False)
+        
+        if not isinstance(selection, dict):
+            return pl.lit(False)
+        
+        field_map = self.field_mappings.get(log_type, {})
+        
+        conditions = []
+        for field, values in selection.items():
+            modifier = None
+            if '|' in field:
+                field, modifier = field.split('|', 1)
+            
+            # Same lookup as per-row: the mapped field, else the raw line
+            log_field = field_map.get(field, field.lower())
+            if log_field in columns and log_field != 'raw_line':
+                log_value = pl.coalesce(pl.col(log_field).cast(pl.Utf8), pl.col('raw_line'))
+            else:
+                log_value = pl.col('raw_line')
+            log_value = log_value.str.to_lowercase()
+            
+            values = values if isinstance(values, list) else [values]
+            matches = [self._value_expr(log_value, str(value).lower(), modifier) for value in values]
+            conditions.append(pl.any_horizontal(matches) if matches else pl.lit(False))
+        
+        # A missing value fails the whole selection, as in _evaluate_selection
+        return pl.all_horizontal(conditions).fill_null(False)
+    
+    def _value_expr(self, log_value: pl.Expr, rule_value: str, modifier: Optional[str]) -> pl.Expr:
+        """Polars counterpart of _match_value for non-regex values."""
+        if modifier == 'contains':
+            return log_value.str.contains(rule_value, literal=True)
+        elif modifier == 'startswith':
+            return log_value.str.starts_with(rule_value)
+        elif modifier == 'endswith':
+            return log_value.str.ends_with(rule_value)
+        return log_value == rule_value
+    
+    def _evaluate_rule(self, rule: SigmaRule, log_entry: Dict[str, Any], log_type: str,
+                       parsed: Optional[Dict[str, Any]] = None,
+                       values: Optional[LogValues] = None) -> bool:
         """
         Evaluate if a log entry matches a Sigma rule.
         
@@ -195,83 +940,121 @@ class SigmaRuleEngine:
             rule: Sigma rule to evaluate
             log_entry: Log entry to check
             log_type: Type of log (linux/windows/nginx)
+            parsed: The entry's decoded parsed_data, if the caller has it
+            values: LogValues shared by every rule matched against the entry
         
         Returns:
             True if rule matches
         """
-        detection = rule.detection
-        
-        # Get condition (default to 'selection')
-        condition = detection.get('condition', 'selection')
-        
-        # Simple condition evaluation (supports: selection, selection and not filter)
-        if condition == 'selection':
-            return self._evaluate_selection(detection.get('selection', {}), log_entry, log_type)
-        
-        elif 'and not' in condition:
-            # Example: "selection and not filter"
-            parts = condition.split(' and not ')
-            if len(parts) == 2:
-                selection_match = self._evaluate_selection(
-                    detection.get(parts[0].strip(), {}),
-                    log_entry,
-                    log_type
-                )
-                filter_match = self._evaluate_selection(
-                    detection.get(parts[1].strip(), {}),
-                    log_entry,
-                    log_type
-                )
-                return selection_match and not filter_match
-        
-        elif 'or' in condition:
-            # Example: "selection1 or selection2"
-            parts = condition.split(' or ')
-            for part in parts:
-                part = part.strip()
-                if self._evaluate_selection(detection.get(part, {}), log_entry, log_type):
-                    return True
-            return False
+        selections = self._selections(rule, log_type)
+        if values is None:
+            if parsed is None:
+                parsed = self._parsed_data(log_entry)
+            values = LogValues(log_entry, parsed, len(self._field_ids))
+        return self._evaluate_condition(self._condition(rule), selections, values)
+    
+    def _evaluate_condition(self, node: Any, selections: Dict[str, list], values: "LogValues") -> bool:
+        """Evaluate a parsed condition, short-circuiting and/or."""
+        if isinstance(node, SelectionRef):
+            return self._evaluate_selection(selections.get(node.name, ()), values)
         
-        elif 'and' in condition:
-            # Example: "selection1 and selection2"
-            parts = condition.split(' and ')
-            for part in parts:
-                part = part.strip()
-                if not self._evaluate_selection(detection.get(part, {}), log_entry, log_type):
+        if isinstance(node, NotNode):
+            return not self._evaluate_condition(node.child, selections, values)
+        
+        if isinstance(node, AndNode):
+            for child in node.children:
+                if not self._evaluate_condition(child, selections, values):
                     return False
             return True
         
+        for child in node.children:
+            if self._evaluate_condition(child, selections, values):
+                return True
         return False
     
-    def _evaluate_selection(self, selection: Dict[str, Any], log_entry: Dict[str, Any], log_type: str) -> bool:
+    def _selections(self, rule: SigmaRule, log_type: str) -> Dict[str, list]:
+        """The rule's detection blocks compiled for log_type, cached on the rule."""
+        return self._compiled(rule, log_type)[1]
+    
+    def _compiled(self, rule: SigmaRule, log_type: str) -> tuple:
+        """rule.compiled_selections for log_type, compiling it if needed."""
+        compiled = rule.compiled_selections
+        if compiled is None or compiled[0] != log_type:
+            detection = rule.detection if isinstance(rule.detection, dict) else {}
+            selections = {
+                name: self._compile_selection(selection, log_type)
+                for name, selection in detection.items() if name != 'condition'
+            }
+            compiled = (log_type, selections, self._fast_matcher(self._condition(rule), selections))
+            rule.compiled_selections = compiled
+        return compiled
+    
+    @staticmethod
+    def _fast_matcher(node: Any, selections: Dict[str, list]) -> Optional[Callable[[LogValues], bool]]:
         """
-        Evaluate a selection block against log entry.
+        A closure for rules that test one field for equality or substrings.
         
-        Args:
-            selection: Selection criteria from rule (can be dict or list)
-            log_entry: Log entry to check
-            log_type: Type of log for field mapping
+        Covers the common 'condition: selection' rule whose selection has a
+        single field and only plain or |contains values; match_log calls it
+        instead of walking the condition. None for any other shape.
+        """
+        if not isinstance(node, SelectionRef):
+            return None
+        alternatives = selections.get(node.name, ())
+        if len(alternatives) != 1 or len(alternatives[0]) != 1:
+            return None
         
-        Returns:
-            True if all selection criteria match
+        (field_id, log_field, matchers), = alternatives[0]
+        kinds = {kind for kind, _ in matchers}
+        
+        if kinds == {'equals'}:
+            accepted = frozenset(operand for _, operand in matchers)
+            
+            def match_equals(values: LogValues) -> bool:
+                return values.get(field_id, log_field) in accepted
+            return match_equals
+        
+        if kinds == {'contains'}:
+            literals = tuple(operand for _, operand in matchers)
+            
+            def match_contains(values: LogValues) -> bool:
+                log_value = values.get(field_id, log_field)
+                if log_value is None:
+                    return False
+                for literal in literals:
+                    if literal in log_value:
+                        return True
+                return False
+            return match_contains
+        
+        return None
+    
+    def _compile_selection(self, selection: Any, log_type: str) -> list:
+        """
+        Compile a selection block (dict, or list of dicts meaning any of them).
+        
+        Returns a list of alternatives, any of which may match; each is a
+        tuple of (field id, log field, matchers) that must all match, where
+        matchers are the field's (kind, operand) values from _matcher. An
+        empty list never matches.
         """
         if not selection:
-            return False
+            return []
         
         # Handle list of selections (OR logic between list items)
         if isinstance(selection, list):
+            alternatives = []
             for item in selection:
-                if isinstance(item, dict) and self._evaluate_selection(item, log_entry, log_type):
-                    return True
-            return False
+                if isinstance(item, dict):
+                    alternatives.extend(self._compile_selection(item, log_type))
+            return alternatives
         
-        # Handle dict selection
         if not isinstance(selection, dict):
-            return False
+            return []
         
         field_map = self.field_mappings.get(log_type, {})
         
+        fields = []
         for field, values in selection.items():
             # Handle field modifiers (e.g., |contains, |startswith, |endswith)
             modifier = None
@@ -281,95 +1064,189 @@ class SigmaRuleEngine:
             # Map Sigma field to log field
             log_field = field_map.get(field, field.lower())
             
-            # Get value from log entry or parsed_data
-            log_value = log_entry.get(log_field)
-            
-            # Try parsed_data if field not found
-            if log_value is None and 'parsed_data' in log_entry:
-                try:
-                    import json
-                    parsed = json.loads(log_entry['parsed_data'])
-                    log_value = parsed.get(log_field)
-                except:
-                    pass
-            
-            # Also try raw_line for text matching
-            if log_value is None:
-                log_value = log_entry.get('raw_line', '')
-            
-            if log_value is None:
-                return False
-            
-            # Convert to string for matching
-            log_value_str = str(log_value)
-            
-            # Check if values match
-            if isinstance(values, list):
-                # List of values (OR logic)
-                matched = False
-                for value in values:
-                    if self._match_value(log_value_str, str(value), modifier):
-                        matched = True
+            # List of values (OR logic) or a single value
+            values = values if isinstance(values, list) else [values]
+            field_id = self._field_ids.setdefault(log_field, len(self._field_ids))
+            fields.append((field_id, log_field, tuple(self._matcher(str(value).lower(), modifier) for value in values)))
+        
+        return [tuple(fields)]
+    
+    def _matcher(self, rule_value: str, modifier: Optional[str]) -> Tuple[str, Any]:
+        """
+        Classify a lowercased rule value by how _match_value tests it.
+        
+        Returns (kind, operand): 'contains', 'startswith', 'endswith' and
+        'equals' take a string, 'regex' a compiled pattern (None if it does
+        not compile), 'literal_regex' a (required substring, pattern) pair.
+        Wildcards shaped 'x*', '*x' or '*x*' become string methods; any
+        other wildcard keeps its regex. Either way '*' spans newlines, so
+        multi-line values match the same under both.
+        """
+        if modifier in BATCH_MODIFIERS:
+            return modifier, rule_value
+        if modifier == 're':
+            return self._regex_matcher(rule_value, True)
+        if '*' not in rule_value:
+            return 'equals', rule_value
+        
+        literal = rule_value.strip('*')
+        if REGEX_METACHARACTERS.isdisjoint(literal):
+            if rule_value[0] == '*' and rule_value[-1] == '*':
+                return 'contains', literal
+            if rule_value[0] == '*':
+                return 'endswith', literal
+            return 'startswith', literal
+        return self._regex_matcher(rule_value, False)
+    
+    def _regex_matcher(self, rule_value: str, is_regex: bool) -> Tuple[str, Any]:
+        """
+        _matcher for a |re or wildcard value.
+        
+        If every match must contain some literal text, the pattern only runs
+        on values containing it (the literal-first screening multi-pattern
+        engines such as Hyperscan do before their automata).
+        """
+        pattern = self._pattern(rule_value, is_regex)
+        if pattern is None:
+            return 'regex', None
+        
+        literal = self._required_literal(pattern)
+        if len(literal) < REGEX_LITERAL_MIN_LENGTH:
+            return 'regex', pattern
+        return 'literal_regex', (literal, pattern)
+    
+    @staticmethod
+    def _required_literal(pattern: re.Pattern) -> str:
+        """
+        Longest lowercased run of ASCII text every match of pattern contains.
+        
+        Only top-level literal characters count; groups, classes, repeats,
+        anchors and alternations end a run. '' if there is none.
+        """
+        try:
+            items = regex_parser.parse(pattern.pattern, pattern.flags)
+        except Exception:
+            return ''
+        
+        longest = run = ''
+        for opcode, argument in items:
+            if opcode is regex_parser.LITERAL and argument < 128:
+                run += chr(argument).lower()
+                if len(run) > len(longest):
+                    longest = run
+            else:
+                run = ''
+        return longest
+    
+    def _evaluate_selection(self, alternatives: list, values: "LogValues") -> bool:
+        """
+        Evaluate a compiled selection block against a log entry.
+        
+        Args:
+            alternatives: Output of _compile_selection
+            values: The log entry's lowercased field values
+        
+        Returns:
+            True if every field of some alternative matches
+        """
+        for fields in alternatives:
+            for field_id, log_field, matchers in fields:
+                log_value = values.get(field_id, log_field)
+                if log_value is None:
+                    break
+                
+                # Check if values match (any of them)
+                for kind, operand in matchers:
+                    if self._match_value(log_value, kind, operand):
                         break
-                if not matched:
-                    return False
+                else:
+                    break
             else:
-                # Single value
-                if not self._match_value(log_value_str, str(values), modifier):
-                    return False
+                return True
         
-        return True
+        return False
     
-    def _match_value(self, log_value: str, rule_value: str, modifier: Optional[str] = None) -> bool:
+    @staticmethod
+    def _match_value(log_value: str, kind: str, operand: Any) -> bool:
         """
-        Match a log value against a rule value with optional modifier.
+        Match a lowercased log value against one classified rule value.
         
         Args:
-            log_value: Value from log entry
-            rule_value: Value from rule
-            modifier: Optional modifier (contains, startswith, endswith, re)
+            log_value: Value from log entry, lowercased
+            kind: Match kind from _matcher
+            operand: Lowercased rule value, or pattern operand for 'regex'
+                and 'literal_regex'
         
         Returns:
             True if values match
         """
-        log_value = log_value.lower()
-        rule_value = rule_value.lower()
-        
-        if modifier == 'contains':
-            return rule_value in log_value
-        elif modifier == 'startswith':
-            return log_value.startswith(rule_value)
-        elif modifier == 'endswith':
-            return log_value.endswith(rule_value)
-        elif modifier == 're':
-            try:
-                return bool(re.search(rule_value, log_value, re.IGNORECASE))
-            except:
+        if kind == 'equals':
+            return log_value == operand
+        elif kind == 'contains':
+            return operand in log_value
+        elif kind == 'startswith':
+            return log_value.startswith(operand)
+        elif kind == 'endswith':
+            return log_value.endswith(operand)
+        elif kind == 'literal_regex':
+            literal, pattern = operand
+            # IGNORECASE can match non-ASCII text against an ASCII literal,
+            # so only ASCII values may be ruled out by the substring test
+            if literal not in log_value and log_value.isascii():
                 return False
+            return pattern.search(log_value) is not None
         else:
-            # Exact match or wildcard
-            if '*' in rule_value:
-                pattern = rule_value.replace('*', '.*')
-                try:
-                    return bool(re.search(f'^{pattern}$', log_value, re.IGNORECASE))
-                except:
-                    return False
-            else:
-                return log_value == rule_value
+            return operand is not None and operand.search(log_value) is not None
+    
+    def _pattern(self, rule_value: str, is_regex: bool) -> Optional[re.Pattern]:
+        """
+        Compiled pattern for a lowercased |re or wildcard rule value.
+        
+        Compiled once per distinct value instead of on every match; None
+        (also cached) when the value is not a valid regex.
+        """
+        key = (rule_value, is_regex)
+        try:
+            return self._patterns[key]
+        except KeyError:
+            pass
+        
+        if is_regex:
+            source, flags = rule_value, re.IGNORECASE
+        else:
+            # Whole-value match where '*' may cross newlines, like the
+            # string methods _matcher picks for simple wildcards
+            source = rf"\A{rule_value.replace('*', '.*')}\Z"
+            flags = re.IGNORECASE | re.DOTALL
+        try:
+            pattern = re.compile(source, flags)
+        except Exception:
+            pattern = None
+        
+        if len(self._patterns) >= PATTERN_CACHE_SIZE:
+            self._patterns.clear()
+        self._patterns[key] = pattern
+        return pattern
     
-    def _create_alert(self, rule: SigmaRule, log_entry: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_alert(self, rule: SigmaRule, log_entry: Dict[str, Any], timestamp: str) -> Dict[str, Any]:
         """
         Create an alert from a rule match.
         
         Args:
             rule: Matched Sigma rule
             log_entry: Log entry that matched
+            timestamp: Alert timestamp (ISO format)
         
         Returns:
             Alert dictionary
         """
+        # Entries loaded from the database may carry raw_line=None
+        raw_line = log_entry.get('raw_line') or ''
+        if len(raw_line) > ALERT_RAW_LINE_CHARS:
+            raw_line = raw_line[:ALERT_RAW_LINE_CHARS]
+        
         return {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'alert_id': f"{rule.id}_{log_entry.get('id', 'unknown')}",
             'rule_id': rule.id,
             'rule_title': rule.title,
@@ -379,7 +1256,7 @@ class SigmaRuleEngine:
             'log_type': log_entry.get('log_type'),
             'hostname': log_entry.get('hostname'),
             'ip_address': log_entry.get('ip_address'),
-            'raw_line': log_entry.get('raw_line', '')[:500],  # Truncate
+            'raw_line': raw_line,
             'matched_fields': self._extract_matched_fields(log_entry),
             'false_positives': rule.falsepositives,
             'references': rule.references
@@ -387,15 +1264,7 @@ class SigmaRuleEngine:
     
     def _extract_matched_fields(self, log_entry: Dict[str, Any]) -> Dict[str, Any]:
         """Extract relevant fields from log entry for alert."""
-        fields = {}
-        
-        # Common fields to include
-        for key in ['timestamp', 'hostname', 'program', 'message', 
-                    'event_id', 'channel', 'method', 'path', 'status_code']:
-            if key in log_entry:
-                fields[key] = log_entry[key]
-        
-        return fields
+        return {key: log_entry[key] for key in MATCHED_FIELDS if key in log_entry}
     
     def get_stats(self) -> Dict[str, Any]:
         """Get rule engine statistics."""
@@ -16,10 +16,26 @@ from datetime import datetime
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from src.db.setup import SessionLocal
+from sqlalchemy.orm import Session
+
+from src.db.setup import SessionLocal, engine as db_engine
 from src.db.models import LogEntry, LinuxLogDetails, WindowsLogDetails, NginxLogDetails, Server
-from src.db.repository.alert_repo import create_alert
+from src.db.repository.alert_repo import create_alerts_bulk
 from src.workers.sigma_rule_engine import SigmaRuleEngine
+from src.utils.clock import now_iso
+
+# Batches with at least this many logs are matched in one
+# SigmaRuleEngine.match_logs call (Polars, spread over all cores); below
+# it the fixed cost of building the frame outweighs per-log matching
+BATCH_MATCH_MIN_LOGS = 1000
+
+# Poll size after a full batch: while there is a backlog the worker reads
+# this many logs at once, so catch-up runs take the match_logs path
+# (batch_size alone is usually far below BATCH_MATCH_MIN_LOGS)
+BACKLOG_POLL_LOGS = 5000
+
+# Seconds between data_version checks while waiting for new logs
+WAKE_CHECK_INTERVAL = 0.2
 
 
 class SigmaRuleWorker:
@@ -51,11 +67,21 @@ class SigmaRuleWorker:
         self.rules_dir = rules_dir
         self.poll_interval = poll_interval
         self.batch_size = batch_size
+        # Logs the next poll asks for: batch_size, or BACKLOG_POLL_LOGS
+        # right after a full batch
+        self._poll_limit = batch_size
         
         self.engine: Optional[SigmaRuleEngine] = None
         
+        # One session for the worker's lifetime, opened by _session()
+        self._db: Optional[Session] = None
+        
         self.running = False
         self._thread: Optional[threading.Thread] = None
+        
+        # Set after every batch that processed logs, and when the worker
+        # stops, so callers can wait for progress instead of polling stats
+        self.progress_event = threading.Event()
         self._last_processed_id = 0
         self._start_time: Optional[datetime] = None
         
@@ -105,18 +131,29 @@ class SigmaRuleWorker:
             self.running = True
             self.stats['started_at'] = datetime.now().isoformat()
             
+            # data_version on this connection moves when any other
+            # connection (the ingestion or parser worker) commits
+            watcher = db_engine.connect()
+            version = self._data_version(watcher)
+            
             print("[SigmaWorker] Running...")
             
-            while self.running:
-                # Process batch of logs
-                processed = self._process_batch()
-                
-                if processed > 0:
-                    print(f"[SigmaWorker] Processed {processed} logs, "
-                          f"{self.stats['alerts_generated']} total alerts")
-                
-                # Sleep before next poll
-                time.sleep(self.poll_interval)
+            try:
+                while self.running:
+                    # Process batch of logs
+                    processed = self._process_batch()
+                    
+                    if processed > 0:
+                        print(f"[SigmaWorker] Processed {processed} logs, "
+                              f"{self.stats['alerts_generated']} total alerts")
+                        self.progress_event.set()
+                    
+                    # A full batch means more are waiting; otherwise sleep
+                    # until something new is committed
+                    if processed < self.batch_size:
+                        version = self._wait_for_commit(watcher, version)
+            finally:
+                watcher.close()
         
         except KeyboardInterrupt:
             print("\n[SigmaWorker] Interrupted")
@@ -128,8 +165,45 @@ class SigmaRuleWorker:
         
         finally:
             self.running = False
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self.progress_event.set()
             print("[SigmaWorker] Stopped")
     
+    @staticmethod
+    def _data_version(conn) -> int:
+        """PRAGMA data_version: bumped by every commit from another connection."""
+        return conn.exec_driver_sql("PRAGMA data_version").scalar()
+    
+    def _wait_for_commit(self, conn, version: int) -> int:
+        """
+        Wait up to poll_interval for another connection to commit.
+        
+        Returns early on a commit (or stop()), so alerts follow new logs
+        within WAKE_CHECK_INTERVAL instead of a full poll_interval.
+        
+        Returns:
+            The data_version to pass to the next call
+        """
+        deadline = time.monotonic() + self.poll_interval
+        while self.running:
+            current = self._data_version(conn)
+            if current != version:
+                return current
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return current
+            time.sleep(min(WAKE_CHECK_INTERVAL, remaining))
+        return version
+    
+    def _session(self) -> Session:
+        """The worker's long-lived session, created on first use."""
+        if self._db is None:
+            self._db = SessionLocal()
+        return self._db
+    
     def _get_latest_log_id(self) -> int:
         """
         Get the latest log ID from database to start processing from.
@@ -138,12 +212,13 @@ class SigmaRuleWorker:
         Returns:
             Latest log ID, or 0 if no logs exist
         """
-        db = SessionLocal()
+        db = self._session()
         try:
             result = db.query(LogEntry.id).order_by(LogEntry.id.desc()).first()
             return result[0] if result else 0
         finally:
-            db.close()
+            # End the read transaction so later reads see new commits
+            db.rollback()
     
     def _process_batch(self) -> int:
         """
@@ -153,21 +228,44 @@ class SigmaRuleWorker:
             Number of logs processed
         """
         # Get unprocessed logs
-        logs = self._get_unprocessed_logs()
+        limit = self._poll_limit
+        logs = self._get_unprocessed_logs(limit)
+        
+        # A full page means more are waiting: read a bigger page next time
+        self._poll_limit = max(self.batch_size, BACKLOG_POLL_LOGS) if len(logs) >= limit else self.batch_size
         
         if not logs:
             return 0
         
+        # One alert timestamp for the whole batch
+        timestamp = now_iso()
+        
+        if len(logs) >= BATCH_MATCH_MIN_LOGS:
+            try:
+                alerts = self.engine.match_logs(logs, timestamp)
+            except Exception as e:
+                print(f"[SigmaWorker] Error matching {len(logs)} logs, retrying one by one: {e}")
+            else:
+                if alerts:
+                    self._store_alerts(alerts)
+                    self.stats['alerts_generated'] += len(alerts)
+                    self.stats['rules_matched'] += len(alerts)
+                
+                self._last_processed_id = max(self._last_processed_id, max(log['id'] for log in logs))
+                self.stats['logs_processed'] += len(logs)
+                return len(logs)
+        
         processed = 0
+        batch_alerts = []
         
         for log in logs:
             try:
                 # Match against Sigma rules
-                alerts = self.engine.match_log(log)
+                alerts = self.engine.match_log(log, timestamp)
                 
-                # Store alerts
+                # Stored together after the loop
                 if alerts:
-                    self._store_alerts(alerts)
+                    batch_alerts.extend(alerts)
                     self.stats['alerts_generated'] += len(alerts)
                     self.stats['rules_matched'] += len(alerts)
                 
@@ -183,29 +281,39 @@ class SigmaRuleWorker:
                 traceback.print_exc()
                 self.stats['errors'] += 1
         
+        if batch_alerts:
+            self._store_alerts(batch_alerts)
+        
         return processed
     
-    def _get_unprocessed_logs(self) -> List[Dict[str, Any]]:
+    def _get_unprocessed_logs(self, limit: int) -> List[Dict[str, Any]]:
         """
         Get batch of logs that haven't been processed yet using repository pattern.
         
+        Args:
+            limit: Maximum number of logs to return
+        
         Returns:
             List of log entries as dictionaries
         """
-        db = SessionLocal()
+        db = self._session()
         try:
-            # Query unprocessed logs with server info
+            # One query for the batch: each entry with its server and
+            # whichever details row it has (at most one per table)
             log_entries = (
-                db.query(LogEntry, Server)
-                .join(Server, LogEntry.server_id == Server.id, isouter=True)
+                db.query(LogEntry, Server, LinuxLogDetails, WindowsLogDetails, NginxLogDetails)
+                .outerjoin(Server, LogEntry.server_id == Server.id)
+                .outerjoin(LinuxLogDetails, LinuxLogDetails.log_entry_id == LogEntry.id)
+                .outerjoin(WindowsLogDetails, WindowsLogDetails.log_entry_id == LogEntry.id)
+                .outerjoin(NginxLogDetails, NginxLogDetails.log_entry_id == LogEntry.id)
                 .filter(LogEntry.id > self._last_processed_id)
                 .order_by(LogEntry.id.asc())
-                .limit(self.batch_size)
+                .limit(limit)
                 .all()
             )
             
             logs = []
-            for entry, server in log_entries:
+            for entry, server, linux, windows, nginx in log_entries:
                 log = {
                     'id': entry.id,
                     'timestamp': entry.recv_time.isoformat() if entry.recv_time else None,
@@ -219,83 +327,87 @@ class SigmaRuleWorker:
                 # Add type-specific details
                 log_type = entry.log_source
                 
-                if log_type == 'linux':
-                    details = db.query(LinuxLogDetails).filter_by(log_entry_id=entry.id).first()
-                    if details:
-                        log.update({
-                            'facility': details.facility,
-                            'severity': details.severity,
-                            'program': details.program,
-                            'pid': details.pid,
-                            'message': details.message
-                        })
+                if log_type == 'linux' and linux is not None:
+                    log.update({
+                        'program': linux.app_name,
+                        'pid': linux.pid,
+                        'message': linux.raw_message
+                    })
                 
-                elif log_type == 'windows':
-                    details = db.query(WindowsLogDetails).filter_by(log_entry_id=entry.id).first()
-                    if details:
-                        log.update({
-                            'channel': details.channel,
-                            'event_id': details.event_id,
-                            'message': details.message,
-                            'user_name': details.user_name
-                        })
+                elif log_type == 'windows' and windows is not None:
+                    event = windows.content if isinstance(windows.content, dict) else {}
+                    log.update({
+                        'channel': event.get('channel'),
+                        'event_id': windows.event_id,
+                        'message': event.get('message'),
+                        'user_name': event.get('TargetUserName')
+                    })
                 
-                elif log_type == 'nginx':
-                    details = db.query(NginxLogDetails).filter_by(log_entry_id=entry.id).first()
-                    if details:
-                        log.update({
-                            'method': details.method,
-                            'path': details.path,
-                            'status_code': details.status_code,
-                            'bytes': details.bytes_sent,
-                            'user_agent': details.user_agent,
-                            'remote_addr': details.remote_addr
-                        })
+                elif log_type == 'nginx' and nginx is not None:
+                    log.update({
+                        'method': nginx.request_method,
+                        'path': nginx.request_uri,
+                        'status_code': nginx.status,
+                        'bytes': nginx.body_bytes_sent,
+                        'user_agent': nginx.http_user_agent,
+                        'remote_addr': nginx.remote_addr
+                    })
                 
                 logs.append(log)
             
             return logs
         finally:
-            db.close()
+            # Matching can take a while; don't hold the read snapshot
+            db.rollback()
     
     def _store_alerts(self, alerts: List[Dict[str, Any]]):
-        """Store alerts in database using repository."""
-        db = SessionLocal()
+        """Store alerts in database using repository (one insert for all of them)."""
+        db = self._session()
         try:
+            # server_id of every triggering log entry, in one query
+            log_ids = {alert['log_id'] for alert in alerts}
+            server_ids = dict(
+                db.query(LogEntry.id, LogEntry.server_id).filter(LogEntry.id.in_(log_ids)).all()
+            )
+            
+            rows = []
             for alert in alerts:
-                try:
-                    # Get server_id from log_entry
-                    from src.db.models import LogEntry
-                    log_entry = db.query(LogEntry).filter_by(id=alert['log_id']).first()
-                    if not log_entry:
-                        print(f"[SigmaWorker] Log entry {alert['log_id']} not found")
-                        continue
-                    
-                    create_alert(
-                        log_entry_id=alert['log_id'],
-                        server_id=log_entry.server_id,
-                        rule_id=alert['rule_id'],
-                        title=alert['rule_title'],
-                        description=alert.get('rule_description', ''),
-                        severity=alert['severity'],
-                        metadata={
-                            'timestamp': alert['timestamp'],
-                            'alert_id': alert['alert_id'],
-                            'log_type': alert['log_type'],
-                            'hostname': alert.get('hostname'),
-                            'ip_address': alert.get('ip_address'),
-                            'raw_line': alert.get('raw_line'),
-                            'matched_fields': alert.get('matched_fields', {}),
-                            'false_positives': alert.get('false_positives', []),
-                            'references': alert.get('references', [])
-                        }
-                    )
-                except Exception as e:
-                    print(f"[SigmaWorker] Error storing alert: {e}")
-                    import traceback
-                    traceback.print_exc()
+                if alert['log_id'] not in server_ids:
+                    print(f"[SigmaWorker] Log entry {alert['log_id']} not found")
+                    continue
+                
+                rows.append({
+                    'log_entry_id': alert['log_id'],
+                    'server_id': server_ids[alert['log_id']],
+                    'rule_id': alert['rule_id'],
+                    'title': alert['rule_title'],
+                    'description': alert.get('rule_description', ''),
+                    'severity': alert['severity'],
+                    'metadata': {
+                        'timestamp': alert['timestamp'],
+                        'alert_id': alert['alert_id'],
+                        'log_type': alert['log_type'],
+                        'hostname': alert.get('hostname'),
+                        'ip_address': alert.get('ip_address'),
+                        'raw_line': alert.get('raw_line'),
+                        'matched_fields': alert.get('matched_fields', {}),
+                        'false_positives': alert.get('false_positives', []),
+                        'references': alert.get('references', [])
+                    }
+                })
+            
+            if rows:
+                create_alerts_bulk(rows, session=db)
+                db.commit()
+        
+        except Exception as e:
+            db.rollback()
+            print(f"[SigmaWorker] Error storing {len(alerts)} alerts: {e}")
+            import traceback
+            traceback.print_exc()
         finally:
-            db.close()
+            # Nothing to write still leaves the server_id read open
+            db.rollback()
     
     def stop(self):
         """Stop worker gracefully."""
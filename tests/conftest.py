@@ -0,0 +1,48 @@
+"""Shared pytest fixtures."""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to sys.path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.db.database import DatabaseManager
+
+
+@pytest.fixture(scope="module")
+def db():
+    """In-memory DatabaseManager whose schema is created once per test module."""
+    manager = DatabaseManager(":memory:")
+    yield manager
+    # Closing an in-memory database discards it, so tests leave this to the fixture
+    manager.close()
+
+
+@pytest.fixture
+def orm_engine(tmp_path, monkeypatch):
+    """
+    Point src.db.setup (init_db, SessionLocal) at an empty SQLite file.
+    
+    The repositories' in-process server id caches are emptied too, so ids
+    from another test's database are never reused.
+    """
+    from sqlalchemy import create_engine, event
+    from src.db import setup
+    from src.db.repository import server_repo
+    
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'ironclad_logs.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    event.listen(engine, "connect", setup._set_sqlite_pragmas)
+    
+    monkeypatch.setattr(setup, "engine", engine)
+    monkeypatch.setattr(server_repo, "_server_id_cache", {})
+    monkeypatch.setattr(server_repo, "_server_by_id_cache", {})
+    original_bind = setup.SessionLocal.kw["bind"]
+    setup.SessionLocal.configure(bind=engine)
+    yield engine
+    setup.SessionLocal.configure(bind=original_bind)
+    engine.dispose()
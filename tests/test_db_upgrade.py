@@ -0,0 +1,112 @@
+"""Test init_db on database files created by the first release's schema."""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+# Add src to path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.db.setup import init_db
+from src.db.repository.server_repo import get_or_create_server
+from src.db.repository.log_repo import insert_raw_log, insert_raw_logs_bulk, insert_raw_logs_fast
+from src.db.repository.alert_repo import create_alert, create_alerts_bulk
+from src.db.repository.rule_repo import create_rule
+
+# Tables as create_all wrote them before any schema change: no column
+# DEFAULTs, no unique server index, no parse claim columns
+FIRST_RELEASE_SCHEMA = (
+    """CREATE TABLE server (
+        id INTEGER NOT NULL, hostname VARCHAR NOT NULL, ip_address VARCHAR,
+        server_type VARCHAR NOT NULL, PRIMARY KEY (id))""",
+    """CREATE TABLE log_entry (
+        id INTEGER NOT NULL, server_id INTEGER, recv_time DATETIME,
+        log_source VARCHAR NOT NULL, content TEXT NOT NULL, PRIMARY KEY (id),
+        FOREIGN KEY(server_id) REFERENCES server (id))""",
+    """CREATE TABLE alert_rule (
+        id INTEGER NOT NULL, name VARCHAR NOT NULL, log_source VARCHAR,
+        severity VARCHAR NOT NULL, enabled INTEGER, rule_content TEXT,
+        created_at DATETIME, PRIMARY KEY (id))""",
+    """CREATE TABLE alert (
+        id INTEGER NOT NULL, log_entry_id INTEGER, server_id INTEGER, rule_id INTEGER,
+        severity VARCHAR NOT NULL, title VARCHAR NOT NULL, description TEXT,
+        alert_metadata TEXT, triggered_at DATETIME, resolved INTEGER, PRIMARY KEY (id),
+        FOREIGN KEY(log_entry_id) REFERENCES log_entry (id),
+        FOREIGN KEY(server_id) REFERENCES server (id),
+        FOREIGN KEY(rule_id) REFERENCES alert_rule (id))""",
+)
+
+
+@pytest.fixture
+def old_db(orm_engine):
+    """A database file with the first release's tables, not yet upgraded."""
+    with orm_engine.begin() as conn:
+        for statement in FIRST_RELEASE_SCHEMA:
+            conn.execute(text(statement))
+    return orm_engine
+
+
+def test_timestamp_defaults_after_upgrade(old_db):
+    """Rows inserted without a timestamp are stamped on an upgraded database."""
+    init_db()
+    
+    server_id = get_or_create_server("web-01", "10.0.0.1", "linux")
+    log_id = insert_raw_log(server_id, "linux", "line 1")
+    insert_raw_logs_bulk([
+        {"server_id": server_id, "log_source": "linux", "content": f"line {i}"}
+        for i in range(2, 4)
+    ])
+    insert_raw_logs_fast([
+        {"server_id": server_id, "log_source": "linux", "content": f"line {i}"}
+        for i in range(4, 6)
+    ])
+    rule_id = create_rule("rule", "high", "detection: {}")
+    create_alert(log_id, server_id, rule_id, "high", "alert 1", "", {})
+    create_alerts_bulk([{"log_entry_id": log_id, "severity": "high", "title": "alert 2"}])
+    
+    with old_db.connect() as conn:
+        for table, column in (("log_entry", "recv_time"), ("alert_rule", "created_at"), ("alert", "triggered_at")):
+            total, stamped = conn.execute(text(f"SELECT COUNT(*), COUNT({column}) FROM {table}")).one()
+            assert total > 0 and stamped == total, (table, column)
+        # Same layout as CURRENT_TIMESTAMP, not a Python-formatted clock
+        fast_times = conn.execute(text("SELECT recv_time FROM log_entry WHERE content IN ('line 4', 'line 5')")).scalars().all()
+        assert len(fast_times) == 2 and all(len(value) == 19 for value in fast_times)
+    print("✓ recv_time, created_at and triggered_at stamped on an upgraded database")
+
+
+def test_duplicate_servers_merged(old_db):
+    """Servers stored twice by older releases are merged before the unique index."""
+    from src.db.repository.server_repo import get_or_create_servers
+    
+    with old_db.begin() as conn:
+        for server_id in (1, 2, 3):
+            conn.execute(text(
+                "INSERT INTO server (id, hostname, ip_address, server_type) "
+                "VALUES (:id, 'web-01', '10.0.0.1', 'linux')"
+            ), {"id": server_id})
+        conn.execute(text(
+            "INSERT INTO log_entry (id, server_id, recv_time, log_source, content) "
+            "VALUES (1, 2, '2025-12-06 10:00:00', 'linux', 'a'), (2, 3, '2025-12-06 10:00:01', 'linux', 'b')"
+        ))
+        conn.execute(text(
+            "INSERT INTO alert (log_entry_id, server_id, severity, title) VALUES (2, 3, 'high', 't')"
+        ))
+    
+    init_db()
+    
+    with old_db.connect() as conn:
+        assert conn.execute(text("SELECT id FROM server")).scalars().all() == [1]
+        assert conn.execute(text("SELECT DISTINCT server_id FROM log_entry")).scalars().all() == [1]
+        assert conn.execute(text("SELECT server_id FROM alert")).scalar() == 1
+        assert conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'ux_server_identity'"
+        )).scalar() == 1
+    
+    assert get_or_create_server("web-01", "10.0.0.1", "linux") == 1
+    assert get_or_create_servers([("web-01", "10.0.0.1", "linux"), ("web-02", "10.0.0.2", "linux")]) == {
+        ("web-01", "10.0.0.1", "linux"): 1,
+        ("web-02", "10.0.0.2", "linux"): 2,
+    }
+    print("✓ duplicate servers merged and the upsert works")
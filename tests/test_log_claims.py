@@ -0,0 +1,128 @@
+"""Test parser work claims: claim, release and lease expiry."""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+# Add src to path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.db.setup import init_db
+from src.db.repository.server_repo import get_or_create_server
+from src.db.repository.log_repo import (
+    CLAIM_LEASE_SECONDS, claim_unparsed_logs, get_unparsed_linux_logs, insert_raw_logs_bulk,
+    release_log_claims
+)
+
+
+@pytest.fixture
+def pending_logs(orm_engine):
+    """Ids of four unparsed Linux entries in a fresh database."""
+    init_db()
+    server_id = get_or_create_server("web-01", "10.0.0.1", "linux")
+    return insert_raw_logs_bulk([
+        {"server_id": server_id, "log_source": "linux", "content": f"line {i}"}
+        for i in range(4)
+    ])
+
+
+def _claimed(rows):
+    return sorted(row.id for row in rows)
+
+
+def test_claim_and_release(pending_logs):
+    """Claimed entries are skipped by other workers until released."""
+    first = claim_unparsed_logs("linux", "worker-a", limit=3)
+    assert _claimed(first) == pending_logs[:3]
+
+    # Only the unclaimed entry is left for a second worker
+    assert _claimed(claim_unparsed_logs("linux", "worker-b")) == pending_logs[3:]
+    assert claim_unparsed_logs("linux", "worker-c") == []
+
+    # Releasing part of a batch frees exactly those entries
+    assert release_log_claims("worker-a", pending_logs[:1]) == 1
+    assert _claimed(claim_unparsed_logs("linux", "worker-c")) == pending_logs[:1]
+
+    # Releasing everything frees the rest of worker-a's batch
+    assert release_log_claims("worker-a") == 2
+    assert _claimed(claim_unparsed_logs("linux", "worker-c")) == pending_logs[1:3]
+    print("✓ Claims are exclusive and released entries are claimed again")
+
+
+def test_expired_claims_reclaimed(pending_logs, orm_engine):
+    """A crashed worker's claims are handed out again once the lease runs out."""
+    assert _claimed(claim_unparsed_logs("linux", "crashed")) == pending_logs
+    assert claim_unparsed_logs("linux", "worker-b") == []
+
+    with orm_engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE log_entry SET parse_claimed_at = datetime('now', :age) WHERE id IN (:a, :b)"
+        ), {"age": f"-{CLAIM_LEASE_SECONDS + 60} seconds", "a": pending_logs[0], "b": pending_logs[1]})
+        # Claimed before the lease column existed
+        conn.execute(text(
+            "UPDATE log_entry SET parse_claimed_at = NULL WHERE id = :id"
+        ), {"id": pending_logs[2]})
+
+    assert _claimed(claim_unparsed_logs("linux", "worker-b")) == pending_logs[:3]
+    # The takeover moved the claims, so the crashed worker cannot release them
+    assert release_log_claims("crashed", pending_logs[:3]) == 0
+    print("✓ Expired and lease-less claims are reclaimed")
+
+
+def test_worker_settles_batches(pending_logs, orm_engine, monkeypatch):
+    """Rejected entries are retired; entries whose parse raised or save failed are released."""
+    from src.workers import parser_worker
+    from src.db.repository.linux_repo import insert_linux_details_bulk
+    
+    worker = parser_worker.ParserWorker()
+    
+    def parse(content):
+        if content == "line 1":
+            raise ValueError("parser bug")
+        return None if content == "line 0" else {"message": content}
+    monkeypatch.setattr(worker, "_parse_linux_log", parse)
+    
+    def failing_insert(details):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(parser_worker, "insert_linux_details_bulk", failing_insert)
+    assert worker._process_linux_logs() == 0
+    
+    with orm_engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, parsed, parse_claim_id FROM log_entry ORDER BY id")).all()
+    # line 0 is retired for good; line 1 (parser raised) and the failed
+    # saves are free for the next poll
+    assert [tuple(row) for row in rows] == [(pending_logs[0], 1, None)] + [(i, 0, None) for i in pending_logs[1:]]
+    assert [row.id for row in get_unparsed_linux_logs()] == pending_logs[1:]
+    
+    # orm_engine shares this monkeypatch, so put the real insert back by hand
+    monkeypatch.setattr(parser_worker, "insert_linux_details_bulk", insert_linux_details_bulk)
+    monkeypatch.setattr(worker, "_parse_linux_log", lambda content: {"message": content})
+    assert worker._process_linux_logs() == 3
+    assert claim_unparsed_logs("linux", "worker-b") == []
+    assert list(get_unparsed_linux_logs()) == []
+    print("✓ Rejected lines retired, parse errors and failed saves retried")
+
+
+def test_claim_locks_only_log_entry(monkeypatch):
+    """The PostgreSQL claim locks log_entry rows without joining a details table."""
+    from sqlalchemy.dialects import postgresql
+    from src.db.repository import log_repo
+    
+    statements = []
+    
+    class RecordingSession:
+        def execute(self, stmt):
+            statements.append(stmt)
+            raise RuntimeError("not executed")
+        
+        def close(self):
+            pass
+    monkeypatch.setattr(log_repo, "SessionLocal", RecordingSession)
+    with pytest.raises(RuntimeError):
+        claim_unparsed_logs("linux", "worker-a")
+    
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql and "JOIN" not in sql
+    print("✓ Claim compiles to a join-free FOR UPDATE SKIP LOCKED on PostgreSQL")
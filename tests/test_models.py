@@ -0,0 +1,32 @@
+"""Test ORM model definitions."""
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add src to path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.db.base import Base
+import src.db.models  # noqa: F401
+
+TABLENAME_PATTERN = re.compile(r"""__tablename__\s*=\s*["']([^"']+)["']""")
+
+def test_no_duplicate_tables():
+    """Every table is declared once under src/ and mapped once on Base."""
+    declared = Counter()
+    for path in (ROOT / "src").rglob("*.py"):
+        declared.update(TABLENAME_PATTERN.findall(path.read_text(encoding="utf-8", errors="ignore")))
+
+    duplicates = [name for name, count in declared.items() if count > 1]
+    assert not duplicates, f"tables declared more than once: {duplicates}"
+    print(f"✓ {len(declared)} tables declared once each")
+
+    mapped = Counter(mapper.local_table.name for mapper in Base.registry.mappers)
+    assert all(count == 1 for count in mapped.values()), mapped
+    assert set(mapped) == set(declared)
+    print(f"✓ {len(mapped)} mappers registered on Base")
+
+if __name__ == "__main__":
+    test_no_duplicate_tables()
@@ -0,0 +1,58 @@
+"""Test the IroncladParser ingest module (src/parsers/network.py)."""
+import py_compile
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+SAMPLE_BATCH = [
+    {"line": "Dec  6 04:17:07 Hp-lap704 sshd[948]: Failed password for root from 10.0.0.9 port 22 ssh2",
+     "src_ip": "10.0.0.5", "recv_time": "2025-12-06T10:00:00"},
+    {"line": '192.168.1.20 - - [06/Dec/2025:10:00:01 +0000] "GET /index.html HTTP/1.1" 200 512 "-" "curl/8.0"',
+     "src_ip": "192.168.1.20", "recv_time": "2025-12-06T10:00:01"},
+    {"line": '{"hostname":"HP-LAP704","channel":"Security","event_id":4799}',
+     "src_ip": "10.0.0.7", "recv_time": "2025-12-06T10:00:02"},
+    {"line": "1733479202.123 CxyZ 10.0.0.1 5353 10.0.0.2 53 udp dns 0.01 40 80 SF - 0 Dd 1 68 1 108",
+     "src_ip": "10.0.0.1", "recv_time": "2025-12-06T10:00:03"},
+    {"line": "not a log line", "src_ip": "10.0.0.8", "recv_time": "2025-12-06T10:00:04"},
+]
+
+
+def test_module_compiles():
+    """The module is valid Python, whether or not FastAPI is installed."""
+    py_compile.compile(str(ROOT / "src" / "parsers" / "network.py"), doraise=True)
+    print("✓ src/parsers/network.py compiles")
+
+
+def test_process_batch(monkeypatch):
+    """Each text format is dispatched to its source and stored in one batch."""
+    pytest.importorskip("fastapi")
+    from src.parsers import network
+
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE server (id INTEGER PRIMARY KEY, hostname TEXT, ip_address TEXT, server_type TEXT);
+        CREATE TABLE log_entry (id INTEGER PRIMARY KEY, server_id INTEGER, recv_time TEXT,
+                                log_source TEXT, content TEXT);
+    """)
+
+    class NoAlerts:
+        def match_logs(self, logs):
+            return []
+    monkeypatch.setattr(network, "get_db_connection", lambda: conn)
+    monkeypatch.setattr(network.IroncladParser, "sigma_engine", NoAlerts())
+
+    parser = network.IroncladParser()
+    parser.process_batch(SAMPLE_BATCH)
+
+    sources = [row[0] for row in conn.execute("SELECT log_source FROM log_entry ORDER BY id")]
+    # JSON lines are stored first, then the text lines in order
+    assert sources == ["windows", "linux", "nginx", "zeek_conn"]
+    hostnames = {row[0] for row in conn.execute("SELECT hostname FROM server")}
+    assert hostnames == {"HP-LAP704", "Hp-lap704", "192.168.1.20", "10.0.0.1"}
+    print(f"✓ {len(sources)} of {len(SAMPLE_BATCH)} sample lines stored by source")
@@ -4,15 +4,27 @@ Test module for log parsers
 Tests the WindowsParser and LinuxParser functionality with sample log data.
 """
 
+import os
 import sys
+from operator import itemgetter
 from pathlib import Path
 
+import polars as pl
+
 # Add project root to sys.path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.parsers import WindowsParser, LinuxParser
 
+# Output files are only written when asked for, e.g. to inspect them locally
+WRITE_OUTPUTS = os.environ.get("SIH_WRITE_OUTPUTS") == "1"
+
+# Linux fields reported per log, read in one call; 'N/A' where missing
+LINUX_REPORT_FIELDS = ("timestamp", "hostname", "app_name", "pid", "raw_message")
+LINUX_REPORT_DEFAULTS = dict.fromkeys(LINUX_REPORT_FIELDS, "N/A")
+linux_report_fields = itemgetter(*LINUX_REPORT_FIELDS)
+
 
 def test_linux():
     """Test Linux syslog parser with real log data from syslog_messages.log"""
@@ -43,66 +55,78 @@ def test_linux():
         "Dec  6 04:17:07 Hp-lap704 CRON[948]: (root) CMD (   cd / && run-parts --report /etc/cron.hourly)",
     ]
     
+    batch_logs = [
+        {"line": log, "src_ip": "192.168.0.109", "recv_time": "2024-12-04T17:00:00"}
+        for log in test_logs
+    ]
+    
     print("=" * 70)
     print("LINUX PARSER TESTS")
     print("=" * 70)
     
-    for i, log in enumerate(test_logs, 1):
-        print(f"\n[Test {i}] Original log:")
-        print(f"  {log[:100]}..." if len(log) > 100 else f"  {log}")
+    # Parse every line in one call; None where a line did not parse
+    parsed_logs = parser.parse_many(batch_logs)
+    
+    # One write for the whole report instead of a print per field
+    out = []
+    for i, (log, parsed) in enumerate(zip(test_logs, parsed_logs), 1):
+        out.append(f"\n[Test {i}] Original log:")
+        out.append(f"  {log[:100]}..." if len(log) > 100 else f"  {log}")
         
         # Test can_parse
         can_parse = parser.can_parse(log)
-        print(f"\n  Can parse: {can_parse}")
+        out.append(f"\n  Can parse: {can_parse}")
         
         if can_parse:
-            # Test parse
-            parsed = parser.parse(log, metadata={"src_ip": "192.168.0.109", "recv_time": "2024-12-04T17:00:00"})
-            
             if parsed:
-                print(f"  ✓ Parsed successfully:")
-                print(f"    - Timestamp: {parsed.get('timestamp', 'N/A')}")
-                print(f"    - Hostname: {parsed.get('hostname', 'N/A')}")
-                print(f"    - App: {parsed.get('app_name', 'N/A')}")
-                print(f"    - PID: {parsed.get('pid', 'N/A')}")
-                print(f"    - Message: {parsed.get('raw_message', 'N/A')[:60]}...")
+                timestamp, hostname, app_name, pid, raw_message = linux_report_fields(
+                    {**LINUX_REPORT_DEFAULTS, **parsed}
+                )
+                out.append(f"  ✓ Parsed successfully:")
+                out.append(f"    - Timestamp: {timestamp}")
+                out.append(f"    - Hostname: {hostname}")
+                out.append(f"    - App: {app_name}")
+                out.append(f"    - PID: {pid}")
+                out.append(f"    - Message: {raw_message[:60]}...")
                 
                 # Check for SSH enrichment
                 if parsed.get('ssh_action'):
-                    print(f"    - SSH Action: {parsed.get('ssh_action')}")
-                    print(f"    - SSH User: {parsed.get('ssh_user')}")
-                    print(f"    - SSH IP: {parsed.get('ssh_ip')}")
+                    out.append(f"    - SSH Action: {parsed.get('ssh_action')}")
+                    out.append(f"    - SSH User: {parsed.get('ssh_user')}")
+                    out.append(f"    - SSH IP: {parsed.get('ssh_ip')}")
             else:
-                print(f"  ✗ Parsing failed")
+                out.append(f"  ✗ Parsing failed")
+    
+    sys.stdout.write("\n".join(out) + "\n")
     
     # Test batch parsing
     print("\n" + "=" * 70)
     print("BATCH PARSING TEST")
     print("=" * 70)
     
-    batch_logs = [
-        {"line": log, "src_ip": "192.168.0.109", "recv_time": "2024-12-04T17:00:00"}
-        for log in test_logs
-    ]
-    
     df = parser.parse_batch(batch_logs)
     if df is not None:
         print(f"\n✓ Parsed {len(df)} logs into DataFrame")
         print(f"  Columns: {df.columns}")
         print(f"  Shape: {df.shape}")
         
-        # Test file writing
-        print("\n" + "=" * 70)
-        print("FILE WRITING TEST")
-        print("=" * 70)
+        # Test file writing; off unless SIH_WRITE_OUTPUTS=1
+        if WRITE_OUTPUTS:
+            print("\n" + "=" * 70)
+            print("FILE WRITING TEST")
+            print("=" * 70)
         
-        # Write as CSV
-        csv_path = parser.write_to_file(df, format="csv")
-        print(f"  ✓ CSV written to: {csv_path}")
+            # Write as Feather (Arrow IPC) and read it back
+            feather_path = parser.write_to_file(df, format="feather")
+            assert pl.read_ipc(feather_path).shape == df.shape
+            print(f"  ✓ Feather written to: {feather_path}")
         
-        # Write as JSON
-        json_path = parser.write_to_file(df, format="json")
-        print(f"  ✓ JSON written to: {json_path}")
+            # CSV and JSON only when every output format is being checked
+            if os.environ.get("FULL_FORMATS"):
+                csv_path = parser.write_to_file(df, format="csv")
+                print(f"  ✓ CSV written to: {csv_path}")
+                json_path = parser.write_to_file(df, format="json")
+                print(f"  ✓ JSON written to: {json_path}")
     else:
         print("\n✗ Batch parsing failed")
 
@@ -153,64 +177,68 @@ def test_windows():
         '''{"timestamp":"2025-12-06 04:06:30","hostname":"HP-LAP704","channel":"Security","event_id":4799,"level":"Information","message":"A security-enabled local group membership was enumerated.\\r\\n\\r\\nSubject:\\r\\n\\tSecurity ID:\\t\\tS-1-5-21-64021822-3933034794-494143053-1009\\r\\n\\tAccount Name:\\t\\tHarsh\\r\\n\\tAccount Domain:\\t\\tHP-LAP704\\r\\n\\tLogon ID:\\t\\t0xC4589\\r\\n\\r\\nGroup:\\r\\n\\tSecurity ID:\\t\\tS-1-5-32-544\\r\\n\\tGroup Name:\\t\\tAdministrators\\r\\n\\tGroup Domain:\\t\\tBuiltin\\r\\n\\r\\nProcess Information:\\r\\n\\tProcess ID:\\t\\t0x278c\\r\\n\\tProcess Name:\\t\\tC:\\\\Windows\\\\System32\\\\taskhostw.exe","TargetUserName":"Administrators","TargetDomainName":"Builtin","TargetSid":"S-1-5-32-544","SubjectUserSid":"S-1-5-21-64021822-3933034794-494143053-1009","SubjectUserName":"Harsh","SubjectDomainName":"HP-LAP704","SubjectLogonId":"0xc4589","CallerProcessId":"0x278c","CallerProcessName":"C:\\\\Windows\\\\System32\\\\taskhostw.exe"}'''
     ]
     
+    batch_logs = [
+        {"line": log, "src_ip": "10.0.0.50", "recv_time": "2024-12-04T10:00:00"}
+        for log in test_logs
+    ]
+    
     print("\n" + "=" * 70)
     print("WINDOWS PARSER TESTS")
     print("=" * 70)
     
-    for i, log in enumerate(test_logs, 1):
-        print(f"\n[Test {i}] Windows Event JSON")
+    # Parse every event in one call; None where an event did not parse
+    parsed_logs = parser.parse_many(batch_logs)
+    
+    # One write for the whole report instead of a print per field
+    out = []
+    for i, (log, parsed) in enumerate(zip(test_logs, parsed_logs), 1):
+        out.append(f"\n[Test {i}] Windows Event JSON")
         
         # Test can_parse
         can_parse = parser.can_parse(log)
-        print(f"  Can parse: {can_parse}")
+        out.append(f"  Can parse: {can_parse}")
         
         if can_parse:
-            # Test parse
-            parsed = parser.parse(log, metadata={"src_ip": "10.0.0.50", "recv_time": "2024-12-04T10:00:00"})
-            
             if parsed:
-                print(f"  ✓ Parsed successfully:")
-                print(f"    - Hostname: {parsed.get('hostname', 'N/A')}")
-                print(f"    - EventID: {parsed.get('EventID', parsed.get('event_id', 'N/A'))}")
-                print(f"    - LogName/Channel: {parsed.get('channel', parsed.get('LogName', 'N/A'))}")
-                print(f"    - TimeCreated: {parsed.get('TimeCreated', parsed.get('timestamp', 'N/A'))}")
+                out.append(f"  ✓ Parsed successfully:")
+                out.append(f"    - Hostname: {parsed.get('hostname', 'N/A')}")
+                out.append(f"    - EventID: {parsed.get('EventID', parsed.get('event_id', 'N/A'))}")
+                out.append(f"    - LogName/Channel: {parsed.get('channel', parsed.get('LogName', 'N/A'))}")
+                out.append(f"    - TimeCreated: {parsed.get('TimeCreated', parsed.get('timestamp', 'N/A'))}")
                 
                 # Check for Sigma normalized fields
                 if 'cmdline' in parsed:
-                    print(f"    - CommandLine (Sigma): {parsed['cmdline'][:60]}...")
+                    out.append(f"    - CommandLine (Sigma): {parsed['cmdline'][:60]}...")
                 if 'name' in parsed:
-                    print(f"    - Process Name (Sigma): {parsed['name']}")
+                    out.append(f"    - Process Name (Sigma): {parsed['name']}")
                 if 'parent' in parsed:
-                    print(f"    - Parent Process (Sigma): {parsed['parent']}")
+                    out.append(f"    - Parent Process (Sigma): {parsed['parent']}")
                 if 'user' in parsed:
-                    print(f"    - User (Sigma): {parsed['user']}")
+                    out.append(f"    - User (Sigma): {parsed['user']}")
                 if 'target_file' in parsed:
-                    print(f"    - Target File (Sigma): {parsed['target_file']}")
+                    out.append(f"    - Target File (Sigma): {parsed['target_file']}")
                 
                 # Check for real log fields
                 if 'SubjectUserName' in parsed:
-                    print(f"    - Subject User: {parsed['SubjectUserName']}")
+                    out.append(f"    - Subject User: {parsed['SubjectUserName']}")
                 if 'CallerProcessName' in parsed:
-                    print(f"    - Caller Process: {parsed['CallerProcessName']}")
+                    out.append(f"    - Caller Process: {parsed['CallerProcessName']}")
                 
                 # Check for message parsing
                 if 'Subject_Security_ID' in parsed:
-                    print(f"    - Parsed Message: Found {sum(1 for k in parsed if k.startswith('Subject_'))} Subject fields")
+                    out.append(f"    - Parsed Message: Found {sum(1 for k in parsed if k.startswith('Subject_'))} Subject fields")
                 if 'Group_Security_ID' in parsed:
-                    print(f"    - Parsed Message: Found {sum(1 for k in parsed if k.startswith('Group_'))} Group fields")
+                    out.append(f"    - Parsed Message: Found {sum(1 for k in parsed if k.startswith('Group_'))} Group fields")
             else:
-                print(f"  ✗ Parsing failed")
+                out.append(f"  ✗ Parsing failed")
+    
+    sys.stdout.write("\n".join(out) + "\n")
     
     # Test batch parsing
     print("\n" + "=" * 70)
     print("BATCH PARSING TEST")
     print("=" * 70)
     
-    batch_logs = [
-        {"line": log, "src_ip": "10.0.0.50", "recv_time": "2024-12-04T10:00:00"}
-        for log in test_logs
-    ]
-    
     df = parser.parse_batch(batch_logs)
     if df is not None:
         print(f"\n✓ Parsed {len(df)} Windows events into DataFrame")
@@ -222,18 +250,23 @@ def test_windows():
         if sigma_cols:
             print(f"  Sigma normalized fields: {sigma_cols}")
         
-        # Test file writing
-        print("\n" + "=" * 70)
-        print("FILE WRITING TEST")
-        print("=" * 70)
+        # Test file writing; off unless SIH_WRITE_OUTPUTS=1
+        if WRITE_OUTPUTS:
+            print("\n" + "=" * 70)
+            print("FILE WRITING TEST")
+            print("=" * 70)
         
-        # Write as JSON (default for Windows)
-        json_path = parser.write_to_file(df, format="json")
-        print(f"  ✓ JSON written to: {json_path}")
+            # Write as Feather (Arrow IPC) and read it back
+            feather_path = parser.write_to_file(df, format="feather")
+            assert pl.read_ipc(feather_path).shape == df.shape
+            print(f"  ✓ Feather written to: {feather_path}")
         
-        # Write as CSV (alternative)
-        csv_path = parser.write_to_file(df, format="csv")
-        print(f"  ✓ CSV written to: {csv_path}")
+            # JSON (default for Windows) and CSV only when every output format is being checked
+            if os.environ.get("FULL_FORMATS"):
+                json_path = parser.write_to_file(df, format="json")
+                print(f"  ✓ JSON written to: {json_path}")
+                csv_path = parser.write_to_file(df, format="csv")
+                print(f"  ✓ CSV written to: {csv_path}")
     else:
         print("\n✗ Batch parsing failed")
 
@@ -14,7 +14,7 @@ from src.parsers.parser_manager import ParserManager
 from src.db.database import DatabaseManager
 
 
-def test_components():
+def test_components(db):
     """Test each component individually."""
     
     print("=" * 60)
@@ -43,28 +43,23 @@ def test_components():
         }
     ]
     
-    for log in test_logs:
-        parsed = pm.parse(log)
-        if parsed:
-            print(f"  ✓ Parsed as {parsed['log_type']}: {parsed.get('hostname', 'N/A')}")
-        else:
-            print(f"  ✗ Failed to parse")
+    # One call for the whole list; logs that did not parse are left out
+    parsed_logs = pm.parse_many(test_logs)
+    out = [f"  ✓ Parsed as {parsed['log_type']}: {parsed.get('hostname', 'N/A')}" for parsed in parsed_logs]
+    out += ["  ✗ Failed to parse"] * (len(test_logs) - len(parsed_logs))
+    sys.stdout.write("\n".join(out) + "\n")
     
     # Test 2: DatabaseManager
     print("\n[2] Testing DatabaseManager...")
-    db = DatabaseManager("./test_pipeline.db")
     
     # Save test logs
-    parsed_logs = [pm.parse(log) for log in test_logs]
-    saved = db.save_batch([p for p in parsed_logs if p])
+    saved = db.save_batch(parsed_logs)
     
     print(f"  ✓ Saved {saved} logs")
     
     stats = db.get_stats()
     print(f"  ✓ Database stats: {stats}")
     
-    db.close()
-    
     # Test 3: UdpListener (dry run)
     print("\n[3] Testing UdpListener...")
     print("  ℹ Listener requires network, skipping bind test")
@@ -75,7 +70,7 @@ def test_components():
     print("=" * 60)
 
 
-def test_integration():
+def test_integration(db):
     """Test integration without network."""
     
     print("\n\n" + "=" * 60)
@@ -83,7 +78,6 @@ def test_integration():
     print("=" * 60)
     
     pm = ParserManager()
-    db = DatabaseManager("./test_integration.db")
     
     # Simulate receiving logs
     test_batch = [
@@ -94,17 +88,15 @@ def test_integration():
         '{"timestamp":"2025-12-06 04:06:31","hostname":"HP-LAP704","channel":"System","event_id":1000}'
     ]
     
-    parsed_batch = []
-    for i, line in enumerate(test_batch):
-        raw_data = {
+    raw_batch = [
+        {
             "recv_time": f"2025-12-06T10:00:{i:02d}",
             "src_ip": "127.0.0.1",
             "line": line
         }
-        
-        parsed = pm.parse(raw_data)
-        if parsed:
-            parsed_batch.append(parsed)
+        for i, line in enumerate(test_batch)
+    ]
+    parsed_batch = pm.parse_many(raw_batch)
     
     print(f"\n[Pipeline] Received: {len(test_batch)}")
     print(f"[Pipeline] Parsed: {len(parsed_batch)}")
@@ -115,8 +107,6 @@ def test_integration():
     stats = db.get_stats()
     print(f"\n[Stats] {stats}")
     
-    db.close()
-    
     print("\n" + "=" * 60)
     print("INTEGRATION TEST PASSED ✓")
     print("=" * 60)
@@ -150,8 +140,9 @@ def print_usage():
 
 if __name__ == "__main__":
     try:
-        test_components()
-        test_integration()
+        db = DatabaseManager(":memory:")
+        test_components(db)
+        test_integration(db)
         print_usage()
         
         print("\n✓ All tests passed! Pipeline is ready.")
@@ -7,10 +7,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.db.database import DatabaseManager
 
-def test_queries():
+def test_queries(db):
     """Test all database query methods."""
-    db = DatabaseManager(":memory:")
-    
     print("✓ Database initialized")
     
     # Add test server (using private method for testing)
@@ -57,10 +55,11 @@ def test_queries():
         }
     ]
     
-    for log in test_logs:
-        db.save(log)
+    # One transaction for all of them
+    saved = db.save_batch(test_logs)
+    assert saved == len(test_logs)
     
-    print(f"✓ {len(test_logs)} test logs saved")
+    print(f"✓ {saved} test logs saved")
     
     # Test get_stats()
     stats = db.get_stats()
@@ -78,7 +77,16 @@ def test_queries():
     linux_logs = db.get_recent_logs(log_type="linux")
     assert len(linux_logs) == 1
     print(f"✓ get_recent_logs(log_type='linux'): {len(linux_logs)} logs")
-    
+
+    # Test keyset pagination continues where the first page stopped
+    next_page = db.get_recent_logs(
+        limit=2,
+        before_timestamp=recent[-1]["timestamp"],
+        before_id=recent[-1]["id"]
+    )
+    assert [l["log_type"] for l in next_page] == ["linux"]
+    print(f"✓ get_recent_logs(before_id={recent[-1]['id']}): {len(next_page)} logs")
+
     # Test get_log_by_id()
     log = db.get_log_by_id(1)
     assert log is not None
@@ -109,5 +117,49 @@ def test_queries():
     
     print("\n🎉 All query methods working correctly!")
 
+def test_hourly_rollup_matches_backfill():
+    """save/save_batch bucket timestamps exactly like the log_hourly backfill."""
+    manager = DatabaseManager(":memory:")
+    try:
+        timestamps = [
+            "2025-12-06T10:15:32+05:30",   # 04:45 UTC
+            "2025-12-06T10:45:00+05:30",   # 05:15 UTC
+            "2025-12-06 10:59:59",
+            "2025-12-06 10:00:00",
+            "Dec  6 04:17:07",             # not a date strftime understands
+        ]
+        logs = [
+            {
+                "timestamp": timestamp,
+                "hostname": "test-host",
+                "ip_address": "192.168.1.1",
+                "log_type": "linux",
+                "raw_line": f"Test log {i}",
+                "parsed_data": "{}",
+            }
+            for i, timestamp in enumerate(timestamps)
+        ]
+        manager.save_batch(logs[:-1])
+        manager.save(logs[-1])
+        
+        conn = manager.get_connection()
+        rollup = {tuple(row) for row in conn.execute("SELECT hour, log_type, count FROM log_hourly")}
+        backfill = {tuple(row) for row in conn.execute('''
+            SELECT strftime('%Y-%m-%d %H:00:00', timestamp) AS bucket, log_type, COUNT(*)
+            FROM log_entry
+            WHERE bucket IS NOT NULL
+            GROUP BY bucket, log_type
+        ''')}
+        assert rollup == backfill
+        assert rollup == {
+            ("2025-12-06 04:00:00", "linux", 1),
+            ("2025-12-06 05:00:00", "linux", 1),
+            ("2025-12-06 10:00:00", "linux", 2),
+        }
+        print(f"✓ log_hourly matches the backfill: {len(rollup)} buckets")
+    finally:
+        manager.close()
+
+
 if __name__ == "__main__":
-    test_queries()
+    test_queries(DatabaseManager(":memory:"))
